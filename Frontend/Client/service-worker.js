@@ -0,0 +1,114 @@
+/*
+ * Royal Paints service worker, rendered by baseapp.views.service_worker.
+ *
+ * - static-<version>: precached site bundle and logos; other static files
+ *   are added as they are requested (cache-first when the URLs are hashed)
+ * - pages-<content version>: public pages, stale-while-revalidate; a new
+ *   content version means a new worker, whose activation drops the old
+ *   page cache
+ * - runtime-<version>: CDN assets (stale-while-revalidate) and uploaded
+ *   images (cache-first, capped)
+ * - failed navigations fall back to the precached offline page
+ */
+const CONFIG = {{ config|safe }};
+
+const STATIC_CACHE = `static-${CONFIG.staticVersion}`;
+const PAGE_CACHE = `pages-${CONFIG.contentVersion}`;
+const RUNTIME_CACHE = `runtime-${CONFIG.staticVersion}`;
+const CURRENT_CACHES = [STATIC_CACHE, PAGE_CACHE, RUNTIME_CACHE];
+const PAGE_PATTERNS = CONFIG.pages.map((pattern) => new RegExp(pattern));
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then((cache) => cache.addAll([...CONFIG.precache, CONFIG.offlineUrl]))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then((names) => Promise.all(
+                names.filter((name) => !CURRENT_CACHES.includes(name)).map((name) => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+function cacheable(response) {
+    return response.ok || response.type === 'opaque';
+}
+
+function store(event, cacheName, response, maxEntries) {
+    const copy = response.clone();
+    event.waitUntil(
+        caches.open(cacheName).then(async (cache) => {
+            await cache.put(event.request, copy);
+            if (maxEntries) {
+                const keys = await cache.keys();
+                await Promise.all(keys.slice(0, Math.max(keys.length - maxEntries, 0)).map((key) => cache.delete(key)));
+            }
+        })
+    );
+}
+
+function staleWhileRevalidate(event, cacheName) {
+    const network = fetch(event.request).then((response) => {
+        if (cacheable(response)) {
+            store(event, cacheName, response);
+        }
+        return response;
+    });
+    return caches.open(cacheName)
+        .then((cache) => cache.match(event.request, { ignoreVary: true }))
+        .then((cached) => {
+            if (!cached) {
+                return network;
+            }
+            event.waitUntil(network.catch(() => undefined));
+            return cached;
+        });
+}
+
+function cacheFirst(event, cacheName, maxEntries) {
+    return caches.open(cacheName)
+        .then((cache) => cache.match(event.request))
+        .then((cached) => cached || fetch(event.request).then((response) => {
+            if (response.ok) {
+                store(event, cacheName, response, maxEntries);
+            }
+            return response;
+        }));
+}
+
+self.addEventListener('fetch', (event) => {
+    const { request } = event;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+
+    if (url.origin !== self.location.origin) {
+        if (CONFIG.runtimeOrigins.includes(url.origin)) {
+            event.respondWith(staleWhileRevalidate(event, RUNTIME_CACHE));
+        }
+        return;
+    }
+    if (CONFIG.bypass.some((prefix) => url.pathname.startsWith(prefix))) {
+        return;
+    }
+    if (url.pathname.startsWith(CONFIG.staticUrl)) {
+        event.respondWith(
+            CONFIG.hashedStatic ? cacheFirst(event, STATIC_CACHE) : staleWhileRevalidate(event, STATIC_CACHE)
+        );
+    } else if (url.pathname.startsWith(CONFIG.mediaUrl)) {
+        event.respondWith(cacheFirst(event, RUNTIME_CACHE, CONFIG.maxMediaEntries));
+    } else if (request.mode === 'navigate') {
+        const isPage = !url.search && PAGE_PATTERNS.some((pattern) => pattern.test(url.pathname));
+        const response = isPage ? staleWhileRevalidate(event, PAGE_CACHE) : fetch(request);
+        event.respondWith(
+            response.catch(() => caches.match(CONFIG.offlineUrl).then((offline) => offline || Response.error()))
+        );
+    }
+});
@@ -0,0 +1,130 @@
+"""
+Email-based authentication with a cache-backed login lockout
+
+EmailBackend resolves users through the unique, indexed UserEmailModel
+table (one indexed lookup instead of a case-insensitive scan of
+auth_user). Failed attempts are counted per account and per client IP in
+the default cache; once either counter reaches its limit, further attempts
+are rejected before any password hashing happens.
+
+Behind the TLS proxy every request arrives from the proxy's address, so
+the client IP comes from TRUSTED_PROXY_HEADER. When that header is not
+configured (or not usable) the IP counter is skipped and the lockout is
+per account only, rather than one shared counter for every visitor.
+
+Settings:
+    LOGIN_LOCKOUT_ACCOUNT_ATTEMPTS: failures per email before lockout
+    LOGIN_LOCKOUT_IP_ATTEMPTS: failures per client IP before lockout
+    LOGIN_LOCKOUT_SECONDS: how long counters (and lockouts) last
+    BEHIND_TLS_PROXY: REMOTE_ADDR is the proxy, not the client
+    TRUSTED_PROXY_HEADER / TRUSTED_PROXY_COUNT: where the client IP is
+"""
+import hashlib
+import ipaddress
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+
+from .models import UserEmailModel, normalize_email_key
+
+
+# ======================================================================
+# LOCKOUT COUNTERS
+# ======================================================================
+
+def client_ip(request):
+    """
+    The client's address, or None when it can't be trusted
+
+    Behind the proxy this is the TRUSTED_PROXY_COUNT-th entry from the
+    right of TRUSTED_PROXY_HEADER; entries further left are client-supplied
+    and could be forged to dodge the per-IP counter.
+    """
+    if request is None:
+        return None
+    if not settings.BEHIND_TLS_PROXY:
+        return request.META.get('REMOTE_ADDR') or None
+    header = settings.TRUSTED_PROXY_HEADER
+    if not header:
+        return None
+    hops = [hop.strip() for hop in request.META.get(header, '').split(',') if hop.strip()]
+    if len(hops) < settings.TRUSTED_PROXY_COUNT:
+        return None
+    try:
+        return str(ipaddress.ip_address(hops[-settings.TRUSTED_PROXY_COUNT]))
+    except ValueError:
+        return None
+
+
+def _account_key(email):
+    digest = hashlib.sha256(normalize_email_key(email).encode()).hexdigest()
+    return f'login-failures:account:{digest}'
+
+
+def _ip_key(ip):
+    return f'login-failures:ip:{ip}'
+
+
+def _keys(email, ip):
+    # No trusted client IP: count per account only
+    return [_account_key(email)] + ([_ip_key(ip)] if ip else [])
+
+
+def is_locked_out(email, ip):
+    counts = cache.get_many(_keys(email, ip))
+    return (
+        counts.get(_account_key(email), 0) >= settings.LOGIN_LOCKOUT_ACCOUNT_ATTEMPTS
+        or bool(ip) and counts.get(_ip_key(ip), 0) >= settings.LOGIN_LOCKOUT_IP_ATTEMPTS
+    )
+
+
+def record_failure(email, ip):
+    for key in _keys(email, ip):
+        # add() starts the lockout window on the first failure only
+        cache.add(key, 0, settings.LOGIN_LOCKOUT_SECONDS)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, 1, settings.LOGIN_LOCKOUT_SECONDS)
+
+
+def reset_failures(email):
+    cache.delete(_account_key(email))
+
+
+# ======================================================================
+# AUTHENTICATION BACKEND
+# ======================================================================
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticates with authenticate(request, email=..., password=...)
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+
+        email = normalize_email_key(email)
+        ip = client_ip(request)
+        if is_locked_out(email, ip):
+            # Stops the backend chain without hashing the password
+            raise PermissionDenied('Too many failed login attempts')
+
+        try:
+            user = UserEmailModel.objects.select_related('user').get(email=email).user
+        except UserEmailModel.DoesNotExist:
+            # Hash once anyway so unknown emails take as long as wrong passwords
+            get_user_model()().set_password(password)
+            record_failure(email, ip)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            reset_failures(email)
+            return user
+        record_failure(email, ip)
+        return None
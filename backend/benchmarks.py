@@ -0,0 +1,134 @@
+"""
+Shared helpers for the `manage.py benchmark` suites
+
+Benchmarks run against a throwaway SQLite database created next to the
+system temp dir, never against the configured MySQL database.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .leads import backfill_leads
+from .models import BlogModel, CarrierModel, ContactModel
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ======================================================================
+# MEASUREMENT HELPERS
+# ======================================================================
+
+def peak_rss_kb():
+    """
+    Peak resident set size of this process so far, in KiB
+
+    This is a high-water mark for the whole process: it only ever grows,
+    so it says nothing about any one route measured after the peak.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if os.uname().sysname == 'Darwin' else peak
+
+
+def current_rss_kb():
+    """Resident set size of this process right now, in KiB (None off Linux)"""
+    try:
+        with open('/proc/self/statm') as handle:
+            resident_pages = int(handle.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def rss_delta_kb(before, after):
+    """Growth of the current RSS across a run, in KiB; None when unknown"""
+    if before is None or after is None:
+        return None
+    return after - before
+
+
+# ======================================================================
+# DATABASE SETUP
+# ======================================================================
+
+@contextmanager
+def benchmark_database():
+    """
+    Creates a file-backed SQLite database for the duration of the block
+
+    A file (rather than :memory:) lets the HTTP load generator's server
+    threads share the data through their own connections.
+    """
+    connection = connections['default']
+    if connection.vendor != 'sqlite':
+        raise RuntimeError(
+            'Benchmarks run on SQLite only: DB_ENGINE=sqlite python manage.py benchmark'
+        )
+    workdir = tempfile.mkdtemp(prefix='royalpaints-bench-')
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+    old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def seed_content(blogs=100, carriers=100, contacts=100, batch_size=1000):
+    """
+    Bulk-inserts benchmark rows with unique slugs and spread-out dates
+
+    Returns:
+        dict: number of rows created per model
+    """
+    now = timezone.now()
+    BlogModel.objects.bulk_create(
+        (
+            BlogModel(
+                title=f'Painting Guide {index}',
+                content=f'Tips for interior and exterior painting, part {index}. ' * 20,
+                slug=slugify(f'painting-guide-{index}'),
+            )
+            for index in range(blogs)
+        ),
+        batch_size=batch_size,
+    )
+    CarrierModel.objects.bulk_create(
+        (
+            CarrierModel(
+                carrier_title=f'Painter Position {index}',
+                deadline_date=(now + timedelta(days=30)).date(),
+                description=f'Job description for position {index}. ' * 10,
+                slug=slugify(f'painter-position-{index}'),
+                created_at=now - timedelta(minutes=index),
+            )
+            for index in range(carriers)
+        ),
+        batch_size=batch_size,
+    )
+    ContactModel.objects.bulk_create(
+        (
+            ContactModel(
+                your_name=f'Visitor {index}',
+                your_email=f'visitor{index % 500}@example.com',
+                your_message='I would like a quote for painting my house.',
+            )
+            for index in range(contacts)
+        ),
+        batch_size=batch_size,
+    )
+    # bulk_create skips ContactModel.save(): key the rows and build the leads
+    backfill_leads(batch_size=batch_size)
+    return {'blogs': blogs, 'carriers': carriers, 'contacts': contacts}
@@ -0,0 +1,201 @@
+"""
+Cache warming for the public site
+
+warm_cache() requests every public URL so the first real visitors after a
+deploy, a cache flush or a content change don't pay for cold caches:
+
+- over HTTP (base_url, default CACHE_WARM_BASE_URL): through nginx/the
+  CDN, which fills the shared page caches and the app servers' own caches
+- in-process (no base URL): through Django's request handler with a test
+  Client per thread. This fills the shared caches (popular posts, content
+  version, ...) and this process's template cache. With a process-local
+  cache backend (locmem, dummy) nothing outlives the command, so the
+  report carries a warning instead.
+
+URLs come from baseapp.routes (every route without parameters) plus every
+blog and career detail page, most popular/most recent first, so the
+pages most likely to be hit are warm soonest. An incremental run warms
+only the blogs and careers changed since the previous run (and the
+listings showing them); the time of the last run is kept in the cache, so
+after a cache flush the next run is a full one again.
+
+Warm-up requests carry an X-Cache-Warm header so logs can tell them
+apart. They run no JavaScript, so they never send the blog view beacon.
+"""
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from .models import BlogModel, CarrierModel
+from .stats import summarize
+
+
+LAST_WARM_CACHE_KEY = 'cache_warm:last_run'
+WARM_HEADER = 'X-Cache-Warm'
+ORDERS = ('popularity', 'recent')
+# Cache backends whose entries only live in the process that set them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def static_public_urls():
+    """Paths of the baseapp routes that take no parameters, in declaration order"""
+    from baseapp import routes
+
+    return [
+        reverse(pattern.name) for pattern in routes.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name and not pattern.pattern.converters
+    ]
+
+
+def public_urls(order='popularity', since=None):
+    """
+    Public URLs to warm, highest priority first
+
+    Args:
+        order: 'popularity' (blogs by popularity, then recency) or 'recent'
+        since: only blogs/careers changed after this datetime, plus the
+            listings showing them (static pages are skipped)
+    """
+    blogs = BlogModel.published.all()
+    carriers = CarrierModel.published.all()
+    if since is not None:
+        blogs = blogs.filter(updated_at__gt=since)
+        carriers = carriers.filter(updated_at__gt=since)
+    blog_order = ('-popularity', '-created_at') if order == 'popularity' else ('-created_at',)
+    blog_slugs = list(blogs.order_by(*blog_order).values_list('slug', flat=True))
+    carrier_slugs = list(carriers.order_by('-created_at').values_list('slug', flat=True))
+
+    if since is None:
+        urls = static_public_urls()
+    else:
+        urls = []
+        if blog_slugs:
+            urls += [reverse('index_page'), reverse('blogs_page')]
+        if carrier_slugs:
+            urls.append(reverse('carriers_page'))
+    urls += [reverse('blog_detail', args=[slug]) for slug in blog_slugs]
+    urls += [reverse('carrier_detail', args=[slug]) for slug in carrier_slugs]
+    return urls
+
+
+class WarmReport:
+
+    def __init__(self, mode, incremental):
+        self.mode = mode
+        self.incremental = incremental
+        self.latencies = []
+        self.failures = []
+        self.warnings = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def as_dict(self, max_failures=100):
+        return {
+            'mode': self.mode,
+            'incremental': self.incremental,
+            'warmed': len(self.latencies),
+            'failed': len(self.failures),
+            'elapsed_seconds': round(self.elapsed, 3),
+            **summarize(self.latencies, self.elapsed),
+            'failures': self.failures[:max_failures],
+            'warnings': self.warnings,
+        }
+
+
+def default_host():
+    hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+    return hosts[0] if hosts else 'localhost'
+
+
+def _fetch_in_process(local, path, host):
+    if not hasattr(local, 'client'):
+        local.client = Client(HTTP_HOST=host, HTTP_X_CACHE_WARM='1')
+    try:
+        response = local.client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code
+    finally:
+        close_old_connections()
+
+
+def _fetch_over_http(base_url, path, timeout):
+    request = urllib.request.Request(base_url.rstrip('/') + path, headers={WARM_HEADER: '1'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def warm_cache(incremental=False, order='popularity', concurrency=None, base_url=None, host=None, timeout=30):
+    """
+    Requests the public URLs concurrently and reports throughput and failures
+
+    Args:
+        incremental: only what changed since the previous run
+        order: see public_urls()
+        concurrency: parallel requests (default: CACHE_WARM_CONCURRENCY)
+        base_url: e.g. 'https://royalpaints.com.np' to warm through HTTP
+            (default: CACHE_WARM_BASE_URL); empty renders in-process
+        host: Host header for in-process requests (default: first
+            ALLOWED_HOSTS entry)
+        timeout: seconds per HTTP request
+
+    Returns:
+        WarmReport
+    """
+    started_at = timezone.now()
+    base_url = base_url or settings.CACHE_WARM_BASE_URL
+    since = cache.get(LAST_WARM_CACHE_KEY) if incremental else None
+    report = WarmReport('http' if base_url else 'in-process', since is not None)
+    if not base_url and settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+        report.warnings.append(
+            'The default cache is process-local: in-process warming only fills this '
+            'process. Set CACHE_WARM_BASE_URL (or --base-url) or a shared CACHE_BACKEND.'
+        )
+    urls = public_urls(order, since)
+    local = threading.local()
+    host = host or default_host()
+
+    def fetch(path):
+        start = time.perf_counter()
+        if base_url:
+            status = _fetch_over_http(base_url, path, timeout)
+        else:
+            status = _fetch_in_process(local, path, host)
+        return status, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency or settings.CACHE_WARM_CONCURRENCY) as pool:
+        futures = {pool.submit(fetch, path): path for path in urls}
+        for future in as_completed(futures):
+            try:
+                status, elapsed = future.result()
+            except Exception as exc:
+                report.failures.append({'url': futures[future], 'error': f'{type(exc).__name__}: {exc}'})
+                continue
+            if status >= 400:
+                report.failures.append({'url': futures[future], 'error': f'HTTP {status}'})
+            else:
+                report.latencies.append(elapsed)
+
+    # Rows changed while this run was going are picked up by the next one
+    cache.set(LAST_WARM_CACHE_KEY, started_at, None)
+    return report.finish()
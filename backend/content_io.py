@@ -0,0 +1,358 @@
+"""
+Bulk import and export of blogs and carriers as JSONL or CSV
+
+Imports stream their input row by row, validate each row, assign unique
+slugs in memory (one query for the existing slugs instead of an exists()
+loop per row), copy referenced images from a local directory with a small
+thread pool and insert valid rows with bulk_create, one transaction per
+batch. A failing row is reported with its line number and skipped; it
+never aborts the import.
+
+status and publish_at round-trip, so drafts stay drafts and scheduled
+rows keep their schedule; rows without a status are published.
+
+Exports stream rows straight from a server-side iterator.
+"""
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from royal_paints_website.cdn import queue_purge
+
+from .content_version import invalidate_content_version
+from .dashboard import get_dashboard_counts, invalidate_dashboard_counts
+from .jobs import enqueue
+from .live_updates import publish
+from .models import BlogModel, CarrierModel, PUBLISH_STATUS_CHOICES, STATUS_DRAFT, STATUS_PUBLISHED, STATUS_SCHEDULED
+
+
+FORMATS = ('jsonl', 'csv')
+
+
+class ContentType:
+    """Field mapping for one importable model"""
+
+    def __init__(self, model, title_field, image_field, fields, required):
+        self.model = model
+        self.title_field = title_field
+        self.image_field = image_field
+        self.fields = fields
+        self.required = required
+
+    @property
+    def upload_to(self):
+        return self.model._meta.get_field(self.image_field).upload_to
+
+
+CONTENT_TYPES = {
+    'blogs': ContentType(
+        BlogModel, 'title', 'image',
+        fields=('title', 'content', 'image', 'slug', 'status', 'publish_at'),
+        required=('title',),
+    ),
+    'carriers': ContentType(
+        CarrierModel, 'carrier_title', 'carrier_image',
+        fields=('carrier_title', 'description', 'deadline_date', 'carrier_image', 'slug', 'status', 'publish_at'),
+        required=('carrier_title', 'deadline_date'),
+    ),
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+# ======================================================================
+# READING AND VALIDATION
+# ======================================================================
+
+def iter_rows(stream, fmt):
+    """
+    Yields (line_number, row_dict_or_None, error) from a text stream
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f'invalid JSON: {exc}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'expected a JSON object'
+            continue
+        yield line_number, row, None
+
+
+def clean_row(content_type, row):
+    """Returns model field values for a raw row or raises RowError"""
+    values = {}
+    for field in content_type.fields:
+        value = row.get(field)
+        # JSONL rows can hold numbers, lists or objects; every field is text
+        if value is not None and not isinstance(value, str):
+            raise RowError(f'{field} must be a string')
+        values[field] = value.strip() if isinstance(value, str) else value
+
+    for field in content_type.required:
+        if not values.get(field):
+            raise RowError(f'{field} is required')
+
+    for field, value in values.items():
+        max_length = getattr(content_type.model._meta.get_field(field), 'max_length', None)
+        if value and max_length and len(value) > max_length:
+            raise RowError(f'{field} is longer than {max_length} characters')
+
+    if 'deadline_date' in values:
+        try:
+            values['deadline_date'] = date.fromisoformat(values['deadline_date'])
+        except ValueError:
+            raise RowError('deadline_date must be YYYY-MM-DD')
+
+    values['status'], values['publish_at'] = _publication(values['status'], values['publish_at'])
+
+    for field in ('content', 'description'):
+        if field in values and values[field] is None:
+            values[field] = ''
+    return values
+
+
+def _publication(status, publish_at):
+    """(status, publish_at) of an imported row, as backend.publishing stores them"""
+    status = status or STATUS_PUBLISHED
+    if status not in dict(PUBLISH_STATUS_CHOICES):
+        raise RowError(f'status must be one of {", ".join(dict(PUBLISH_STATUS_CHOICES))}')
+    moment = None
+    if publish_at:
+        try:
+            moment = parse_datetime(publish_at)
+        except ValueError:
+            moment = None
+        if moment is None:
+            raise RowError('publish_at must be an ISO date and time')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+
+    now = timezone.now()
+    if status == STATUS_DRAFT:
+        return STATUS_DRAFT, None
+    if status == STATUS_SCHEDULED:
+        if moment is None:
+            raise RowError('scheduled rows need a publish_at')
+        if moment > now:
+            return STATUS_SCHEDULED, moment
+    # Published rows keep the time they first went live
+    return STATUS_PUBLISHED, moment if moment and moment <= now else now
+
+
+class SlugAllocator:
+    """
+    Hands out unique slugs using the same base/base-1/base-2 scheme as
+    BlogModel.save(), checked against an in-memory set of taken slugs
+    """
+
+    def __init__(self, model):
+        self.taken = set(model.all_objects.values_list('slug', flat=True).iterator())
+        self.next_suffix = {}
+
+    def allocate(self, title, requested=None):
+        if requested:
+            slug = slugify(requested)
+            if slug in self.taken:
+                raise RowError(f'slug "{slug}" already exists')
+            self.taken.add(slug)
+            return slug
+
+        base = slugify(title)
+        slug, counter = base, self.next_suffix.get(base, 1)
+        if slug in self.taken:
+            slug = f'{base}-{counter}'
+            while slug in self.taken:
+                counter += 1
+                slug = f'{base}-{counter}'
+            self.next_suffix[base] = counter + 1
+        self.taken.add(slug)
+        return slug
+
+
+def copy_image(image_root, relative_path, upload_to):
+    """Copies a local image into MEDIA storage and returns its stored name"""
+    root = os.path.realpath(image_root)
+    source = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, source]) != root:
+        raise RowError(f'image path "{relative_path}" is outside the image root')
+    if not os.path.isfile(source):
+        raise RowError(f'image "{relative_path}" not found')
+    with open(source, 'rb') as handle:
+        return default_storage.save(os.path.join(upload_to, os.path.basename(source)), File(handle))
+
+
+# ======================================================================
+# IMPORT
+# ======================================================================
+
+class ImportReport:
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.created = 0
+        self.errors = []
+        # publish_at of the scheduled rows created (bulk_create skips the
+        # signal that queues their publish_scheduled job)
+        self.scheduled_at = set()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line_number, message):
+        self.errors.append({'line': line_number, 'error': str(message)})
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def as_dict(self, max_errors=100):
+        return {
+            'kind': self.kind,
+            'created': self.created,
+            'failed': len(self.errors),
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.created / self.elapsed, 1) if self.elapsed else None,
+            'errors': self.errors[:max_errors],
+        }
+
+
+def import_content(stream, kind, fmt='jsonl', batch_size=500, image_root=None, image_workers=4):
+    """
+    Imports blogs or carriers from a JSONL/CSV text stream
+
+    Args:
+        stream: text file-like object
+        kind: 'blogs' or 'carriers'
+        fmt: 'jsonl' or 'csv'
+        batch_size: rows per bulk_create/transaction
+        image_root: local directory image paths are resolved against;
+            rows referencing images are rejected when it's not set
+        image_workers: threads copying images concurrently
+
+    Returns:
+        ImportReport
+    """
+    content_type = CONTENT_TYPES[kind]
+    report = ImportReport(kind)
+    slugs = SlugAllocator(content_type.model)
+    batch = []
+
+    with ThreadPoolExecutor(max_workers=image_workers) as pool:
+        for line_number, row, error in iter_rows(stream, fmt):
+            if error:
+                report.add_error(line_number, error)
+                continue
+            try:
+                values = clean_row(content_type, row)
+                values['slug'] = slugs.allocate(values[content_type.title_field], values.get('slug'))
+                if values.get(content_type.image_field) and not image_root:
+                    raise RowError('images need an image root directory')
+            except RowError as exc:
+                report.add_error(line_number, exc)
+                continue
+            batch.append((line_number, values))
+            if len(batch) >= batch_size:
+                _write_batch(content_type, batch, report, image_root, pool)
+                batch = []
+        if batch:
+            _write_batch(content_type, batch, report, image_root, pool)
+
+    if report.created:
+        # bulk_create skips the per-save signals
+        invalidate_content_version()
+        queue_purge([content_type.model.SURROGATE_LIST_KEY])
+        invalidate_dashboard_counts()
+        publish('counts', {'values': get_dashboard_counts()})
+    for moment in sorted(report.scheduled_at):
+        enqueue('publish_scheduled', run_at=moment)
+    if kind == 'blogs' and report.created:
+        # Rebuild navigation once, in the background, instead
+        enqueue('rebuild_related_posts')
+    return report.finish()
+
+
+def _write_batch(content_type, batch, report, image_root, pool):
+    image_field = content_type.image_field
+    futures = {
+        line_number: pool.submit(copy_image, image_root, values[image_field], content_type.upload_to)
+        for line_number, values in batch if values.get(image_field)
+    }
+
+    instances = []
+    for line_number, values in batch:
+        if line_number in futures:
+            try:
+                values[image_field] = futures[line_number].result()
+            except (OSError, ValueError) as exc:
+                # RowError, or a path the OS rejects (e.g. a NUL byte)
+                report.add_error(line_number, exc)
+                continue
+        instances.append((line_number, content_type.model(**values)))
+
+    try:
+        with transaction.atomic():
+            content_type.model.objects.bulk_create([instance for _, instance in instances])
+        report.created += len(instances)
+        report.scheduled_at.update(
+            instance.publish_at for _, instance in instances if instance.status == STATUS_SCHEDULED
+        )
+    except DatabaseError:
+        # Isolate the offending rows instead of losing the whole batch
+        for line_number, instance in instances:
+            try:
+                with transaction.atomic():
+                    instance.save(force_insert=True)
+                report.created += 1
+            except DatabaseError as exc:
+                report.add_error(line_number, exc)
+
+
+# ======================================================================
+# EXPORT
+# ======================================================================
+
+def export_fields(kind):
+    content_type = CONTENT_TYPES[kind]
+    return ('id',) + content_type.fields + ('created_at',)
+
+
+def iter_export(kind, fmt='jsonl', chunk_size=2000):
+    """Yields the export as text chunks (one per row, plus a CSV header)"""
+    fields = export_fields(kind)
+    rows = CONTENT_TYPES[kind].model.objects.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), default=str) + '\n'
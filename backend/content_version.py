@@ -0,0 +1,35 @@
+"""
+Version token of the public content (blogs and careers)
+
+The service worker names its page cache after this token, so a worker
+installed after a blog or career changed starts from an empty page cache.
+The token is derived from the rows themselves (counts and latest update
+times), so every process computes the same value. It is cached until
+backend.signals drops it on a save or delete (backend.trash and
+backend.publishing when rows leave or join the published set).
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import BlogModel, CarrierModel
+
+
+CONTENT_VERSION_CACHE_KEY = 'content:version'
+
+
+def get_content_version():
+    version = cache.get(CONTENT_VERSION_CACHE_KEY)
+    if version is None:
+        state = [
+            model.published.aggregate(count=Count('pk'), updated=Max('updated_at'))
+            for model in (BlogModel, CarrierModel)
+        ]
+        version = hashlib.sha1(repr(state).encode()).hexdigest()[:12]
+        cache.set(CONTENT_VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def invalidate_content_version():
+    cache.delete(CONTENT_VERSION_CACHE_KEY)
@@ -0,0 +1,30 @@
+"""
+Cached record counts for the admin dashboard
+
+The counts are computed on a cache miss and dropped by backend.signals
+whenever a blog, carrier or contact is created or deleted, so the
+dashboard normally renders without any COUNT(*) queries.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import BlogModel, CarrierModel, ContactModel
+
+
+DASHBOARD_COUNTS_CACHE_KEY = 'dashboard:counts'
+
+
+def get_dashboard_counts():
+    counts = cache.get(DASHBOARD_COUNTS_CACHE_KEY)
+    if counts is None:
+        counts = {
+            'total_carriers': CarrierModel.objects.count(),
+            'total_blogs': BlogModel.objects.count(),
+            'total_contacts': ContactModel.objects.count(),
+        }
+        cache.set(DASHBOARD_COUNTS_CACHE_KEY, counts, settings.DASHBOARD_COUNTS_CACHE_SECONDS)
+    return counts
+
+
+def invalidate_dashboard_counts():
+    cache.delete(DASHBOARD_COUNTS_CACHE_KEY)
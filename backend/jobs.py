@@ -0,0 +1,319 @@
+"""
+Database-backed background job queue
+
+Jobs are rows in JobModel, so enqueueing inside a transaction only
+publishes the job if that transaction commits, and no broker is needed.
+`manage.py run_workers` claims ready jobs and runs them in a thread or
+process pool:
+
+    MySQL: SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never
+        wait on or double-claim each other's rows
+    SQLite (no row locks): a conditional UPDATE ... WHERE status='pending'
+        per job; only the worker whose update hits the row owns it
+
+A failing job is retried with exponential backoff until max_attempts,
+then marked failed. Every run records its duration on the row.
+
+While a job runs, a heartbeat thread refreshes its locked_at, so only jobs
+whose worker died go stale. release_stale_jobs() re-queues those, or marks
+them failed once their attempts are used up (a job that keeps killing its
+worker must not loop forever). A worker only records the outcome while it
+still holds the lock; if the job was released and claimed again meanwhile,
+the new owner's state wins.
+
+Register handlers with the @job decorator (see backend.tasks) and queue
+them with enqueue('name', {...keyword arguments...}).
+
+Settings:
+    JOB_QUEUE_EAGER: run jobs in-process right after commit instead of
+        waiting for a worker (for deployments without run_workers)
+    JOB_MAX_ATTEMPTS: default attempts per job
+    JOB_RETRY_BACKOFF: seconds before the first retry, doubled each time
+    JOB_LOCK_TIMEOUT: running jobs locked longer than this are released
+        (their worker died)
+    JOB_HEARTBEAT_INTERVAL: seconds between locked_at refreshes of a
+        running job (0 disables the heartbeat)
+    JOB_KEEP_DONE_SECONDS: finished jobs are deleted after this long
+    JOB_PERIODIC: {job name: interval in seconds} scheduled by run_workers
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+
+from .models import JobModel
+from .stats import percentile
+
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def job(name):
+    """Registers the decorated function as the handler for job `name`"""
+    def register(func):
+        _registry[name] = func
+        return func
+    return register
+
+
+def registered_jobs():
+    return sorted(_registry)
+
+
+def worker_name(suffix=''):
+    return f'{socket.gethostname()}:{os.getpid()}{suffix}'
+
+
+# ======================================================================
+# ENQUEUEING
+# ======================================================================
+
+def enqueue(name, payload=None, run_at=None, delay=None, max_attempts=None):
+    """
+    Queues job `name`; its handler is called with **payload
+
+    Args:
+        name: registered job name
+        payload: JSON-serializable dict of keyword arguments
+        run_at: earliest run time (default: now)
+        delay: seconds from now, instead of run_at
+        max_attempts: attempts before the job is marked failed
+
+    Returns:
+        JobModel
+    """
+    if name not in _registry:
+        raise ValueError(f'Unknown job "{name}"')
+    if delay is not None:
+        run_at = timezone.now() + timedelta(seconds=delay)
+    queued = JobModel.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    if settings.JOB_QUEUE_EAGER and run_at is None:
+        pk = queued.pk
+        transaction.on_commit(lambda: _run_eagerly(pk))
+    return queued
+
+
+def _run_eagerly(pk):
+    claimed = _claim(pk, worker_name(':eager'), timezone.now())
+    if claimed:
+        run_job(JobModel.objects.get(pk=pk))
+
+
+# ======================================================================
+# CLAIMING AND RUNNING
+# ======================================================================
+
+def _claim(pk, worker_id, now):
+    return JobModel.objects.filter(pk=pk, status=JobModel.STATUS_PENDING).update(
+        status=JobModel.STATUS_RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+    )
+
+
+def claim_jobs(worker_id, limit=1):
+    """Marks up to `limit` ready jobs as running for `worker_id` and returns them"""
+    now = timezone.now()
+    ready = JobModel.objects.filter(status=JobModel.STATUS_PENDING, run_at__lte=now).order_by('run_at', 'pk')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(ready.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            JobModel.objects.filter(pk__in=pks).update(
+                status=JobModel.STATUS_RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+            )
+    else:
+        # Each conditional UPDATE commits on its own: a read-then-write
+        # transaction would fail on SQLite's lock upgrade under contention
+        pks = [pk for pk in ready.values_list('pk', flat=True)[:limit] if _claim(pk, worker_id, now)]
+    return list(JobModel.objects.filter(pk__in=pks).order_by('run_at', 'pk'))
+
+
+def heartbeat(pk, worker_id):
+    """Refreshes the lock of a job `worker_id` is running; 0 once the lock is lost"""
+    return JobModel.objects.filter(pk=pk, status=JobModel.STATUS_RUNNING, locked_by=worker_id).update(
+        locked_at=timezone.now(),
+    )
+
+
+def _keep_alive(pk, worker_id, stop, interval):
+    try:
+        while not stop.wait(interval):
+            if not heartbeat(pk, worker_id):
+                return
+    except Exception:
+        logger.exception('Heartbeat of job #%s failed', pk)
+    finally:
+        connection.close()
+
+
+def run_job(claimed):
+    """Runs a claimed job and records its outcome and duration"""
+    handler = _registry.get(claimed.name)
+    worker_id = claimed.locked_by
+    stop = threading.Event()
+    if settings.JOB_HEARTBEAT_INTERVAL > 0:
+        threading.Thread(
+            target=_keep_alive, args=(claimed.pk, worker_id, stop, settings.JOB_HEARTBEAT_INTERVAL),
+            name=f'job-heartbeat-{claimed.pk}', daemon=True,
+        ).start()
+    started = time.perf_counter()
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job "{claimed.name}"')
+        handler(**claimed.payload)
+    except Exception as exc:
+        claimed.last_error = f'{type(exc).__name__}: {exc}'
+        if claimed.attempts < claimed.max_attempts:
+            claimed.status = JobModel.STATUS_PENDING
+            claimed.run_at = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_BACKOFF * 2 ** (claimed.attempts - 1)
+            )
+            logger.warning('Job %s failed (attempt %s of %s), retrying at %s',
+                           claimed, claimed.attempts, claimed.max_attempts, claimed.run_at)
+        else:
+            claimed.status = JobModel.STATUS_FAILED
+            claimed.finished_at = timezone.now()
+            logger.exception('Job %s failed permanently', claimed)
+    else:
+        claimed.status = JobModel.STATUS_DONE
+        claimed.finished_at = timezone.now()
+    finally:
+        stop.set()
+    claimed.duration_ms = (time.perf_counter() - started) * 1000
+    claimed.locked_by = ''
+    claimed.locked_at = None
+    fields = ['status', 'run_at', 'last_error', 'finished_at', 'duration_ms', 'locked_by', 'locked_at']
+    # Only while this worker still holds the lock
+    saved = JobModel.objects.filter(pk=claimed.pk, status=JobModel.STATUS_RUNNING, locked_by=worker_id).update(
+        **{field: getattr(claimed, field) for field in fields}
+    )
+    if not saved:
+        logger.warning('Job %s lost its lock while running; outcome not recorded', claimed)
+    return claimed
+
+
+def run_pending_jobs(worker_id=None, limit=None):
+    """
+    Runs ready jobs in this thread until none are left (or `limit` ran)
+
+    Returns:
+        int: number of jobs run
+    """
+    worker_id = worker_id or worker_name(f':{threading.get_ident()}')
+    count = 0
+    while limit is None or count < limit:
+        claimed = claim_jobs(worker_id)
+        if not claimed:
+            break
+        for queued in claimed:
+            run_job(queued)
+            count += 1
+    return count
+
+
+def work(worker_id, stop, poll_interval=1.0, burst=False):
+    """Worker loop: runs ready jobs until `stop` is set (or the queue is empty in burst mode)"""
+    while not stop.is_set():
+        try:
+            ran = run_pending_jobs(worker_id)
+        except Exception:
+            # e.g. the database went away; back off and poll again
+            logger.exception('Worker %s could not fetch jobs', worker_id)
+            ran = None
+        finally:
+            close_old_connections()
+        if burst and ran == 0:
+            return
+        if not ran:
+            stop.wait(poll_interval)
+
+
+# ======================================================================
+# MAINTENANCE AND SCHEDULING
+# ======================================================================
+
+def release_stale_jobs():
+    """
+    Puts running jobs whose worker stopped responding back in the queue,
+    or marks them failed when they have no attempts left
+
+    Returns:
+        int: number of jobs released or failed
+    """
+    now = timezone.now()
+    stale = JobModel.objects.filter(
+        status=JobModel.STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=JobModel.STATUS_FAILED, finished_at=now, locked_by='', locked_at=None,
+        last_error='Worker stopped responding (lock timed out)',
+    )
+    if failed:
+        logger.error('Marked %s stale job(s) failed after their last attempt', failed)
+    return failed + stale.update(status=JobModel.STATUS_PENDING, locked_by='', locked_at=None)
+
+
+def purge_finished_jobs():
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_KEEP_DONE_SECONDS)
+    deleted, _ = JobModel.objects.filter(status=JobModel.STATUS_DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def schedule_periodic_jobs():
+    """
+    Queues the next run of every JOB_PERIODIC job that has none queued,
+    one interval after its last finished run
+
+    Returns:
+        list: names of the jobs queued
+    """
+    scheduled = []
+    for name, interval in settings.JOB_PERIODIC.items():
+        active = JobModel.objects.filter(
+            name=name, status__in=(JobModel.STATUS_PENDING, JobModel.STATUS_RUNNING),
+        )
+        if active.exists():
+            continue
+        last_run = (
+            JobModel.objects.filter(name=name, status=JobModel.STATUS_DONE)
+            .order_by('-finished_at').values_list('finished_at', flat=True).first()
+        )
+        run_at = last_run + timedelta(seconds=interval) if last_run else timezone.now()
+        enqueue(name, run_at=max(run_at, timezone.now()))
+        scheduled.append(name)
+    return scheduled
+
+
+def job_stats(sample=1000):
+    """
+    Per-job counts by status and timing of recent successful runs
+
+    Returns:
+        dict: {name: {'pending': n, ..., 'avg_ms', 'p95_ms', 'max_ms'}}
+    """
+    stats = {}
+    for row in JobModel.objects.values('name', 'status').annotate(total=Count('pk')).order_by():
+        stats.setdefault(row['name'], {})[row['status']] = row['total']
+    done = JobModel.objects.filter(status=JobModel.STATUS_DONE)
+    for row in done.values('name').annotate(avg_ms=Avg('duration_ms'), max_ms=Max('duration_ms')).order_by():
+        durations = sorted(
+            done.filter(name=row['name']).order_by('-finished_at').values_list('duration_ms', flat=True)[:sample]
+        )
+        stats[row['name']].update({
+            'avg_ms': round(row['avg_ms'], 3),
+            'p95_ms': round(percentile(durations, 0.95), 3),
+            'max_ms': round(row['max_ms'], 3),
+        })
+    return stats
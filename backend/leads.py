@@ -0,0 +1,152 @@
+"""
+Lead aggregates: contact messages grouped per customer
+
+Every contact message carries email_key (normalize_email_key of the
+address). LeadModel keeps one row per key with the first/last message time
+and the message count:
+
+- record_contact() updates it for each new message (backend.signals)
+- backfill_leads() (`manage.py backfill_leads`) fills in email_key and
+  the leads for rows saved before the key existed, in streaming batches.
+  It only picks up rows without a key, so it is safe to re-run or stop.
+- fold_contacts() adds existing rows to their leads, for the backfill and
+  for messages restored from the trash (backend.trash)
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import ContactModel, LeadModel, normalize_email_key
+
+
+# ======================================================================
+# INCREMENTAL UPDATES
+# ======================================================================
+
+def record_contact(contact):
+    """
+    Counts a newly saved contact message towards its lead
+
+    Always two statements and no savepoint: an INSERT that is skipped when
+    the lead exists (ON CONFLICT DO NOTHING / INSERT IGNORE), then the
+    increment. Concurrent messages from one customer can't lose a count
+    or trip over each other's insert.
+    """
+    key = contact.email_key
+    if not key:
+        return
+    LeadModel.objects.bulk_create([
+        LeadModel(
+            email_key=key, name=contact.your_name, email=contact.your_email,
+            first_seen=contact.sended_at, last_seen=contact.sended_at, message_count=0,
+        ),
+    ], ignore_conflicts=True)
+    LeadModel.objects.filter(email_key=key).update(
+        name=contact.your_name,
+        email=contact.your_email,
+        last_seen=Greatest(F('last_seen'), contact.sended_at),
+        message_count=F('message_count') + 1,
+    )
+
+
+def lead_messages(email_key, limit=100):
+    """A lead's messages still in ContactModel, newest first"""
+    return ContactModel.objects.filter(email_key=email_key).order_by('-sended_at')[:limit]
+
+
+# ======================================================================
+# BACKFILL
+# ======================================================================
+
+class BackfillReport:
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.leads_created = 0
+        self.leads_updated = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def fold_contacts(rows):
+    """
+    Keys contact rows and adds them to their leads, in one transaction
+
+    Args:
+        rows: dicts with id, your_name, your_email and sended_at
+
+    Returns:
+        tuple: (leads created, leads updated)
+    """
+    groups = {}
+    for row in rows:
+        row['email_key'] = normalize_email_key(row['your_email'])
+        if not row['email_key']:
+            continue
+        group = groups.setdefault(row['email_key'], {
+            'first_seen': row['sended_at'], 'last_seen': row['sended_at'], 'count': 0, 'latest': row,
+        })
+        group['first_seen'] = min(group['first_seen'], row['sended_at'])
+        if row['sended_at'] >= group['last_seen']:
+            group['last_seen'] = row['sended_at']
+            group['latest'] = row
+        group['count'] += 1
+
+    created = updated = 0
+    with transaction.atomic():
+        ContactModel.objects.bulk_update(
+            [ContactModel(pk=row['id'], email_key=row['email_key']) for row in rows], ['email_key'],
+        )
+        # Placeholders for new customers (a concurrent record_contact may
+        # have created some); the counts are merged below either way
+        existing = LeadModel.objects.filter(email_key__in=groups).count()
+        LeadModel.objects.bulk_create([
+            LeadModel(
+                email_key=key, name=group['latest']['your_name'], email=group['latest']['your_email'],
+                first_seen=group['first_seen'], last_seen=group['last_seen'], message_count=0,
+            )
+            for key, group in groups.items()
+        ], ignore_conflicts=True)
+        created = len(groups) - existing
+
+        leads = list(LeadModel.objects.select_for_update().filter(email_key__in=groups))
+        for lead in leads:
+            group = groups[lead.email_key]
+            lead.first_seen = min(lead.first_seen, group['first_seen'])
+            if group['last_seen'] >= lead.last_seen:
+                lead.last_seen = group['last_seen']
+                lead.name = group['latest']['your_name']
+                lead.email = group['latest']['your_email']
+            lead.message_count += group['count']
+        LeadModel.objects.bulk_update(leads, ['first_seen', 'last_seen', 'name', 'email', 'message_count'])
+        updated = len(leads) - created
+    return created, updated
+
+
+def backfill_leads(batch_size=1000, max_batches=None):
+    """
+    Keys and counts every contact message that has no email_key yet
+
+    Streams ContactModel in primary key order, batch_size rows at a time,
+    so memory use stays flat however large the table is.
+
+    Returns:
+        BackfillReport
+    """
+    report = BackfillReport()
+    last_pk = 0
+    while max_batches is None or report.batches < max_batches:
+        rows = list(
+            ContactModel.objects.filter(email_key='', pk__gt=last_pk)
+            .order_by('pk').values('id', 'your_name', 'your_email', 'sended_at')[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1]['id']
+        created, updated = fold_contacts(rows)
+        report.rows += len(rows)
+        report.batches += 1
+        report.leads_created += created
+        report.leads_updated += updated
+    return report
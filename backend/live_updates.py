@@ -0,0 +1,301 @@
+"""
+Live admin dashboard updates over Server-Sent Events
+
+publish() is called (after commit) by backend.signals for new contact
+messages and for record counter changes. Each event is:
+
+- delivered straight to the SSE clients connected to this process, and
+- written to the default cache under an increasing sequence number, which
+  every other worker with connected clients polls (LIVE_UPDATES_POLL_SECONDS)
+  to fan the event out to its own clients. That needs a shared cache
+  (Redis, Memcached); with per-process locmem each worker only sees its
+  own events. The sequence numbers double as SSE event ids, so a
+  reconnecting browser (Last-Event-ID) gets what it missed replayed.
+
+Every client has a bounded queue (LIVE_UPDATES_QUEUE_SIZE). A client that
+falls behind has its backlog replaced by a single "resync" event, after
+which the page reloads its numbers; memory per client never grows.
+Connections send a comment line every LIVE_UPDATES_HEARTBEAT_SECONDS and
+are closed after LIVE_UPDATES_MAX_SECONDS, when EventSource reconnects on
+its own, so connections whose client vanished don't linger.
+
+The endpoint streams from an async view: serve the site with an ASGI
+worker (see gunicorn.conf.py) so a connected dashboard doesn't hold a
+worker thread. Under WSGI (runserver, the default sync gunicorn worker)
+Django would collect an async stream into a list before sending any of
+it, so the view streams sync_event_stream() from a thread-safe queue
+instead. Each dashboard then ties up its worker for the whole
+connection, so those streams end after LIVE_UPDATES_WSGI_MAX_SECONDS,
+which is kept below the gunicorn timeout. The browser reconnects and
+Last-Event-ID replays what it missed, which works like long polling.
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_CACHE_KEY = 'live:seq'
+EVENT_CACHE_KEY = 'live:event:{}'
+
+
+class TooManyClients(Exception):
+    """Raised when this process already serves LIVE_UPDATES_MAX_CLIENTS streams"""
+
+
+def _origin():
+    # Evaluated per call: the pid changes in forked workers
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def format_event(event):
+    """Serializes an event in the text/event-stream wire format"""
+    data = json.dumps(event['data'], separators=(',', ':'))
+    return f'id: {event["id"]}\nevent: {event["type"]}\ndata: {data}\n\n'
+
+
+# ======================================================================
+# SUBSCRIPTIONS
+# ======================================================================
+
+class Subscription:
+    """One connected client: a bounded queue owned by its event loop"""
+
+    def __init__(self, size):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def deliver(self, event):
+        """Thread-safe; may be called from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The client's event loop has already shut down
+            pass
+
+    def _put(self, event):
+        if self.queue.full():
+            # Fell behind: drop the backlog, the page refetches its numbers
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'id': event['id'], 'type': 'resync', 'data': {}}
+        self.queue.put_nowait(event)
+
+
+class ThreadSubscription:
+    """One client streamed from a WSGI worker thread: a thread-safe bounded queue"""
+
+    def __init__(self, size):
+        self.queue = queue.Queue(maxsize=size)
+        self._lock = threading.Lock()
+
+    def deliver(self, event):
+        with self._lock:
+            if self.queue.full():
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                event = {'id': event['id'], 'type': 'resync', 'data': {}}
+            self.queue.put_nowait(event)
+
+
+class Broker:
+    """In-process pub/sub with a cache-backed fan-out across workers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._poller = None
+        self._last_seen = 0
+
+    def subscribe(self, threaded=False):
+        """
+        Registers a client: from the event loop that will read it, or with
+        threaded=True from the WSGI thread that will
+        """
+        with self._lock:
+            if len(self._subscribers) >= settings.LIVE_UPDATES_MAX_CLIENTS:
+                raise TooManyClients
+            subscription = (ThreadSubscription if threaded else Subscription)(settings.LIVE_UPDATES_QUEUE_SIZE)
+            self._subscribers.add(subscription)
+            if self._poller is None or not self._poller.is_alive():
+                self._last_seen = cache.get(SEQUENCE_CACHE_KEY, 0)
+                self._poller = threading.Thread(target=self._poll, name='live-updates-poller', daemon=True)
+                self._poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def client_count(self):
+        return len(self._subscribers)
+
+    def dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def publish(self, event_type, data):
+        """Sends an event to every connected dashboard, in all workers"""
+        cache.add(SEQUENCE_CACHE_KEY, 0, None)
+        event = {'id': cache.incr(SEQUENCE_CACHE_KEY), 'type': event_type, 'data': data, 'origin': _origin()}
+        cache.set(EVENT_CACHE_KEY.format(event['id']), event, settings.LIVE_UPDATES_EVENT_TTL)
+        self.dispatch(event)
+        return event
+
+    def poll_once(self):
+        """Dispatches events other workers published since the last poll"""
+        sequence = cache.get(SEQUENCE_CACHE_KEY, 0)
+        if sequence < self._last_seen:
+            # The cache was flushed and the counter restarted
+            self._last_seen = 0
+        events = events_since(self._last_seen, sequence)
+        self._last_seen = sequence
+        origin = _origin()
+        for event in events:
+            if event.get('origin') != origin:
+                self.dispatch(event)
+        return len(events)
+
+    def _poll(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception('Polling live updates from the cache failed')
+            time.sleep(settings.LIVE_UPDATES_POLL_SECONDS)
+
+
+def events_since(last_id, until=None):
+    """
+    Events after `last_id` still in the cache, oldest first (at most
+    LIVE_UPDATES_REPLAY of the newest). A gap, from events that expired or
+    were skipped, is reported as one "resync" event in its place.
+    """
+    until = cache.get(SEQUENCE_CACHE_KEY, 0) if until is None else until
+    first = max(last_id + 1, until - settings.LIVE_UPDATES_REPLAY + 1)
+    if first > until:
+        return []
+    found = cache.get_many([EVENT_CACHE_KEY.format(seq) for seq in range(first, until + 1)])
+    events = sorted(found.values(), key=lambda event: event['id'])
+    if first > last_id + 1 or len(events) < until - first + 1:
+        events.insert(0, {'id': first, 'type': 'resync', 'data': {}})
+    return events
+
+
+broker = Broker()
+
+
+def publish(event_type, data):
+    """
+    Broker.publish() that never raises: runs in on_commit callbacks after
+    the change is saved, where a cache outage must not turn into a 500
+    """
+    try:
+        return broker.publish(event_type, data)
+    except Exception:
+        logger.exception('Publishing live update "%s" failed', event_type)
+        return None
+
+
+def contact_payload(contact):
+    return {
+        'id': contact.pk,
+        'lead_key': contact.email_key,
+        'name': contact.your_name,
+        'email': contact.your_email,
+        'message': contact.your_message[:1000],
+        'sent_at': contact.sended_at.isoformat(),
+    }
+
+
+# ======================================================================
+# EVENT STREAM
+# ======================================================================
+
+async def event_stream(last_event_id=None):
+    """
+    Yields the SSE body for one client: replayed events first (when
+    reconnecting with Last-Event-ID), then live events and heartbeats until
+    LIVE_UPDATES_MAX_SECONDS have passed
+
+    The client subscribes on first iteration, from the loop that streams
+    the response (not necessarily the one the view ran in).
+    """
+    yield f'retry: {settings.LIVE_UPDATES_RETRY_MS}\n\n'
+    try:
+        subscription = broker.subscribe()
+    except TooManyClients:
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_UPDATES_MAX_SECONDS
+    try:
+        replayed = set()
+        if last_event_id is not None:
+            for event in events_since(last_event_id):
+                replayed.add(event['id'])
+                yield format_event(event)
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), min(settings.LIVE_UPDATES_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event['id'] not in replayed:
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def sync_event_stream(last_event_id=None):
+    """
+    event_stream() for WSGI servers: blocks its thread on a thread-safe
+    queue and ends after LIVE_UPDATES_WSGI_MAX_SECONDS
+    """
+    yield f'retry: {settings.LIVE_UPDATES_RETRY_MS}\n\n'
+    try:
+        subscription = broker.subscribe(threaded=True)
+    except TooManyClients:
+        return
+    deadline = time.monotonic() + settings.LIVE_UPDATES_WSGI_MAX_SECONDS
+    try:
+        replayed = set()
+        if last_event_id is not None:
+            for event in events_since(last_event_id):
+                replayed.add(event['id'])
+                yield format_event(event)
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = subscription.queue.get(timeout=min(settings.LIVE_UPDATES_HEARTBEAT_SECONDS, remaining))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            if event['id'] not in replayed:
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,35 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.retention import DESTINATIONS, archive_contacts
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves contact messages older than the retention window into the archive table or '
+        'gzip JSONL files, in resumable batches. Prints a JSON report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=None,
+            help=f'Retention window in days (default: CONTACT_RETENTION_DAYS = {settings.CONTACT_RETENTION_DAYS})',
+        )
+        parser.add_argument('--to', dest='destination', choices=DESTINATIONS, default='table')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch (default: 1000)')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--archive-dir', help='JSONL output directory (default: CONTACT_ARCHIVE_DIR)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report rows and bytes that would move')
+
+    def handle(self, *args, **options):
+        report = archive_contacts(
+            older_than_days=options['older_than_days'],
+            destination=options['destination'],
+            batch_size=options['batch_size'],
+            archive_dir=options['archive_dir'],
+            dry_run=options['dry_run'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(json.dumps(report.as_dict(), indent=2))
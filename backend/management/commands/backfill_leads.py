@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend.leads import backfill_leads
+
+
+class Command(BaseCommand):
+    help = (
+        'Sets the normalized email key on contact messages saved without one and folds them into '
+        'their leads, in streaming batches. Safe to re-run. Prints a JSON report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch (default: 1000)')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        report = backfill_leads(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(json.dumps(report.as_dict(), indent=2))
@@ -0,0 +1,276 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from backend.benchmarks import benchmark_database, current_rss_kb, peak_rss_kb, rss_delta_kb, seed_content
+from backend.models import BlogModel, CarrierModel, UserEmailModel
+from backend.stats import Timer, summarize
+
+
+# Routes served to anonymous visitors even though they live in backend.routes
+ANONYMOUS_ADMIN_ROUTES = {'login_view', 'unauthorized_acess'}
+# Routes that would break the benchmark session, only accept POST, stream
+# until a timeout (live updates) or need a stored profile id
+SKIPPED_ROUTES = {
+    'logout_view', 'import_content_view', 'contacts_bulk_view', 'blog_view_beacon', 'live_updates_view',
+    'profile_download_view',
+}
+# Fixed URL parameters for routes that need them
+ROUTE_KWARGS = {'export_content_view': {'kind': 'blogs'}}
+# Detail routes and the model whose slug fills the <slug> parameter
+SLUG_SOURCES = {'blog_detail': BlogModel, 'carrier_detail': CarrierModel}
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def discover_routes():
+    """
+    Yields (name, url, needs_login) for every named route in
+    baseapp.routes and backend.routes
+    """
+    from baseapp import routes as public_routes
+    from backend import routes as admin_routes
+
+    for module, is_admin in ((public_routes, False), (admin_routes, True)):
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in SKIPPED_ROUTES:
+                continue
+            kwargs = dict(ROUTE_KWARGS.get(pattern.name, {}))
+            if 'slug' in pattern.pattern.converters:
+                model = SLUG_SOURCES[pattern.name]
+                kwargs['slug'] = model.objects.order_by('pk').values_list('slug', flat=True).first()
+            yield pattern.name, reverse(pattern.name, kwargs=kwargs), is_admin and pattern.name not in ANONYMOUS_ADMIN_ROUTES
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a throwaway SQLite database and benchmarks it. Suites: "routes" drives every '
+        'public and admin route through the Django test client and a local HTTP load '
+        'generator; "auth" replays a credential-stuffing style login load; "startup" '
+        'times cold starts (import, warm-up, first request) in fresh processes. Prints JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suite', choices=['routes', 'auth', 'startup'], default='routes')
+        parser.add_argument('--volume', type=int, default=100, help='Rows to seed per model (default: 100)')
+        parser.add_argument('--blogs', type=int, help='BlogModel rows (overrides --volume)')
+        parser.add_argument('--carriers', type=int, help='CarrierModel rows (overrides --volume)')
+        parser.add_argument('--contacts', type=int, help='ContactModel rows (overrides --volume)')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per route and mode (default: 100)')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per route (default: 5)')
+        parser.add_argument('--concurrency', type=int, default=8, help='HTTP load generator threads (default: 8)')
+        parser.add_argument('--mode', choices=['client', 'http', 'both'], default='both')
+        parser.add_argument('--users', type=int, default=50, help='Accounts to seed for the auth suite (default: 50)')
+        parser.add_argument('--attempts', type=int, default=500, help='Login attempts for the auth suite (default: 500)')
+        parser.add_argument('--ips', type=int, default=5, help='Distinct attacker IPs for the auth suite (default: 5)')
+        parser.add_argument('--runs', type=int, default=5,
+                            help='Cold starts per path and mode for the startup suite (default: 5)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        volume = options['volume']
+        try:
+            with benchmark_database():
+                seeded = seed_content(
+                    blogs=options['blogs'] if options['blogs'] is not None else volume,
+                    carriers=options['carriers'] if options['carriers'] is not None else volume,
+                    contacts=options['contacts'] if options['contacts'] is not None else volume,
+                )
+                if options['suite'] == 'auth':
+                    report = {'suite': 'auth', 'seeded': seeded, **self.run_auth(options)}
+                elif options['suite'] == 'startup':
+                    report = {'suite': 'startup', 'seeded': seeded, 'runs': options['runs'],
+                              'startup': self.run_startup(options)}
+                else:
+                    report = {
+                        'suite': 'routes',
+                        'seeded': seeded,
+                        'requests_per_route': options['requests'],
+                        'concurrency': options['concurrency'],
+                        'routes': self.run_routes(options),
+                    }
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output)
+            self.stdout.write(self.style.SUCCESS(f'Benchmark report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    # ==================== Route Runs ====================
+
+    def run_routes(self, options):
+        User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark-pass', is_staff=True)
+        client = Client()
+        client.login(username='benchmark', password='benchmark-pass')
+        session_cookie = f'sessionid={client.cookies["sessionid"].value}'
+
+        server = None
+        if options['mode'] in ('http', 'both'):
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+            server.set_app(get_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        results = []
+        try:
+            for name, url, needs_login in discover_routes():
+                route_client = client if needs_login else Client()
+                result = {'name': name, 'url': url, 'authenticated': needs_login}
+                rss_before = current_rss_kb()
+                if options['mode'] in ('client', 'both'):
+                    result['client'] = self.run_client(route_client, url, options)
+                if server is not None:
+                    base_url = f'http://127.0.0.1:{server.server_port}'
+                    cookie = session_cookie if needs_login else None
+                    result['http'] = self.run_http(base_url + url, cookie, options)
+                # What this route's requests left resident (Linux only), and
+                # the process-wide high-water mark so far for reference
+                result['rss_delta_kb'] = rss_delta_kb(rss_before, current_rss_kb())
+                result['process_peak_rss_kb'] = peak_rss_kb()
+                results.append(result)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        return results
+
+    def run_client(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+
+        latencies, query_counts, errors = [], [], 0
+        with Timer() as total:
+            for _ in range(options['requests']):
+                with CaptureQueriesContext(connections['default']) as queries:
+                    with Timer() as timer:
+                        response = client.get(url)
+                latencies.append(timer.elapsed)
+                query_counts.append(len(queries))
+                errors += response.status_code >= 400
+
+        summary = summarize(latencies, total.elapsed)
+        summary['queries'] = max(query_counts) if query_counts else 0
+        summary['errors'] = errors
+        return summary
+
+    def run_http(self, url, cookie, options):
+        headers = {'Cookie': cookie} if cookie else {}
+
+        def fetch(_):
+            request = urllib.request.Request(url, headers=headers)
+            with Timer() as timer:
+                try:
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                        failed = False
+                except urllib.error.URLError:
+                    failed = True
+            return timer.elapsed, failed
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(fetch, range(options['warmup'])))
+            with Timer() as total:
+                outcomes = list(pool.map(fetch, range(options['requests'])))
+
+        summary = summarize([elapsed for elapsed, _ in outcomes], total.elapsed)
+        summary['errors'] = sum(failed for _, failed in outcomes)
+        return summary
+
+    # ==================== Authentication Run ====================
+
+    def run_auth(self, options):
+        """
+        Replays leaked-credential style logins: every attempt uses a wrong
+        password, cycling through existing and unknown emails from a few IPs
+        """
+        password_hash = make_password('correct-horse-battery')
+        users = User.objects.bulk_create(
+            User(username=f'user{index}', email=f'user{index}@example.com', password=password_hash)
+            for index in range(options['users'])
+        )
+        # bulk_create skips the post_save signal that normally fills this table
+        UserEmailModel.objects.bulk_create(UserEmailModel(user=user, email=user.email) for user in users)
+
+        client = Client()
+        latencies = []
+        outcomes = {'locked_out': 0, 'rejected': 0, 'logged_in': 0}
+        rss_before = current_rss_kb()
+        with Timer() as total:
+            for attempt in range(options['attempts']):
+                # Every third email doesn't exist
+                email = f'user{attempt % (options["users"] * 3 // 2)}@example.com'
+                with Timer() as timer:
+                    response = client.post(
+                        '/admin/login/', {'email': email, 'password': f'guess-{attempt}'},
+                        REMOTE_ADDR=f'203.0.113.{attempt % options["ips"] + 1}',
+                    )
+                latencies.append(timer.elapsed)
+                if response.status_code == 429:
+                    outcomes['locked_out'] += 1
+                elif response.status_code == 302:
+                    outcomes['logged_in'] += 1
+                else:
+                    outcomes['rejected'] += 1
+
+        return {
+            'users': options['users'],
+            'ips': options['ips'],
+            'login': summarize(latencies, total.elapsed),
+            'outcomes': outcomes,
+            'rss_delta_kb': rss_delta_kb(rss_before, current_rss_kb()),
+            'process_peak_rss_kb': peak_rss_kb(),
+        }
+
+    # ==================== Startup Run ====================
+
+    def run_startup(self, options):
+        """
+        Cold starts in fresh interpreters (royal_paints_website.warmup's
+        probe), with and without warm_up() before the first request
+        """
+        database = connections['default'].settings_dict['NAME']
+        environ = dict(os.environ, DB_ENGINE='sqlite', DB_NAME=database, DB_REPLICA_HOSTS='')
+        paths = ['/', reverse('blog_detail', args=[BlogModel.objects.order_by('pk').values_list('slug', flat=True).first()])]
+
+        results = []
+        for path in paths:
+            for warm in (False, True):
+                command = [sys.executable, '-m', 'royal_paints_website.warmup', '--path', path]
+                if warm:
+                    command.append('--warm')
+                probes = []
+                for _ in range(options['runs']):
+                    completed = subprocess.run(command, env=environ, capture_output=True, text=True, check=False)
+                    if completed.returncode != 0:
+                        raise CommandError(f'Startup probe failed:\n{completed.stderr}')
+                    probes.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+                result = {'path': path, 'warm': warm}
+                for key in ('import_ms', 'warm_up_ms', 'first_request_ms', 'second_request_ms'):
+                    values = sorted(probe[key] for probe in probes if key in probe)
+                    if values:
+                        result[key] = {'p50': values[len(values) // 2], 'max': values[-1]}
+                result['errors'] = sum('status' in probe for probe in probes)
+                results.append(result)
+        return results
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from backend.stats import Timer
+from backend.related_posts import compute_related_posts, sparse
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the precomputed related posts and previous/next links for every blog'
+
+    def handle(self, *args, **options):
+        with Timer() as timer:
+            total = compute_related_posts()
+        engine = 'numpy/scipy' if sparse is not None else 'pure python'
+        self.stdout.write(self.style.SUCCESS(
+            f'Computed navigation for {total} blogs in {timer.elapsed:.2f}s ({engine})'
+        ))
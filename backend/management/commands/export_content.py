@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from backend.content_io import CONTENT_TYPES, FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Streams all blogs or carriers as JSONL or CSV to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(CONTENT_TYPES))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--output', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in iter_export(options['kind'], options['format']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
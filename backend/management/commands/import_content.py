@@ -0,0 +1,40 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.content_io import CONTENT_TYPES, FORMATS, import_content
+
+
+class Command(BaseCommand):
+    help = 'Bulk-imports blogs or carriers from a JSONL or CSV file (use - for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(CONTENT_TYPES))
+        parser.add_argument('path', help='Input file, or - to read stdin')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, else jsonl')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per transaction (default: 500)')
+        parser.add_argument('--image-root', help='Directory that image paths in the input are relative to')
+        parser.add_argument('--image-workers', type=int, default=4, help='Concurrent image copies (default: 4)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+        with stream:
+            report = import_content(
+                stream, options['kind'], fmt,
+                batch_size=options['batch_size'],
+                image_root=options['image_root'],
+                image_workers=options['image_workers'],
+            )
+
+        for error in report.errors:
+            self.stderr.write(f'line {error["line"]}: {error["error"]}')
+        summary = report.as_dict(max_errors=0)
+        summary.pop('errors')
+        self.stdout.write(self.style.SUCCESS(json.dumps(summary)))
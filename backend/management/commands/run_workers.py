@@ -0,0 +1,105 @@
+import json
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from backend.jobs import (
+    job_stats, purge_finished_jobs, registered_jobs, release_stale_jobs, schedule_periodic_jobs,
+    work, worker_name,
+)
+
+
+# Seconds between stale-lock recovery, cleanup and periodic scheduling
+MAINTENANCE_INTERVAL = 30
+
+
+def _run_process(worker_id, stop, poll_interval, burst):
+    # Forked children must not reuse the parent's database sockets
+    connections.close_all()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(worker_id, stop, poll_interval, burst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs background jobs from the database queue with a thread or process pool, '
+        'and schedules the periodic jobs in JOB_PERIODIC.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOB_WORKER_CONCURRENCY,
+            help=f'Worker threads or processes (default: {settings.JOB_WORKER_CONCURRENCY})',
+        )
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Thread pool (default) or forked process pool for CPU-heavy jobs')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls of an empty queue')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is ready')
+        parser.add_argument('--no-schedule', action='store_true',
+                            help="Don't schedule periodic jobs (when another run_workers does)")
+        parser.add_argument('--stats', action='store_true', help='Print per-job counts and timings as JSON and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(job_stats(), indent=2))
+            return
+
+        self.maintain(schedule=not options['no_schedule'])
+        self.stdout.write(
+            f'Running {options["concurrency"]} {options["pool"]} worker(s) for: {", ".join(registered_jobs())}'
+        )
+        if options['pool'] == 'process':
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            connections.close_all()
+            workers = [
+                context.Process(
+                    target=_run_process, name=f'job-worker-{index}',
+                    args=(worker_name(f':{index}'), stop, options['poll_interval'], options['burst']),
+                )
+                for index in range(options['concurrency'])
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(
+                    target=work, name=f'job-worker-{index}', daemon=True,
+                    args=(worker_name(f':{index}'), stop, options['poll_interval'], options['burst']),
+                )
+                for index in range(options['concurrency'])
+            ]
+
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        for worker in workers:
+            worker.start()
+        last_maintenance = time.monotonic()
+        try:
+            while any(worker.is_alive() for worker in workers):
+                if stop.wait(options['poll_interval']):
+                    break
+                if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                    self.maintain(schedule=not options['no_schedule'])
+                    last_maintenance = time.monotonic()
+        except KeyboardInterrupt:
+            stop.set()
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
+
+    def maintain(self, schedule):
+        try:
+            released = release_stale_jobs()
+            if released:
+                self.stderr.write(f'Released {released} stale job(s)')
+            purge_finished_jobs()
+            if schedule:
+                schedule_periodic_jobs()
+        finally:
+            close_old_connections()
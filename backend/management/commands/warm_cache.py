@@ -0,0 +1,41 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.cache_warmer import ORDERS, warm_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests every public page (static routes plus all blog and career detail pages) '
+        'concurrently to warm the caches after a deploy or content change. Prints a JSON report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only blogs/careers changed since the last run, and their listings')
+        parser.add_argument('--order', choices=ORDERS, default='popularity',
+                            help='Which detail pages are warmed first (default: popularity)')
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.CACHE_WARM_CONCURRENCY,
+            help=f'Parallel requests (default: {settings.CACHE_WARM_CONCURRENCY})',
+        )
+        parser.add_argument('--base-url', help='Warm over HTTP through this URL (default: CACHE_WARM_BASE_URL)')
+        parser.add_argument('--host', help='Host header for in-process requests')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds per HTTP request')
+
+    def handle(self, *args, **options):
+        report = warm_cache(
+            incremental=options['incremental'],
+            order=options['order'],
+            concurrency=options['concurrency'],
+            base_url=options['base_url'],
+            host=options['host'],
+            timeout=options['timeout'],
+        )
+        self.stdout.write(json.dumps(report.as_dict(), indent=2))
+        for warning in report.warnings:
+            self.stderr.write(self.style.WARNING(warning))
+        if report.failures:
+            self.stderr.write(self.style.WARNING(f'{len(report.failures)} URL(s) failed'))
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_user_emails(apps, schema_editor):
+    # First user (lowest id) keeps a duplicated email; blank emails are skipped
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserEmailModel = apps.get_model('backend', 'UserEmailModel')
+    seen = set()
+    rows = []
+    for user_id, email in User.objects.order_by('pk').values_list('pk', 'email').iterator():
+        key = (email or '').strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            rows.append(UserEmailModel(user_id=user_id, email=key))
+    UserEmailModel.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('backend', '0009_carriermodel_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserEmailModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='login_email', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_emails, migrations.RunPython.noop),
+    ]
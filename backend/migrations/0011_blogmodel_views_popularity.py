@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_useremailmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogmodel',
+            name='popularity',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogmodel',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_blogmodel_views_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogmodel',
+            name='adjacent_posts',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogmodel',
+            name='related_posts',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='blogmodel',
+            index=models.Index(fields=['created_at'], name='blog_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0012_blogmodel_related_adjacent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedContactModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField(unique=True)),
+                ('your_name', models.CharField(max_length=255)),
+                ('your_email', models.EmailField(max_length=254)),
+                ('your_message', models.TextField()),
+                ('sended_at', models.DateTimeField(db_index=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='contactmodel',
+            name='sended_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
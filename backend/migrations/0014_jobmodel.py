@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_contact_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('last_error', models.TextField(blank=True)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_jobmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carriermodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_carriermodel_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email_key', models.CharField(max_length=254, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField(db_index=True)),
+                ('message_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contactmodel',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254),
+        ),
+        migrations.AddIndex(
+            model_name='contactmodel',
+            index=models.Index(fields=['email_key', 'sended_at'], name='contact_email_key_sent_idx'),
+        ),
+    ]
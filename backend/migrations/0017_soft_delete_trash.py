@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_contact_email_key_leadmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogmodel',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='carriermodel',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='contactmodel',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0017_soft_delete_trash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogmodel',
+            name='publish_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogmodel',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('published', 'Published')], default='published', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='carriermodel',
+            name='publish_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carriermodel',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('scheduled', 'Scheduled'), ('published', 'Published')], default='published', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='blogmodel',
+            index=models.Index(fields=['status', 'publish_at'], name='blog_status_publish_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carriermodel',
+            index=models.Index(fields=['status', 'publish_at'], name='carrier_status_publish_at_idx'),
+        ),
+    ]
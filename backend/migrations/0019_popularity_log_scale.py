@@ -0,0 +1,32 @@
+import math
+
+from django.db import migrations
+
+
+def to_log_scale(apps, schema_editor):
+    # Linear decayed scores become their base-2 logarithm (backend.popularity)
+    BlogModel = apps.get_model('backend', 'BlogModel')
+    rows = []
+    for pk, score in BlogModel.objects.filter(popularity__gt=0).values_list('pk', 'popularity').iterator():
+        rows.append(BlogModel(pk=pk, popularity=math.log2(score) if math.isfinite(score) else 0))
+    BlogModel.objects.bulk_update(rows, ['popularity'], batch_size=1000)
+
+
+def to_linear_scale(apps, schema_editor):
+    BlogModel = apps.get_model('backend', 'BlogModel')
+    rows = [
+        BlogModel(pk=pk, popularity=2 ** min(score, 1023))
+        for pk, score in BlogModel.objects.filter(views__gt=0).values_list('pk', 'popularity').iterator()
+    ]
+    BlogModel.objects.bulk_update(rows, ['popularity'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_scheduled_publishing'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_log_scale, to_linear_scale),
+    ]
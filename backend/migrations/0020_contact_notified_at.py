@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:51
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_notified(apps, schema_editor):
+    # Messages from before the digest job existed were handled by the old
+    # in-process notifier; don't email them all again
+    ContactModel = apps.get_model('backend', 'ContactModel')
+    ContactModel.objects.update(notified_at=F('sended_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0019_popularity_log_scale'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmodel',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_existing_notified, migrations.RunPython.noop),
+    ]
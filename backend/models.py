@@ -1,9 +1,68 @@
+from django.conf import settings
 from django.db import models
 from django.utils.text import slugify 
 from django.utils import timezone
 import os
 
 
+def unique_slug(model, value):
+    """
+    First free slug out of base, base-1, base-2, ... for `model`, found
+    with one indexed prefix query instead of an exists() query per candidate
+    """
+    base_slug = slugify(value)
+    # Trashed rows keep their slug until they are purged
+    taken = set(model.all_objects.filter(slug__startswith=base_slug).values_list('slug', flat=True))
+    slug = base_slug
+    counter = 1
+    while slug in taken:
+        slug = f"{base_slug}-{counter}"
+        counter += 1
+    return slug
+
+
+class TrashQuerySet(models.QuerySet):
+    """
+    Set-based soft delete: trash() and restore() are single UPDATEs and
+    send no model signals (see backend.trash for the side effects)
+    """
+
+    def trash(self):
+        return self.filter(deleted_at__isnull=True).update(deleted_at=timezone.now())
+
+    def restore(self):
+        return self.filter(deleted_at__isnull=False).update(deleted_at=None)
+
+    def trashed(self):
+        return self.filter(deleted_at__isnull=False)
+
+
+class LiveManager(models.Manager.from_queryset(TrashQuerySet)):
+    """Default manager of trashable models: hides rows in the trash"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+# Publication states of blogs and careers (backend.publishing). Only
+# published rows are public; scheduled ones become published at publish_at.
+STATUS_DRAFT = 'draft'
+STATUS_SCHEDULED = 'scheduled'
+STATUS_PUBLISHED = 'published'
+PUBLISH_STATUS_CHOICES = [
+    (STATUS_DRAFT, 'Draft'),
+    (STATUS_SCHEDULED, 'Scheduled'),
+    (STATUS_PUBLISHED, 'Published'),
+]
+
+
+class PublishedManager(LiveManager):
+    """What the public site shows: published rows that aren't in the trash"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(status=STATUS_PUBLISHED)
+
+
 class BlogModel(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField(null=True, blank=True)
@@ -11,18 +70,42 @@ class BlogModel(models.Model):
     slug = models.SlugField(max_length=250, unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained in batches by backend.popularity, never on the request path.
+    # popularity is the log2 of the decayed view score (see that module).
+    views = models.PositiveIntegerField(default=0, editable=False)
+    popularity = models.FloatField(default=0, db_index=True, editable=False)
+    # Precomputed by backend.related_posts: [{'id', 'title', 'slug', 'score'}]
+    # and {'previous': {'title', 'slug'} | None, 'next': ... }
+    related_posts = models.JSONField(default=list, blank=True, editable=False)
+    adjacent_posts = models.JSONField(default=dict, blank=True, editable=False)
+    status = models.CharField(max_length=10, choices=PUBLISH_STATUS_CHOICES, default=STATUS_PUBLISHED)
+    publish_at = models.DateTimeField(null=True, blank=True)
+    # Set while the post is in the trash (backend.trash)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+
+    objects = LiveManager()
+    all_objects = TrashQuerySet.as_manager()
+    published = PublishedManager()
+
+    # Surrogate keys of the cached pages showing blogs (royal_paints_website.cdn)
+    SURROGATE_LIST_KEY = 'blog-list'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='blog_created_at_idx'),
+            # Scheduled posts that are due: status='scheduled' AND publish_at <= now
+            models.Index(fields=['status', 'publish_at'], name='blog_status_publish_at_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while BlogModel.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            self.slug = unique_slug(BlogModel, self.title)
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def surrogate_key(pk):
+        return f'blog-{pk}'
+
     def __str__(self):
         return self.title
     
@@ -32,7 +115,59 @@ class ContactModel(models.Model):
     your_name = models.CharField(max_length=255)
     your_email = models.EmailField()
     your_message = models.TextField()
-    sended_at = models.DateTimeField(auto_now_add=True)
+    # Indexed for the admin list and for backend.retention's age cut-off
+    sended_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # normalize_email_key(your_email), set on save; groups messages into
+    # leads. Empty on rows saved before it existed until `manage.py
+    # backfill_leads` has run.
+    email_key = models.CharField(max_length=254, blank=True, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+    # When the message went out in a digest email; the digest job picks up
+    # rows where it is empty (backend.notifications)
+    notified_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+
+    objects = LiveManager()
+    all_objects = TrashQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # A lead's message history, newest first
+            models.Index(fields=['email_key', 'sended_at'], name='contact_email_key_sent_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.email_key = normalize_email_key(self.your_email)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.your_name} - {self.your_email}"
+
+
+class LeadModel(models.Model):
+    # One row per customer (normalized email) who used a contact form,
+    # maintained by backend.leads as messages come in. message_count keeps
+    # counting messages that backend.retention later archives.
+    email_key = models.CharField(max_length=254, unique=True)
+    # Name and address as given in the latest message
+    name = models.CharField(max_length=255)
+    email = models.EmailField()
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField(db_index=True)
+    message_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} - {self.email} ({self.message_count})"
+
+
+class ArchivedContactModel(models.Model):
+    # Contact messages moved out of ContactModel by backend.retention once
+    # they are older than CONTACT_RETENTION_DAYS. Only searched on request.
+    original_id = models.PositiveBigIntegerField(unique=True)
+    your_name = models.CharField(max_length=255)
+    your_email = models.EmailField()
+    your_message = models.TextField()
+    sended_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.your_name} - {self.your_email}"
@@ -47,17 +182,84 @@ class CarrierModel(models.Model):
     description = models.TextField()
     slug = models.SlugField(max_length=250, unique=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    status = models.CharField(max_length=10, choices=PUBLISH_STATUS_CHOICES, default=STATUS_PUBLISHED)
+    publish_at = models.DateTimeField(null=True, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+
+    objects = LiveManager()
+    all_objects = TrashQuerySet.as_manager()
+    published = PublishedManager()
+
+    SURROGATE_LIST_KEY = 'carrier-list'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'publish_at'], name='carrier_status_publish_at_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            base_slug = slugify(self.carrier_title)
-            slug = base_slug
-            counter = 1
-            while CarrierModel.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            self.slug = unique_slug(CarrierModel, self.carrier_title)
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def surrogate_key(pk):
+        return f'carrier-{pk}'
+
     def __str__(self):
         return self.carrier_title
+
+
+
+def normalize_email_key(email):
+    return (email or '').strip().lower()
+
+
+class UserEmailModel(models.Model):
+    # Unique, indexed, lower-cased copy of auth_user.email used for login
+    # lookups (auth_user.email has no index and allows duplicates). Kept in
+    # sync by backend.signals.sync_user_email.
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='login_email')
+    email = models.EmailField(unique=True)
+
+    def __str__(self):
+        return self.email
+
+
+
+class JobModel(models.Model):
+    # Background job queue processed by `manage.py run_workers` (see
+    # backend.jobs); no external broker needed
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for status='pending' AND run_at <= now
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
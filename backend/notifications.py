@@ -0,0 +1,107 @@
+"""
+Batched email notifications for new contact messages
+
+New ContactModel rows start with an empty notified_at; the contact form
+does no extra work. The `send_contact_digest` job (run every
+CONTACT_NOTIFY_DIGEST_SECONDS through JOB_PERIODIC) emails every live
+message not yet notified as digests of up to CONTACT_NOTIFY_DIGEST_SIZE
+messages over one SMTP connection, stamping notified_at on each digest as
+soon as it is sent. Pending notifications live in the database, so they
+survive restarts and deploys and are shared by every worker; a send that
+still fails after its retries fails the job, and the queue retries it
+with backoff without repeating the digests already sent.
+
+Settings:
+    CONTACT_NOTIFY_RECIPIENTS: who gets the digests (empty disables them)
+    CONTACT_NOTIFY_DIGEST_SIZE: messages per digest email
+    CONTACT_NOTIFY_DIGEST_SECONDS: seconds between digest runs (0 leaves
+        the job unscheduled; call flush_contact_notifications() yourself)
+    CONTACT_NOTIFY_RETRIES: extra attempts per digest within one run
+    CONTACT_NOTIFY_RETRY_BACKOFF: seconds before the first retry, doubled
+        for each further one
+"""
+import logging
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import ContactModel
+
+
+logger = logging.getLogger(__name__)
+
+
+# ======================================================================
+# SENDING
+# ======================================================================
+
+def build_digest(contacts):
+    """One EmailMessage summarizing `contacts`"""
+    count = len(contacts)
+    subject = f'{count} new contact message{"s" if count != 1 else ""}'
+    sections = [
+        f'From: {contact.your_name} <{contact.your_email}>\n'
+        f'Sent: {timezone.localtime(contact.sended_at):%Y-%m-%d %H:%M}\n\n'
+        f'{contact.your_message}'
+        for contact in contacts
+    ]
+    return EmailMessage(
+        subject=f'{settings.EMAIL_SUBJECT_PREFIX}{subject}',
+        body=('\n\n' + '-' * 40 + '\n\n').join(sections),
+        to=settings.CONTACT_NOTIFY_RECIPIENTS,
+        # Replying to a single-message digest answers the customer directly
+        reply_to=[contacts[0].your_email] if count == 1 else None,
+    )
+
+
+def _send_with_retry(connection, message):
+    retries = settings.CONTACT_NOTIFY_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            # No-op while the shared session is still open
+            connection.open()
+            connection.send_messages([message])
+            return
+        except (smtplib.SMTPException, OSError):
+            # Drop a possibly broken SMTP session before the next attempt
+            connection.close()
+            if attempt == retries:
+                raise
+            logger.warning('Contact digest send failed, retrying (attempt %s of %s)', attempt + 1, retries)
+            time.sleep(settings.CONTACT_NOTIFY_RETRY_BACKOFF * 2 ** attempt)
+
+
+def flush_contact_notifications():
+    """
+    Sends every contact message not yet notified as digest emails
+
+    Raises:
+        SMTPException, OSError: a digest failed after its retries; the
+            messages of earlier digests stay marked as sent
+
+    Returns:
+        int: number of contact messages sent
+    """
+    if not settings.CONTACT_NOTIFY_RECIPIENTS:
+        return 0
+    contacts = list(ContactModel.objects.filter(notified_at__isnull=True).order_by('sended_at', 'pk'))
+    if not contacts:
+        return 0
+
+    size = settings.CONTACT_NOTIFY_DIGEST_SIZE
+    sent = 0
+    connection = get_connection()
+    try:
+        for start in range(0, len(contacts), size):
+            digest = contacts[start:start + size]
+            _send_with_retry(connection, build_digest(digest))
+            ContactModel.all_objects.filter(pk__in=[contact.pk for contact in digest]).update(
+                notified_at=timezone.now(),
+            )
+            sent += len(digest)
+    finally:
+        connection.close()
+    return sent
@@ -0,0 +1,189 @@
+"""
+Write-behind blog view counting and the cached "popular posts" ranking
+
+blog_detail is served from shared caches (royal_paints_website.cdn) and
+only reaches Django on a cache miss, so it can't count views. The page
+posts a beacon to baseapp.views.blog_view_beacon instead. That request
+is never cached and only bumps an in-process counter. The trade-off:
+visitors without JavaScript or sendBeacon, and most bots, aren't counted.
+The beacon can also be posted without viewing the page, but that is
+no easier than requesting the page was. A background thread per
+worker flushes the buffered counts every BLOG_VIEW_FLUSH_SECONDS as a few
+aggregated `UPDATE ... SET views = views + n` statements. Because every
+worker adds its own deltas atomically, totals stay exact across processes;
+only counts buffered in a worker that is killed hard are lost.
+
+Popularity uses a time-decayed score without ever rewriting old scores:
+each view adds 2 ** (age_of_epoch / half_life), so newer views weigh
+exponentially more and ordering by the stored value equals ordering by
+the decayed score at any moment. That sum overflows a float within years
+(within weeks for short half-lives), so it is stored as its base-2
+logarithm. Adding views is a log-sum-exp update done in SQL:
+
+    popularity = max(p, v) + log2(1 + 2 ** (min(p, v) - max(p, v)))
+
+where v = log2(count) + age_of_epoch / half_life. Every term stays of
+the order of the epoch's age in half-lives.
+
+Settings:
+    BLOG_VIEW_FLUSH_SECONDS: flush interval (0 disables the background
+        thread; call flush_blog_views() yourself)
+    BLOG_POPULARITY_HALF_LIFE_HOURS: how fast old views stop counting
+    BLOG_POPULAR_LIMIT: number of posts in the ranking
+    BLOG_POPULAR_CACHE_SECONDS: how long the ranking is cached
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least, Log, Power
+from django.utils import timezone
+
+from .models import BlogModel
+
+
+logger = logging.getLogger(__name__)
+
+POPULAR_BLOGS_CACHE_KEY = 'blogs:popular'
+POPULARITY_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Distinct blogs buffered between flushes; beacons for more are dropped,
+# so posting made-up ids can't grow memory
+MAX_PENDING_BLOGS = 10000
+
+_pending_views = Counter()
+_pending_lock = threading.Lock()
+_flusher = None
+
+
+# ======================================================================
+# VIEW COUNTING
+# ======================================================================
+
+def record_blog_view(blog_id):
+    """Buffers one view of a blog; no I/O on the request path"""
+    with _pending_lock:
+        if blog_id in _pending_views or len(_pending_views) < MAX_PENDING_BLOGS:
+            _pending_views[blog_id] += 1
+    _ensure_flusher()
+
+
+def popularity_exponent(moment=None):
+    """log2 of the weight of one view at `moment`"""
+    moment = moment or timezone.now()
+    half_life = settings.BLOG_POPULARITY_HALF_LIFE_HOURS * 3600
+    return (moment - POPULARITY_EPOCH).total_seconds() / half_life
+
+
+def _add_log_weight(log_weight):
+    # log2(2 ** popularity + 2 ** log_weight) without leaving log space
+    high = Greatest(F('popularity'), Value(log_weight))
+    low = Least(F('popularity'), Value(log_weight))
+    return high + Log(Value(2.0), Value(1.0) + Power(Value(2.0), low - high))
+
+
+def flush_blog_views():
+    """
+    Writes buffered views to the database and refreshes the ranking
+
+    Returns:
+        int: number of views written
+    """
+    with _pending_lock:
+        pending = dict(_pending_views)
+        _pending_views.clear()
+    if not pending:
+        return 0
+
+    # One UPDATE per distinct count instead of one per blog
+    blogs_by_count = defaultdict(list)
+    for blog_id, count in pending.items():
+        blogs_by_count[count].append(blog_id)
+    exponent = popularity_exponent()
+
+    try:
+        with transaction.atomic():
+            for count, blog_ids in blogs_by_count.items():
+                BlogModel.objects.filter(pk__in=blog_ids).update(
+                    views=F('views') + count,
+                    popularity=_add_log_weight(exponent + math.log2(count)),
+                )
+    except DatabaseError:
+        # Put the counts back so the next flush retries them
+        with _pending_lock:
+            _pending_views.update(pending)
+        raise
+
+    refresh_popular_blogs()
+    return sum(pending.values())
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_blog_views()
+        except Exception:
+            logger.exception('Flushing blog views failed')
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    """Starts the flush thread lazily, so it is created after a fork"""
+    global _flusher
+    interval = settings.BLOG_VIEW_FLUSH_SECONDS
+    if not interval or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _pending_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(
+                target=_flush_forever, args=(interval,), name='blog-view-flusher', daemon=True,
+            )
+            _flusher.start()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_blog_views()
+    except Exception:
+        pass
+
+
+# ======================================================================
+# POPULAR POSTS RANKING
+# ======================================================================
+
+def refresh_popular_blogs():
+    popular = list(
+        BlogModel.published.filter(views__gt=0)
+        .only('id', 'title', 'slug', 'image', 'created_at')
+        .order_by('-popularity')[:settings.BLOG_POPULAR_LIMIT]
+    )
+    cache.set(POPULAR_BLOGS_CACHE_KEY, popular, settings.BLOG_POPULAR_CACHE_SECONDS)
+    return popular
+
+
+def invalidate_popular_blogs():
+    """
+    Drops the cached ranking after commit, so a post that left the
+    published set (trash, draft) isn't linked from "Popular posts"
+    """
+    transaction.on_commit(lambda: cache.delete(POPULAR_BLOGS_CACHE_KEY))
+
+
+def get_popular_blogs():
+    """Most popular blogs, served from cache (one query on a miss)"""
+    popular = cache.get(POPULAR_BLOGS_CACHE_KEY)
+    if popular is None:
+        popular = refresh_popular_blogs()
+    return popular
@@ -0,0 +1,100 @@
+"""
+Drafts and scheduled publishing for blogs and careers
+
+status is the precomputed published set. Public pages read through the
+`published` managers, a plain status='published' filter. They never
+compare publish_at with the clock, so a cached page stays correct until
+the content changes rather than until the next scheduled time passes.
+
+Saving a row as scheduled queues the `publish_scheduled` job at its
+publish_at (backend.signals). The job moves every due row to published
+with one UPDATE, then purges the cached pages of exactly those rows plus
+their listings. Public pages keep their full CDN lifetime.
+"""
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from royal_paints_website.cdn import queue_purge
+
+from . import popularity
+from .content_version import invalidate_content_version
+from .jobs import enqueue
+from .models import BlogModel, CarrierModel, STATUS_DRAFT, STATUS_PUBLISHED, STATUS_SCHEDULED
+
+
+PUBLISHABLE = {
+    'blogs': BlogModel,
+    'carriers': CarrierModel,
+}
+
+
+def publication(status, publish_at, current=None):
+    """
+    Status and publish time from an admin form
+
+    Args:
+        status: 'draft', 'scheduled' or 'published'
+        publish_at: the datetime-local input value, in the site's time zone
+        current: the row's (status, publish_at) when editing
+
+    Raises:
+        ValueError: unknown status, or scheduled without a valid time
+
+    Returns:
+        tuple: (status, publish_at); a schedule already due publishes now
+    """
+    now = timezone.now()
+    if status == STATUS_SCHEDULED:
+        moment = parse_datetime(publish_at or '')
+        if moment is None:
+            raise ValueError('Choose a date and time to publish at.')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        if moment > now:
+            return STATUS_SCHEDULED, moment
+        status = STATUS_PUBLISHED
+    if status == STATUS_PUBLISHED:
+        # Keeps the time an already published row first went live
+        if current and current[0] == STATUS_PUBLISHED and current[1]:
+            return STATUS_PUBLISHED, current[1]
+        return STATUS_PUBLISHED, now
+    if status == STATUS_DRAFT:
+        return STATUS_DRAFT, None
+    raise ValueError(f'Unknown status "{status}"')
+
+
+def _went_live(model, pks):
+    """Side effects of rows entering the published set (update() sends no signals)"""
+    invalidate_content_version()
+    keys = [model.surrogate_key(pk) for pk in pks] + [model.SURROGATE_LIST_KEY]
+    transaction.on_commit(lambda: queue_purge(keys))
+    if model is BlogModel:
+        popularity.invalidate_popular_blogs()
+        if len(pks) == 1:
+            enqueue('refresh_blog_navigation', {'pk': pks[0]})
+        else:
+            enqueue('rebuild_related_posts')
+
+
+def publish_due(now=None):
+    """
+    Publishes every scheduled blog and career whose publish_at has passed
+
+    Trashed rows are published too, so restoring them later needs no
+    extra step.
+
+    Returns:
+        dict: rows published per kind
+    """
+    now = now or timezone.now()
+    published = {}
+    for kind, model in PUBLISHABLE.items():
+        due = model.all_objects.filter(status=STATUS_SCHEDULED, publish_at__lte=now)
+        pks = list(due.values_list('pk', flat=True))
+        # Re-checks the schedule: an edit since the SELECT may have moved it
+        count = due.filter(pk__in=pks).update(status=STATUS_PUBLISHED, updated_at=now) if pks else 0
+        if count:
+            _went_live(model, pks)
+        published[kind] = count
+    return published
@@ -0,0 +1,432 @@
+"""
+Precomputed "related posts" and previous/next navigation for blogs
+
+Related posts come from TF-IDF cosine similarity over blog titles and
+content. With NumPy and SciPy installed the similarity runs as sparse
+matrix products in row blocks; without them a pure-Python inverted index
+computes the same scores. Results are stored on BlogModel.related_posts
+and BlogModel.adjacent_posts, so blog_detail reads everything with the
+single slug lookup it already does.
+
+Saving or deleting a blog only recomputes the posts it can affect (see
+refresh_for_saved_blog / refresh_for_deleted_blog). Those updates use an
+IncrementalIndex kept per worker process: its IDF is frozen when it is
+built, and before each update it only re-reads the posts published,
+removed or edited (updated_at) since its last sync, so a save tokenizes
+a handful of posts instead of the whole corpus. The frozen IDF drifts as
+posts come and go; the index is rebuilt once the post count has moved by
+more than REBUILD_DRIFT, and the periodic `rebuild_related_posts` job
+(or `manage.py compute_related_posts`) recomputes everything with fresh
+IDF. Rows changed with queryset.update() without touching updated_at
+are only picked up by that rebuild. The index also mirrors the stored
+related lists, so a save only rewrites posts that list the changed post
+or that it now outscores, without reading every row; lists written by
+another process are refreshed with the rows it re-reads.
+
+Only published posts (BlogModel.published) are linked; drafts and
+scheduled posts join when they go live.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import BlogModel
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(
+    'about after all also and any are because been but can could did does for from had has '
+    'have her his how into its just more most not now off our out over she should than that '
+    'the their them then there these they this those through too under very was were what '
+    'when where which while who why will with would you your'.split()
+)
+# Title terms count this many times more than body terms
+TITLE_WEIGHT = 3
+# Rows per block when computing all similarities with sparse matrices
+BLOCK_ROWS = 256
+# The incremental index is rebuilt (fresh IDF) once the number of published
+# posts differs from the one it was built with by more than this share
+REBUILD_DRIFT = 0.25
+# Re-read window before the last sync, covering clock skew between hosts
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall(strip_tags(text or '').lower())
+        if len(token) > 2 and token not in STOP_WORDS
+    ]
+
+
+def _document(title, content):
+    return Counter(tokenize(title) * TITLE_WEIGHT + tokenize(content))
+
+
+def _idf(total, frequency):
+    return math.log((1 + total) / (1 + frequency)) + 1
+
+
+# ======================================================================
+# TF-IDF INDEX
+# ======================================================================
+
+class TfidfIndex:
+    """
+    L2-normalized TF-IDF vectors (sublinear tf, smoothed idf) for a corpus
+
+    Args:
+        corpus: list of (pk, title, slug, content) tuples
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.position = {row[0]: index for index, row in enumerate(corpus)}
+        documents = [_document(title, content) for _, title, _, content in corpus]
+        if sparse is not None:
+            self._build_matrix(documents)
+        else:
+            self._build_postings(documents)
+
+    # ==================== Vectorized (NumPy/SciPy) ====================
+
+    def _build_matrix(self, documents):
+        vocabulary = {}
+        rows, columns, counts = [], [], []
+        for row, document in enumerate(documents):
+            for term, count in document.items():
+                rows.append(row)
+                columns.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+
+        total = len(documents)
+        matrix = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float64), (rows, columns)),
+            shape=(total, max(len(vocabulary), 1)),
+        )
+        matrix.data = 1 + np.log(matrix.data)
+        document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + total) / (1 + document_frequency)) + 1
+        matrix = sparse.csr_matrix(matrix.multiply(idf))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.matrix = sparse.csr_matrix(sparse.diags(1 / norms) @ matrix)
+
+    def _top_from_scores(self, row, scores, limit):
+        scores[row] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ordered = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(index), float(scores[index])) for index in ordered]
+
+    # ==================== Pure Python fallback ====================
+
+    def _build_postings(self, documents):
+        total = len(documents)
+        document_frequency = Counter(term for document in documents for term in document)
+        idf = {term: _idf(total, frequency) for term, frequency in document_frequency.items()}
+        self.vectors = []
+        self.postings = defaultdict(list)
+        for row, document in enumerate(documents):
+            vector = {term: (1 + math.log(count)) * idf[term] for term, count in document.items()}
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1
+            vector = {term: weight / norm for term, weight in vector.items()}
+            self.vectors.append(vector)
+            for term, weight in vector.items():
+                self.postings[term].append((row, weight))
+
+    def _python_scores(self, row):
+        scores = defaultdict(float)
+        for term, weight in self.vectors[row].items():
+            for other, other_weight in self.postings[term]:
+                scores[other] += weight * other_weight
+        scores.pop(row, None)
+        return scores
+
+    # ==================== Queries ====================
+
+    def similarities(self, pk):
+        """Similarity of every other post to `pk` as {row: score}"""
+        row = self.position.get(pk)
+        if row is None:
+            return {}
+        if sparse is None:
+            return dict(self._python_scores(row))
+        scores = (self.matrix @ self.matrix[row].T).toarray().ravel()
+        scores[row] = 0
+        return {int(index): float(scores[index]) for index in np.flatnonzero(scores > 0)}
+
+    def top_related(self, pk, limit):
+        """Up to `limit` (row, score) pairs most similar to `pk`"""
+        row = self.position[pk]
+        if sparse is None:
+            scores = self._python_scores(row)
+            return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        scores = (self.matrix @ self.matrix[row].T).toarray().ravel()
+        return self._top_from_scores(row, scores, limit)
+
+    def all_related(self, limit):
+        """Yields (row, [(row, score), ...]) for every post"""
+        if sparse is None:
+            for row in range(len(self.corpus)):
+                yield row, self.top_related(self.corpus[row][0], limit)
+            return
+        transposed = self.matrix.T.tocsc()
+        for start in range(0, len(self.corpus), BLOCK_ROWS):
+            block = (self.matrix[start:start + BLOCK_ROWS] @ transposed).toarray()
+            for offset, scores in enumerate(block):
+                yield start + offset, self._top_from_scores(start + offset, scores, limit)
+
+
+class IncrementalIndex:
+    """
+    TF-IDF postings (same weighting as TfidfIndex) that change one post at
+    a time, with the IDF frozen at construction
+
+    It also mirrors the stored related lists ({pk: {id: score}}) and their
+    reverse ({id: pks listing it}), so a save finds the posts it affects
+    without scanning BlogModel.
+
+    Args:
+        corpus: list of (pk, title, slug, content) tuples
+        related: {pk: stored related_posts entries}
+    """
+
+    def __init__(self, corpus, related=None):
+        documents = [(pk, title, slug, _document(title, content)) for pk, title, slug, content in corpus]
+        self.total = len(documents)
+        document_frequency = Counter(term for *_, document in documents for term in document)
+        self.idf = {term: _idf(self.total, frequency) for term, frequency in document_frequency.items()}
+        self.links = {}
+        self.vectors = {}
+        self.postings = defaultdict(dict)
+        self.related = {}
+        self.listed_by = defaultdict(set)
+        for pk, title, slug, document in documents:
+            self.set(pk, title, slug, document)
+        for pk, entries in (related or {}).items():
+            self.set_related(pk, entries)
+
+    def set(self, pk, title, slug, document):
+        """Adds or replaces post `pk`; terms new since the build weigh as if in one post"""
+        self.remove(pk)
+        unseen = _idf(self.total, 1)
+        vector = {term: (1 + math.log(count)) * self.idf.get(term, unseen) for term, count in document.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1
+        self.vectors[pk] = {term: weight / norm for term, weight in vector.items()}
+        self.links[pk] = (title, slug)
+        for term, weight in self.vectors[pk].items():
+            self.postings[term][pk] = weight
+
+    def remove(self, pk):
+        for term in self.vectors.pop(pk, {}):
+            postings = self.postings[term]
+            postings.pop(pk, None)
+            if not postings:
+                del self.postings[term]
+        self.links.pop(pk, None)
+        # Lists naming `pk` stay until those posts are recomputed
+        self.set_related(pk, [])
+
+    def set_related(self, pk, entries):
+        """Records the related_posts stored for `pk`"""
+        for other in self.related.pop(pk, {}):
+            self.listed_by[other].discard(pk)
+        if entries:
+            self.related[pk] = {entry['id']: entry['score'] for entry in entries}
+            for other in self.related[pk]:
+                self.listed_by[other].add(pk)
+
+    def similarities(self, pk):
+        """Similarity of every other post to `pk` as {pk: score}"""
+        scores = defaultdict(float)
+        for term, weight in self.vectors.get(pk, {}).items():
+            for other, other_weight in self.postings[term].items():
+                scores[other] += weight * other_weight
+        scores.pop(pk, None)
+        return dict(scores)
+
+    def related_entries(self, pk, limit):
+        top = heapq.nlargest(limit, self.similarities(pk).items(), key=lambda item: (item[1], -item[0]))
+        return [
+            {'id': other, 'title': self.links[other][0], 'slug': self.links[other][1], 'score': round(score, 4)}
+            for other, score in top
+        ]
+
+
+# Per-process incremental index, shared by the worker threads
+_incremental = None
+_incremental_synced_at = None
+_incremental_lock = threading.Lock()
+
+
+def _synced_index(changed_pk):
+    """
+    The incremental index brought up to date with the database: posts no
+    longer published are dropped, and new, edited and `changed_pk` posts
+    are re-read. Callers hold _incremental_lock.
+    """
+    global _incremental, _incremental_synced_at
+    now = timezone.now()
+    live = set(BlogModel.published.values_list('pk', flat=True))
+    index = _incremental
+    if index is None or abs(len(live) - index.total) > REBUILD_DRIFT * max(index.total, 1):
+        index = IncrementalIndex(
+            _load_corpus(), dict(BlogModel.published.values_list('pk', 'related_posts').iterator()),
+        )
+    else:
+        for pk in set(index.vectors) - live:
+            index.remove(pk)
+        stale = (live - set(index.vectors)) | {changed_pk}
+        changed = BlogModel.published.filter(
+            Q(pk__in=stale) | Q(updated_at__gte=_incremental_synced_at - SYNC_OVERLAP)
+        ).values_list('pk', 'title', 'slug', 'content', 'related_posts')
+        for pk, title, slug, content, related in changed:
+            index.set(pk, title, slug, _document(title, content))
+            index.set_related(pk, related)
+    _incremental, _incremental_synced_at = index, now
+    return index
+
+
+def reset_incremental_index():
+    """Drops the per-process index so the next update rebuilds it with fresh IDF"""
+    global _incremental
+    with _incremental_lock:
+        _incremental = None
+
+
+# ======================================================================
+# STORAGE
+# ======================================================================
+
+def _load_corpus():
+    return list(BlogModel.published.order_by('pk').values_list('pk', 'title', 'slug', 'content'))
+
+
+def _related_entries(index, related):
+    return [
+        {'id': index.corpus[row][0], 'title': index.corpus[row][1],
+         'slug': index.corpus[row][2], 'score': round(score, 4)}
+        for row, score in related
+    ]
+
+
+def _link(values):
+    if values is None:
+        return None
+    return {'id': values['pk'], 'title': values['title'], 'slug': values['slug']}
+
+
+def _neighbours(pk, created_at):
+    fields = ('pk', 'title', 'slug')
+    previous = (
+        BlogModel.published.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        .order_by('-created_at', '-pk').values(*fields).first()
+    )
+    following = (
+        BlogModel.published.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+        .order_by('created_at', 'pk').values(*fields).first()
+    )
+    return previous, following
+
+
+def refresh_adjacent_posts(pks):
+    """Recomputes previous/next links for the given blogs (indexed lookups)"""
+    updated = []
+    for pk, created_at in BlogModel.objects.filter(pk__in=pks).values_list('pk', 'created_at'):
+        previous, following = _neighbours(pk, created_at)
+        updated.append(BlogModel(pk=pk, adjacent_posts={'previous': _link(previous), 'next': _link(following)}))
+    BlogModel.objects.bulk_update(updated, ['adjacent_posts'])
+    return len(updated)
+
+
+def compute_related_posts(batch_size=500):
+    """
+    Rebuilds related posts and previous/next links for every blog
+
+    Returns:
+        int: number of blogs processed
+    """
+    limit = settings.BLOG_RELATED_LIMIT
+    index = TfidfIndex(_load_corpus())
+    BlogModel.objects.bulk_update(
+        [
+            BlogModel(pk=index.corpus[row][0], related_posts=_related_entries(index, related))
+            for row, related in index.all_related(limit)
+        ],
+        ['related_posts'], batch_size=batch_size,
+    )
+
+    ordered = list(BlogModel.published.order_by('created_at', 'pk').values('pk', 'title', 'slug'))
+    BlogModel.objects.bulk_update(
+        [
+            BlogModel(pk=current['pk'], adjacent_posts={
+                'previous': _link(ordered[position - 1]) if position > 0 else None,
+                'next': _link(ordered[position + 1]) if position + 1 < len(ordered) else None,
+            })
+            for position, current in enumerate(ordered)
+        ],
+        ['adjacent_posts'], batch_size=batch_size,
+    )
+    reset_incremental_index()
+    return len(index.corpus)
+
+
+def _refresh_related(changed_pk):
+    """
+    Recomputes related posts for `changed_pk` and for every post whose
+    list mentions it or would now include it
+    """
+    limit = settings.BLOG_RELATED_LIMIT
+    with _incremental_lock:
+        index = _synced_index(changed_pk)
+        scores = index.similarities(changed_pk)
+
+        # Posts listing it now, plus those it would now make the cut for
+        affected = {changed_pk} if changed_pk in index.vectors else set()
+        affected |= index.listed_by[changed_pk]
+        for pk, score in scores.items():
+            related = index.related.get(pk, {})
+            if len(related) < limit or score > min(related.values()):
+                affected.add(pk)
+
+        updated = []
+        for pk in affected:
+            if pk in index.vectors:
+                entries = index.related_entries(pk, limit)
+                index.set_related(pk, entries)
+                updated.append(BlogModel(pk=pk, related_posts=entries))
+    BlogModel.objects.bulk_update(updated, ['related_posts'])
+    return affected
+
+
+def refresh_for_saved_blog(pk):
+    """Updates navigation affected by creating or editing blog `pk`"""
+    affected = _refresh_related(pk)
+    created_at = BlogModel.objects.filter(pk=pk).values_list('created_at', flat=True).first()
+    if created_at is not None:
+        previous, following = _neighbours(pk, created_at)
+        refresh_adjacent_posts([pk] + [values['pk'] for values in (previous, following) if values])
+    return affected
+
+
+def refresh_for_deleted_blog(pk, adjacent_posts):
+    """Updates navigation that pointed at the deleted blog `pk`"""
+    affected = _refresh_related(pk)
+    neighbours = [link['id'] for link in (adjacent_posts or {}).values() if link]
+    refresh_adjacent_posts(neighbours)
+    return affected
@@ -0,0 +1,185 @@
+"""
+Retention and archiving for contact messages
+
+Messages older than CONTACT_RETENTION_DAYS are moved out of ContactModel,
+either into ArchivedContactModel or into gzip-compressed JSONL files under
+CONTACT_ARCHIVE_DIR. Rows move in primary-key order, one batch at a time,
+and every batch is committed on its own, so an interrupted run loses
+nothing and the next run simply continues with the rows that are left:
+
+    table: the archive insert and the delete share one transaction
+    jsonl: the file is named after the batch's first id and written
+        atomically before the rows are deleted; a retried batch starts at
+        the same id and overwrites the same file
+
+A dry run only counts the rows and the bytes of their text fields.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, Length
+from django.utils import timezone
+
+from .dashboard import get_dashboard_counts, invalidate_dashboard_counts
+from .live_updates import publish
+from .models import ArchivedContactModel, ContactModel
+
+
+DESTINATIONS = ('table', 'jsonl')
+ARCHIVE_FIELDS = ('id', 'your_name', 'your_email', 'your_message', 'sended_at')
+
+
+def retention_cutoff(older_than_days=None):
+    if older_than_days is None:
+        older_than_days = settings.CONTACT_RETENTION_DAYS
+    return timezone.now() - timedelta(days=older_than_days)
+
+
+def estimate_bytes(queryset):
+    """Rows and text bytes (name + email + message) in `queryset`"""
+    totals = queryset.aggregate(
+        rows=Count('pk'),
+        bytes=Coalesce(Sum(Length('your_name') + Length('your_email') + Length('your_message')), 0),
+    )
+    return totals['rows'], totals['bytes']
+
+
+# ======================================================================
+# ARCHIVING
+# ======================================================================
+
+class ArchiveReport:
+
+    def __init__(self, destination, cutoff, dry_run):
+        self.destination = destination
+        self.cutoff = cutoff
+        self.dry_run = dry_run
+        self.rows = 0
+        self.bytes = 0
+        self.batches = 0
+        self.files = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def as_dict(self):
+        return {
+            'destination': self.destination,
+            'cutoff': self.cutoff.isoformat(),
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'batches': self.batches,
+            'files': self.files,
+            'elapsed_seconds': round(self.elapsed, 3),
+        }
+
+
+def archive_contacts(older_than_days=None, destination='table', batch_size=1000,
+                     archive_dir=None, dry_run=False, max_batches=None):
+    """
+    Moves expired contact messages out of ContactModel
+
+    Args:
+        older_than_days: retention window (default: CONTACT_RETENTION_DAYS)
+        destination: 'table' (ArchivedContactModel) or 'jsonl' (gzip files)
+        batch_size: rows moved per transaction
+        archive_dir: directory for JSONL files (default: CONTACT_ARCHIVE_DIR)
+        dry_run: only report the rows and bytes that would move
+        max_batches: stop after this many batches (None = until done)
+
+    Returns:
+        ArchiveReport: `bytes` is the text size for table archives and dry
+        runs, and the compressed file size for JSONL archives
+    """
+    if destination not in DESTINATIONS:
+        raise ValueError(f'Unknown archive destination "{destination}"')
+    cutoff = retention_cutoff(older_than_days)
+    report = ArchiveReport(destination, cutoff, dry_run)
+    expired = ContactModel.objects.filter(sended_at__lt=cutoff)
+
+    if dry_run:
+        report.rows, report.bytes = estimate_bytes(expired)
+        return report.finish()
+
+    archive_dir = archive_dir or settings.CONTACT_ARCHIVE_DIR
+    while max_batches is None or report.batches < max_batches:
+        rows = list(expired.order_by('pk').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+        if destination == 'table':
+            report.bytes += _archive_to_table(rows)
+        else:
+            path, size = _archive_to_jsonl(rows, archive_dir)
+            report.files.append(path)
+            report.bytes += size
+        report.rows += len(rows)
+        report.batches += 1
+    if report.rows:
+        invalidate_dashboard_counts()
+        publish('counts', {'values': get_dashboard_counts()})
+    return report.finish()
+
+
+def archive_selected(queryset, batch_size=1000):
+    """
+    Moves the contact messages in `queryset` to the archive table now,
+    regardless of age (bulk "archive" on the contacts page)
+
+    Returns:
+        int: rows moved
+    """
+    moved = 0
+    while True:
+        rows = list(queryset.order_by('pk').values(*ARCHIVE_FIELDS)[:batch_size])
+        if rows:
+            _archive_to_table(rows)
+            moved += len(rows)
+        if len(rows) < batch_size:
+            return moved
+
+
+def _archive_to_table(rows):
+    with transaction.atomic():
+        ArchivedContactModel.objects.bulk_create([
+            ArchivedContactModel(
+                original_id=row['id'], your_name=row['your_name'], your_email=row['your_email'],
+                your_message=row['your_message'], sended_at=row['sended_at'],
+            )
+            for row in rows
+        ])
+        ContactModel.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return sum(len(row['your_name']) + len(row['your_email']) + len(row['your_message']) for row in rows)
+
+
+def _archive_to_jsonl(rows, archive_dir):
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'contacts-{rows[0]["id"]:010d}.jsonl.gz')
+    temporary = path + '.tmp'
+    with gzip.open(temporary, 'wt', encoding='utf-8') as handle:
+        for row in rows:
+            handle.write(json.dumps(row, default=str) + '\n')
+    os.replace(temporary, path)
+    ContactModel.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return path, os.path.getsize(path)
+
+
+# ======================================================================
+# ARCHIVE SEARCH
+# ======================================================================
+
+def search_archived_contacts(query):
+    """Archived messages matching `query` by name or email, newest first"""
+    archived = ArchivedContactModel.objects.order_by('-sended_at')
+    if query:
+        archived = archived.filter(Q(your_name__icontains=query) | Q(your_email__icontains=query))
+    return archived
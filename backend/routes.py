@@ -1,6 +1,4 @@
 from django.urls import path
-from django.conf import settings
-from django.conf.urls.static import static
 from . import views
 
 # ======================================================================
@@ -30,21 +28,32 @@ urlpatterns = [
     # Contact form management
     path('manage-contacts/', views.customer_contact_view, name='customer_contact_view'),
 
+    # Bulk trash/archive/restore/purge posted from the contacts page
+    path('manage-contacts/bulk/', views.contacts_bulk_view, name='contacts_bulk_view'),
+
+    # Message history of one lead (?key=<email key>), loaded on expand
+    path('manage-contacts/messages/', views.lead_messages_view, name='lead_messages_view'),
+
 
     # Manage  Carrier Opition
     path('manage-carriers/', views.manage_carriers, name='manage_carriers'),
 
+    # Server-Sent Events feeding the dashboard and contacts pages
+    path('live-updates/', views.live_updates_view, name='live_updates_view'),
 
-               
-]
+    # ==================== CONTENT IMPORT / EXPORT URLS ====================
+    # Bulk JSONL/CSV import and streaming export (kind: blogs or carriers)
+    path('content/<str:kind>/import/', views.import_content_view, name='import_content_view'),
+    path('content/<str:kind>/export/', views.export_content_view, name='export_content_view'),
+
+    # ==================== MONITORING URLS ====================
+    # Prometheus metrics for this worker (localhost only)
+    path('metrics/', views.metrics_view, name='metrics_view'),
+
+    # Request profiles (staff only) and their downloads
+    path('profiles/', views.profiles_view, name='profiles_view'),
+    path('profiles/<str:profile_id>/<str:kind>/', views.profile_download_view, name='profile_download_view'),
 
-# ======================================================================
-# STATIC AND MEDIA FILES CONFIGURATION
-# ======================================================================
 
-# Serve static and media files during development (when DEBUG is True)
-if settings.DEBUG:
-    # Serve media files (user uploads, images, documents)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    # Serve static files (CSS, JS, images, etc.)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+               
+]
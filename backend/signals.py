@@ -0,0 +1,200 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from royal_paints_website.cdn import queue_purge
+
+from . import leads, live_updates, popularity
+from .content_version import invalidate_content_version
+from .dashboard import invalidate_dashboard_counts
+from .jobs import enqueue
+from .models import (
+    BlogModel, CarrierModel, ContactModel, STATUS_PUBLISHED, STATUS_SCHEDULED, UserEmailModel,
+    normalize_email_key,
+)
+
+
+# ======================================================================
+# USER EMAIL SYNC
+# ======================================================================
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_user_email(sender, instance, update_fields=None, **kwargs):
+    """
+    Mirrors auth_user.email into the indexed UserEmailModel table
+
+    Saves that don't touch the email (e.g. last_login updates) are skipped.
+    If another user already owns the email, the existing owner keeps it and
+    this user's previous address is dropped, so it no longer logs them in.
+    """
+    if update_fields is not None and 'email' not in update_fields:
+        return
+
+    email = normalize_email_key(instance.email)
+    if not email or UserEmailModel.objects.filter(email=email).exclude(user=instance).exists():
+        UserEmailModel.objects.filter(user=instance).delete()
+        return
+    UserEmailModel.objects.update_or_create(user=instance, defaults={'email': email})
+
+
+def _never_public(instance, created):
+    # A new draft or scheduled row: no page or listing has shown it yet
+    return created and instance.status != STATUS_PUBLISHED
+
+
+# ======================================================================
+# BLOG NAVIGATION
+# ======================================================================
+
+@receiver(post_save, sender=BlogModel)
+def refresh_navigation_on_save(sender, instance, created=False, raw=False, **kwargs):
+    """Queues a recompute of the related/adjacent posts affected by a saved blog"""
+    if raw or _never_public(instance, created):
+        return
+    enqueue('refresh_blog_navigation', {'pk': instance.pk})
+
+
+@receiver(post_delete, sender=BlogModel)
+def refresh_navigation_on_delete(sender, instance, **kwargs):
+    if instance.deleted_at:
+        return
+    enqueue('refresh_deleted_blog_navigation', {'pk': instance.pk, 'adjacent_posts': instance.adjacent_posts})
+
+
+# ======================================================================
+# DASHBOARD COUNTS
+# ======================================================================
+# Rows purged from the trash (deleted_at set) were already taken off the
+# counts, pages and navigation when they were trashed (backend.trash), so
+# the post_delete receivers below skip them.
+
+@receiver(post_save, sender=BlogModel)
+@receiver(post_save, sender=CarrierModel)
+@receiver(post_save, sender=ContactModel)
+def invalidate_counts_on_create(sender, created=False, **kwargs):
+    if created:
+        invalidate_dashboard_counts()
+
+
+@receiver(post_delete, sender=BlogModel)
+@receiver(post_delete, sender=CarrierModel)
+def invalidate_counts_on_delete(sender, instance, **kwargs):
+    # No ContactModel receiver: it would stop retention's bulk deletes from
+    # running as a single DELETE; backend.retention invalidates instead
+    if instance.deleted_at:
+        return
+    invalidate_dashboard_counts()
+
+
+# ======================================================================
+# LIVE DASHBOARD UPDATES
+# ======================================================================
+
+DASHBOARD_COUNTERS = {
+    BlogModel: 'total_blogs',
+    CarrierModel: 'total_carriers',
+    ContactModel: 'total_contacts',
+}
+
+
+@receiver(post_save, sender=BlogModel)
+@receiver(post_save, sender=CarrierModel)
+@receiver(post_save, sender=ContactModel)
+def publish_count_on_create(sender, created=False, raw=False, **kwargs):
+    if not created or raw:
+        return
+    delta = {DASHBOARD_COUNTERS[sender]: 1}
+    transaction.on_commit(lambda: live_updates.publish('counts', {'delta': delta}))
+
+
+@receiver(post_delete, sender=BlogModel)
+@receiver(post_delete, sender=CarrierModel)
+def publish_count_on_delete(sender, instance, **kwargs):
+    if instance.deleted_at:
+        return
+    delta = {DASHBOARD_COUNTERS[sender]: -1}
+    transaction.on_commit(lambda: live_updates.publish('counts', {'delta': delta}))
+
+
+@receiver(post_save, sender=ContactModel)
+def publish_new_contact(sender, instance, created=False, raw=False, **kwargs):
+    """Pushes a new contact message to open dashboards, after commit"""
+    if not created or raw:
+        return
+    payload = live_updates.contact_payload(instance)
+    transaction.on_commit(lambda: live_updates.publish('contact', payload))
+
+
+# ======================================================================
+# PUBLIC CONTENT VERSION
+# ======================================================================
+
+@receiver(post_save, sender=BlogModel)
+@receiver(post_save, sender=CarrierModel)
+@receiver(post_delete, sender=BlogModel)
+@receiver(post_delete, sender=CarrierModel)
+def invalidate_content_version_on_change(sender, instance, created=False, **kwargs):
+    # Drops service-worker page caches built from the old content
+    if instance.deleted_at or _never_public(instance, created):
+        return
+    invalidate_content_version()
+
+
+# ======================================================================
+# POPULAR POSTS RANKING
+# ======================================================================
+
+@receiver(post_save, sender=BlogModel)
+@receiver(post_delete, sender=BlogModel)
+def invalidate_popular_on_change(sender, instance, created=False, raw=False, **kwargs):
+    # A post set back to draft (or retitled) mustn't stay in the cached ranking
+    if raw or instance.deleted_at or _never_public(instance, created):
+        return
+    popularity.invalidate_popular_blogs()
+
+
+# ======================================================================
+# SHARED CACHE PURGING
+# ======================================================================
+
+@receiver(post_save, sender=BlogModel)
+@receiver(post_save, sender=CarrierModel)
+@receiver(post_delete, sender=BlogModel)
+@receiver(post_delete, sender=CarrierModel)
+def purge_cached_pages(sender, instance, created=False, raw=False, **kwargs):
+    """Queues a purge of the pages showing the row and of the listings, after commit"""
+    if raw or instance.deleted_at or _never_public(instance, created):
+        return
+    keys = [sender.surrogate_key(instance.pk), sender.SURROGATE_LIST_KEY]
+    transaction.on_commit(lambda: queue_purge(keys))
+
+
+# ======================================================================
+# SCHEDULED PUBLISHING
+# ======================================================================
+
+@receiver(post_save, sender=BlogModel)
+@receiver(post_save, sender=CarrierModel)
+def schedule_publication(sender, instance, raw=False, **kwargs):
+    """
+    Queues the job that publishes the row at its publish_at
+
+    Rescheduling queues another job; one that finds nothing due is a no-op.
+    """
+    if raw or instance.status != STATUS_SCHEDULED:
+        return
+    enqueue('publish_scheduled', run_at=instance.publish_at)
+
+
+# ======================================================================
+# LEADS
+# ======================================================================
+
+@receiver(post_save, sender=ContactModel)
+def count_contact_towards_lead(sender, instance, created=False, raw=False, **kwargs):
+    """Folds a new contact message into its customer's lead"""
+    if not created or raw:
+        return
+    leads.record_contact(instance)
+
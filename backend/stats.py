@@ -0,0 +1,45 @@
+"""
+Latency statistics shared by the job queue, the cache warmer and the
+benchmark suites
+
+Kept free of test and benchmark machinery, so runtime code can import it.
+"""
+import math
+import time
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """
+    Latency percentiles (ms) and throughput for one benchmark run
+
+    Args:
+        latencies: per-request durations in seconds
+        elapsed: wall-clock seconds for the whole run
+    """
+    ordered = sorted(latencies)
+    as_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(ordered),
+        'p50_ms': as_ms(percentile(ordered, 0.50)),
+        'p95_ms': as_ms(percentile(ordered, 0.95)),
+        'p99_ms': as_ms(percentile(ordered, 0.99)),
+        'mean_ms': as_ms(sum(ordered) / len(ordered)) if ordered else None,
+        'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else None,
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.start
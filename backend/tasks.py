@@ -0,0 +1,51 @@
+"""
+Background job handlers run by `manage.py run_workers` (see backend.jobs)
+"""
+from django.core.files.storage import default_storage
+
+from . import notifications, publishing, related_posts, retention, trash
+from .jobs import job
+
+
+@job('delete_media_file')
+def delete_media_file(name):
+    """Removes a replaced or orphaned upload; missing files are ignored"""
+    default_storage.delete(name)
+
+
+@job('refresh_blog_navigation')
+def refresh_blog_navigation(pk):
+    related_posts.refresh_for_saved_blog(pk)
+
+
+@job('refresh_deleted_blog_navigation')
+def refresh_deleted_blog_navigation(pk, adjacent_posts):
+    related_posts.refresh_for_deleted_blog(pk, adjacent_posts)
+
+
+@job('rebuild_related_posts')
+def rebuild_related_posts():
+    related_posts.compute_related_posts()
+
+
+@job('archive_contacts')
+def archive_contacts():
+    retention.archive_contacts()
+
+
+@job('purge_trash')
+def purge_trash(kind=None, pks=None):
+    """A selection from the admin, or everything past TRASH_RETENTION_DAYS"""
+    trash.purge_trash(kind, pks)
+
+
+@job('send_contact_digest')
+def send_contact_digest():
+    """Emails the contact messages not yet notified (JOB_PERIODIC)"""
+    notifications.flush_contact_notifications()
+
+
+@job('publish_scheduled')
+def publish_scheduled():
+    """Queued for each scheduled blog or career at its publish_at"""
+    publishing.publish_due()
@@ -1,3 +1,1347 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import math
+import os
+import smtplib
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core import mail
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from royal_paints_website import cdn, metrics, profiling
+from royal_paints_website.instrumentation import QueryBudgetExceeded
+
+from .benchmarks import current_rss_kb, rss_delta_kb, seed_content
+from .cache_warmer import public_urls, warm_cache
+from . import jobs, live_updates, notifications, popularity, publishing, related_posts, tasks, trash, views
+from .content_io import import_content, iter_export
+from .leads import backfill_leads
+from .content_version import get_content_version
+from .models import (
+    ArchivedContactModel, BlogModel, CarrierModel, ContactModel, JobModel, LeadModel, UserEmailModel,
+)
+from .retention import archive_contacts
+from .stats import summarize
+
+
+# ======================================================================
+# INSTRUMENTATION TESTS
+# ======================================================================
+
+class QueryBudgetTests(TestCase):
+    """
+    Hits every admin route so a view exceeding its @query_budget fails
+    the suite (QUERY_BUDGET_STRICT is on under test)
+    """
+
+    def setUp(self):
+        for index in range(5):
+            BlogModel.objects.create(title=f'Blog {index}', content='Content')
+            CarrierModel.objects.create(
+                carrier_title=f'Carrier {index}', deadline_date='2030-01-01', description='Job'
+            )
+            ContactModel.objects.create(
+                your_name='Visitor', your_email='visitor@example.com', your_message='Hello'
+            )
+        self.user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+
+    def test_admin_pages_stay_within_budget(self):
+        self.client.force_login(self.user)
+        for url in ['/admin/admin-dashboard/', '/admin/manage-blogs/',
+                    '/admin/manage-contacts/', '/admin/manage-carriers/']:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn('Server-Timing', response)
+
+    def test_admin_writes_stay_within_budget(self):
+        self.client.force_login(self.user)
+        blog = BlogModel.objects.first()
+        carrier = CarrierModel.objects.first()
+        writes = [
+            ('/admin/manage-blogs/', {'title': 'Blog 0', 'content': 'Duplicate slug'}),
+            ('/admin/manage-blogs/', {'action': 'delete', 'blog_id': blog.id}),
+            ('/admin/manage-carriers/', {'carrier_title': 'Carrier 9', 'deadline_date': '2030-01-01'}),
+            ('/admin/manage-carriers/', {'action': 'delete', 'carrier_id': carrier.id}),
+        ]
+        for url, data in writes:
+            response = self.client.post(url, data)
+            self.assertRedirects(response, url, fetch_redirect_response=False)
+
+        self.assertEqual(BlogModel.objects.filter(title='Blog 0').count(), 1)
+        self.assertEqual(BlogModel.objects.get(title='Blog 0', content='Duplicate slug').slug, 'blog-0-1')
+        self.assertTrue(BlogModel.all_objects.trashed().filter(pk=blog.pk).exists())
+        self.assertTrue(CarrierModel.objects.filter(carrier_title='Carrier 9').exists())
+        self.assertTrue(CarrierModel.all_objects.trashed().filter(pk=carrier.pk).exists())
+        self.assertRedirects(self.client.get('/admin/logout/'), '/admin/login/', fetch_redirect_response=False)
+
+    @override_settings(QUERY_BUDGETS={'manage_blogs': 1})
+    def test_exceeding_budget_fails(self):
+        self.client.force_login(self.user)
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/admin/manage-blogs/')
+
+    def test_metrics_endpoint(self):
+        metrics.reset_metrics()
+        self.client.get('/blogs/')
+        # Localhost alone isn't enough: behind a proxy every client is
+        self.assertEqual(self.client.get('/admin/metrics/').status_code, 403)
+
+        with self.settings(METRICS_TOKEN='scrape-secret'):
+            response = self.client.get('/admin/metrics/', headers={'Authorization': 'Bearer scrape-secret'})
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'royalpaints_db_queries_count{view="blogs_page"} 1')
+            response = self.client.get('/admin/metrics/', headers={'Authorization': 'Bearer wrong'})
+            self.assertEqual(response.status_code, 403)
+            response = self.client.get(
+                '/admin/metrics/', REMOTE_ADDR='10.0.0.5', headers={'Authorization': 'Bearer scrape-secret'},
+            )
+            self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/admin/metrics/').status_code, 200)
+
+
+# ======================================================================
+# BENCHMARK HELPER TESTS
+# ======================================================================
+
+class BenchmarkHelperTests(TestCase):
+
+    def test_summarize_percentiles(self):
+        summary = summarize([index / 1000 for index in range(1, 101)], elapsed=2.0)
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['p50_ms'], 50.0)
+        self.assertEqual(summary['p99_ms'], 99.0)
+        self.assertEqual(summary['throughput_rps'], 50.0)
+
+    def test_seed_content_assigns_unique_slugs(self):
+        seed_content(blogs=30, carriers=20, contacts=10)
+        self.assertEqual(BlogModel.objects.values('slug').distinct().count(), 30)
+        self.assertEqual(CarrierModel.objects.count(), 20)
+        self.assertEqual(ContactModel.objects.count(), 10)
+
+    def test_routes_suite_covers_every_named_route(self):
+        from .management.commands.benchmark import SKIPPED_ROUTES
+        from baseapp import routes as public_routes
+        from backend import routes as admin_routes
+
+        names = {
+            pattern.name for module in (public_routes, admin_routes) for pattern in module.urlpatterns
+            if getattr(pattern, 'name', None)
+        }
+        with tempfile.TemporaryDirectory() as workdir:
+            output = os.path.join(workdir, 'bench.json')
+            # A fresh process: the suite sets up its own SQLite database
+            subprocess.run(
+                [sys.executable, 'manage.py', 'benchmark', '--volume', '3', '--requests', '1',
+                 '--warmup', '0', '--concurrency', '1', '--output', output],
+                cwd=settings.BASE_DIR, env={**os.environ, 'DB_ENGINE': 'sqlite'},
+                check=True, capture_output=True, timeout=300,
+            )
+            with open(output) as handle:
+                routes = json.load(handle)['routes']
+        self.assertEqual({route['name'] for route in routes}, names - SKIPPED_ROUTES)
+        for route in routes:
+            self.assertEqual((route['name'], route['client']['errors'], route['http']['errors']), (route['name'], 0, 0))
+            self.assertIn('rss_delta_kb', route)
+            self.assertIn('process_peak_rss_kb', route)
+
+    def test_current_rss_is_not_the_process_peak(self):
+        if current_rss_kb() is None:
+            self.skipTest('/proc/self/statm is Linux only')
+        before = current_rss_kb()
+        ballast = b'x' * (64 * 1024 * 1024)
+        grown = current_rss_kb()
+        del ballast
+        self.assertGreater(rss_delta_kb(before, grown), 32 * 1024)
+        self.assertLess(current_rss_kb(), grown)
+
+
+# ======================================================================
+# AUTHENTICATION TESTS
+# ======================================================================
+
+@override_settings(LOGIN_LOCKOUT_ACCOUNT_ATTEMPTS=3, LOGIN_LOCKOUT_IP_ATTEMPTS=10)
+class EmailLoginTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Bootstrap outside the request so query budgets see the steady state
+        views._default_admin_ready = False
+        views.ensure_default_admin()
+        self.user = User.objects.create_user('painter', 'Painter@Example.com', 'secret-pass', is_staff=True)
+
+    def test_email_is_mirrored_normalized(self):
+        self.assertEqual(self.user.login_email.email, 'painter@example.com')
+
+    def test_login_is_case_insensitive(self):
+        response = self.client.post('/admin/login/', {'email': 'PAINTER@example.com', 'password': 'secret-pass'})
+        self.assertRedirects(response, '/admin/admin-dashboard/')
+
+    def test_duplicate_email_keeps_first_owner(self):
+        other = User.objects.create_user('copycat', 'painter@example.com', 'other-pass')
+        self.assertFalse(UserEmailModel.objects.filter(user=other).exists())
+        self.assertEqual(authenticate(email='painter@example.com', password='secret-pass'), self.user)
+
+    def test_changing_to_a_taken_email_drops_the_old_address(self):
+        other = User.objects.create_user('decorator', 'decorator@example.com', 'other-pass')
+        other.email = 'painter@example.com'
+        other.save()
+        self.assertFalse(UserEmailModel.objects.filter(user=other).exists())
+        self.assertIsNone(authenticate(email='decorator@example.com', password='other-pass'))
+        self.assertEqual(authenticate(email='painter@example.com', password='secret-pass'), self.user)
+
+    def test_default_admin_can_log_in(self):
+        response = self.client.post('/admin/login/', {'email': views.DEFAULT_EMAIL, 'password': views.DEFAULT_PASSWORD})
+        self.assertRedirects(response, '/admin/admin-dashboard/')
+
+    def test_lockout_rejects_before_hashing(self):
+        for _ in range(3):
+            self.client.post('/admin/login/', {'email': 'painter@example.com', 'password': 'wrong'})
+
+        with mock.patch.object(User, 'check_password') as check_password, \
+                mock.patch('django.contrib.auth.hashers.make_password') as make_password:
+            response = self.client.post('/admin/login/', {'email': 'painter@example.com', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 429)
+        check_password.assert_not_called()
+        make_password.assert_not_called()
+
+    def test_ip_lockout_covers_unknown_emails(self):
+        for index in range(10):
+            self.client.post('/admin/login/', {'email': f'nobody{index}@example.com', 'password': 'wrong'})
+        response = self.client.post('/admin/login/', {'email': 'painter@example.com', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(BEHIND_TLS_PROXY=True, TRUSTED_PROXY_HEADER='HTTP_X_FORWARDED_FOR', TRUSTED_PROXY_COUNT=1)
+    def test_ip_lockout_behind_proxy_uses_the_forwarded_address(self):
+        for index in range(10):
+            self.client.post(
+                '/admin/login/', {'email': f'nobody{index}@example.com', 'password': 'wrong'},
+                REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR=f'10.9.9.{index}, 203.0.113.7',
+            )
+        # Same proxy, different client: not locked out
+        response = self.client.post(
+            '/admin/login/', {'email': 'painter@example.com', 'password': 'secret-pass'},
+            REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='198.51.100.2',
+        )
+        self.assertRedirects(response, '/admin/admin-dashboard/')
+        self.client.logout()
+        # Forged left-hand entries don't dodge the counter
+        response = self.client.post(
+            '/admin/login/', {'email': 'painter@example.com', 'password': 'secret-pass'},
+            REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='10.1.1.1, 203.0.113.7',
+        )
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(BEHIND_TLS_PROXY=True, TRUSTED_PROXY_HEADER='')
+    def test_lockout_is_per_account_without_a_trusted_header(self):
+        for index in range(10):
+            self.client.post('/admin/login/', {'email': f'nobody{index}@example.com', 'password': 'wrong'})
+        response = self.client.post('/admin/login/', {'email': 'painter@example.com', 'password': 'secret-pass'})
+        self.assertRedirects(response, '/admin/admin-dashboard/')
+
+
+# ======================================================================
+# BLOG POPULARITY TESTS
+# ======================================================================
+
+class BlogPopularityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        popularity._pending_views.clear()
+        self.first = BlogModel.objects.create(title='Choosing Exterior Paint')
+        self.second = BlogModel.objects.create(title='Priming Old Walls')
+
+    def test_views_are_buffered_then_flushed_in_batches(self):
+        for _ in range(3):
+            self.client.post(f'/blogs/{self.second.pk}/view/')
+        self.client.post(f'/blogs/{self.first.pk}/view/')
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.views, 0)
+
+        with self.assertNumQueries(5):  # savepoint, 2 grouped UPDATEs, release, ranking
+            self.assertEqual(popularity.flush_blog_views(), 4)
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.views, 3)
+
+    def test_views_are_counted_by_an_uncached_beacon_not_the_cached_page(self):
+        page = self.client.get(f'/blogs/{self.first.slug}/')
+        self.assertIn('s-maxage', page['Cache-Control'])
+        self.assertContains(page, f'data-view-beacon="/blogs/{self.first.pk}/view/"')
+        self.assertEqual(popularity._pending_views, {})
+
+        beacon = Client(enforce_csrf_checks=True).post(f'/blogs/{self.first.pk}/view/')
+        self.assertEqual(beacon.status_code, 204)
+        self.assertEqual(beacon['Cache-Control'], 'no-store')
+        self.assertNotIn('Surrogate-Key', beacon)
+        self.assertEqual(popularity._pending_views, {self.first.pk: 1})
+        self.assertEqual(self.client.get(f'/blogs/{self.first.pk}/view/').status_code, 405)
+
+    @mock.patch.object(popularity, 'MAX_PENDING_BLOGS', 1)
+    def test_beacons_for_too_many_distinct_blogs_are_dropped(self):
+        popularity.record_blog_view(self.first.pk)
+        popularity.record_blog_view(999999)
+        popularity.record_blog_view(self.first.pk)
+        self.assertEqual(popularity._pending_views, {self.first.pk: 2})
+
+    def test_ranking_is_read_from_cache(self):
+        popularity.record_blog_view(self.first.pk)
+        popularity.record_blog_view(self.second.pk)
+        popularity.record_blog_view(self.second.pk)
+        popularity.flush_blog_views()
+
+        with self.assertNumQueries(0):
+            ranking = popularity.get_popular_blogs()
+        self.assertEqual([blog.pk for blog in ranking], [self.second.pk, self.first.pk])
+
+        response = self.client.get(f'/blogs/{self.first.slug}/')
+        self.assertContains(response, 'Popular Posts')
+
+    def test_newer_views_outweigh_older_ones(self):
+        later = timezone.now() + timedelta(hours=settings.BLOG_POPULARITY_HALF_LIFE_HOURS)
+        self.assertAlmostEqual(popularity.popularity_exponent(later) - popularity.popularity_exponent(), 1, places=3)
+
+    @override_settings(BLOG_POPULARITY_HALF_LIFE_HOURS=1)
+    def test_scores_stay_finite_years_after_the_epoch(self):
+        moment = popularity.POPULARITY_EPOCH + timedelta(days=3650)
+
+        def views_at(moment, blog, count):
+            for _ in range(count):
+                popularity.record_blog_view(blog.pk)
+            with mock.patch('django.utils.timezone.now', return_value=moment):
+                popularity.flush_blog_views()
+
+        views_at(moment, self.first, 3)
+        # Two half-lives later a view weighs 4 of the earlier ones
+        views_at(moment + timedelta(hours=2), self.second, 1)
+        self.assertEqual([blog.pk for blog in popularity.get_popular_blogs()], [self.second.pk, self.first.pk])
+        views_at(moment + timedelta(hours=2), self.first, 2)
+        self.assertEqual([blog.pk for blog in popularity.get_popular_blogs()], [self.first.pk, self.second.pk])
+
+        self.first.refresh_from_db()
+        expected = math.log2(3 + 2 * 4) + popularity.popularity_exponent(moment)
+        self.assertAlmostEqual(self.first.popularity, expected, places=6)
+
+
+# ======================================================================
+# BLOG NAVIGATION TESTS
+# ======================================================================
+
+class RelatedPostsTests(TestCase):
+
+    def create_blog(self, title, content, minutes_ago):
+        blog = BlogModel.objects.create(title=title, content=content)
+        BlogModel.objects.filter(pk=blog.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return blog
+
+    def setUp(self):
+        related_posts.reset_incremental_index()
+        self.exterior = self.create_blog('Exterior paint for monsoon walls', 'Waterproof exterior paint resists monsoon rain.', 30)
+        self.waterproof = self.create_blog('Waterproofing exterior walls', 'Monsoon rain damages exterior walls without waterproof paint.', 20)
+        self.kitchen = self.create_blog('Kitchen cabinet colours', 'Bright cabinet colours for a small kitchen.', 10)
+
+    def test_full_compute(self):
+        self.assertEqual(related_posts.compute_related_posts(), 3)
+        self.exterior.refresh_from_db()
+        self.assertEqual(self.exterior.related_posts[0]['id'], self.waterproof.pk)
+        self.assertNotIn(self.kitchen.pk, [entry['id'] for entry in self.exterior.related_posts])
+        self.assertIsNone(self.exterior.adjacent_posts['previous'])
+        self.assertEqual(self.exterior.adjacent_posts['next']['slug'], self.waterproof.slug)
+
+    def test_save_only_refreshes_affected_posts(self):
+        related_posts.compute_related_posts()
+        cabinets = BlogModel.objects.create(title='Painting kitchen cabinets', content='Cabinet paint for the kitchen.')
+        jobs.run_pending_jobs()
+
+        self.kitchen.refresh_from_db()
+        self.assertEqual(self.kitchen.related_posts[0]['id'], cabinets.pk)
+        self.assertEqual(self.kitchen.adjacent_posts['next']['id'], cabinets.pk)
+        cabinets.refresh_from_db()
+        self.assertEqual(cabinets.adjacent_posts['previous']['id'], self.kitchen.pk)
+
+        cabinets.delete()
+        jobs.run_pending_jobs()
+        self.kitchen.refresh_from_db()
+        self.assertNotIn(cabinets.pk, [entry['id'] for entry in self.kitchen.related_posts])
+        self.assertIsNone(self.kitchen.adjacent_posts['next'])
+
+    def test_incremental_index_scores_like_the_full_index(self):
+        corpus = related_posts._load_corpus()
+        full = related_posts.TfidfIndex(corpus)
+        incremental = related_posts.IncrementalIndex(corpus)
+        expected = {corpus[row][0]: score for row, score in full.similarities(self.exterior.pk).items()}
+        scores = incremental.similarities(self.exterior.pk)
+        self.assertEqual(set(scores), set(expected))
+        for pk, score in expected.items():
+            self.assertAlmostEqual(scores[pk], score, places=9)
+
+    def test_save_only_tokenizes_the_changed_posts(self):
+        jobs.run_pending_jobs()
+        related_posts.compute_related_posts()
+        related_posts._refresh_related(self.kitchen.pk)
+        BlogModel.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+        # A small corpus would otherwise drift past the rebuild threshold
+        with mock.patch.object(related_posts, 'REBUILD_DRIFT', 1), \
+                mock.patch.object(related_posts, 'tokenize', wraps=related_posts.tokenize) as tokenize:
+            cabinets = BlogModel.objects.create(title='Painting kitchen cabinets', content='Cabinet paint for the kitchen.')
+            jobs.run_pending_jobs()
+        self.assertEqual(tokenize.call_count, 2)  # the new post's title and content
+        self.kitchen.refresh_from_db()
+        self.assertEqual(self.kitchen.related_posts[0]['id'], cabinets.pk)
+
+    def test_save_reads_no_other_related_lists(self):
+        related_posts.compute_related_posts()
+        related_posts._refresh_related(self.kitchen.pk)
+        for number in range(20):
+            BlogModel.objects.create(title=f'Ceiling paint {number}', content='Matte ceiling paint.')
+        related_posts.compute_related_posts()
+        related_posts._refresh_related(self.kitchen.pk)
+        BlogModel.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        BlogModel.objects.filter(pk=self.waterproof.pk).update(title='Kitchen cabinets', content='Cabinet colours for a kitchen.')
+
+        # Live pks, the re-read rows, one bulk update: no scan of the table
+        with CaptureQueriesContext(connection) as queries:
+            related_posts._refresh_related(self.waterproof.pk)
+        self.assertEqual(len(queries), 3)
+        self.kitchen.refresh_from_db()
+        self.exterior.refresh_from_db()
+        self.assertEqual(self.kitchen.related_posts[0]['id'], self.waterproof.pk)
+        self.assertNotIn(self.waterproof.pk, [entry['id'] for entry in self.exterior.related_posts])
+
+    def test_detail_page_reads_navigation_with_one_query(self):
+        related_posts.compute_related_posts()
+        cache.set(popularity.POPULAR_BLOGS_CACHE_KEY, [])
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/blogs/{self.exterior.slug}/')
+        self.assertContains(response, 'Related Posts')
+        self.assertContains(response, self.waterproof.title)
+
+
+# ======================================================================
+# CONTENT IMPORT / EXPORT TESTS
+# ======================================================================
+
+class ContentImportExportTests(TestCase):
+
+    def test_jsonl_import_reports_bad_rows_and_assigns_unique_slugs(self):
+        BlogModel.objects.create(title='Colour Trends')
+        stream = io.StringIO(
+            '{"title": "Colour Trends", "content": "2025 edition"}\n'
+            '{"content": "missing title"}\n'
+            'not json\n'
+            '{"title": "Colour Trends", "content": "2026 edition"}\n'
+            '{"title": "Roof Coating", "image": "roof.jpg"}\n'
+        )
+        report = import_content(stream, 'blogs', 'jsonl', batch_size=2)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([error['line'] for error in report.errors], [2, 3, 5])
+        self.assertEqual(
+            sorted(BlogModel.objects.values_list('slug', flat=True)),
+            ['colour-trends', 'colour-trends-1', 'colour-trends-2'],
+        )
+
+    def test_non_string_fields_are_row_errors(self):
+        stream = io.StringIO(
+            '{"title": 123}\n'
+            '{"title": ["a"]}\n'
+            '{"title": "Has image", "image": {"path": "x.jpg"}}\n'
+            '{"title": "Null byte", "image": "x\\u0000.jpg"}\n'
+            '{"title": "Fine"}\n'
+        )
+        with tempfile.TemporaryDirectory() as image_root:
+            report = import_content(stream, 'blogs', 'jsonl', image_root=image_root)
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual([error['line'] for error in report.errors], [1, 2, 3, 4])
+        self.assertIn('title must be a string', report.errors[0]['error'])
+        self.assertIn('image must be a string', report.errors[2]['error'])
+        self.assertEqual(list(BlogModel.objects.values_list('title', flat=True)), ['Fine'])
+
+    def test_csv_import_copies_images_from_local_root(self):
+        with tempfile.TemporaryDirectory() as image_root, tempfile.TemporaryDirectory() as media_root:
+            with open(os.path.join(image_root, 'painter.jpg'), 'wb') as handle:
+                handle.write(b'image-bytes')
+            stream = io.StringIO(
+                'carrier_title,description,deadline_date,carrier_image\n'
+                'Senior Painter,Exterior work,2030-05-01,painter.jpg\n'
+                'Helper,General work,not-a-date,\n'
+                'Escaper,Bad path,2030-05-01,../secret.jpg\n'
+            )
+            with self.settings(MEDIA_ROOT=media_root):
+                report = import_content(stream, 'carriers', 'csv', image_root=image_root)
+                carrier = CarrierModel.objects.get()
+                self.assertTrue(os.path.isfile(carrier.carrier_image.path))
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual(carrier.carrier_title, 'Senior Painter')
+        self.assertEqual(len(report.errors), 2)
+
+    def test_export_round_trip(self):
+        BlogModel.objects.create(title='Primer Basics', content='Always prime.')
+        exported = ''.join(iter_export('blogs', 'jsonl'))
+        self.assertEqual(json.loads(exported)['title'], 'Primer Basics')
+        header = next(iter_export('blogs', 'csv')).splitlines()[0]
+        self.assertEqual(header, 'id,title,content,image,slug,status,publish_at,created_at')
+
+    def test_drafts_and_schedules_survive_an_export_round_trip(self):
+        later = timezone.now() + timedelta(days=3)
+        BlogModel.objects.create(title='Draft Post', status='draft')
+        BlogModel.objects.create(title='Scheduled Post', status='scheduled', publish_at=later)
+        live = BlogModel.objects.create(title='Live Post', status='published', publish_at=timezone.now() - timedelta(days=1))
+        for fmt in ('jsonl', 'csv'):
+            exported = ''.join(iter_export('blogs', fmt))
+            BlogModel.all_objects.all().delete()
+            JobModel.objects.all().delete()
+            report = import_content(io.StringIO(exported), 'blogs', fmt)
+            self.assertEqual((fmt, report.created, report.errors), (fmt, 3, []))
+            rows = {blog.title: blog for blog in BlogModel.objects.all()}
+            self.assertEqual(rows['Draft Post'].status, 'draft')
+            self.assertEqual((rows['Scheduled Post'].status, rows['Scheduled Post'].publish_at), ('scheduled', later))
+            self.assertEqual(rows['Live Post'].publish_at, live.publish_at)
+            self.assertTrue(JobModel.objects.filter(name='publish_scheduled', run_at=later).exists())
+
+    def test_invalid_publication_fields_are_row_errors(self):
+        stream = io.StringIO(
+            '{"title": "A", "status": "live"}\n'
+            '{"title": "B", "status": "scheduled"}\n'
+            '{"title": "C", "status": "scheduled", "publish_at": "next week"}\n'
+        )
+        report = import_content(stream, 'blogs', 'jsonl')
+        self.assertEqual(report.created, 0)
+        self.assertEqual([error['line'] for error in report.errors], [1, 2, 3])
+
+    def test_admin_endpoints(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+        upload = SimpleUploadedFile('blogs.jsonl', b'{"title": "Uploaded Post"}\n{"title": ""}\n')
+        response = self.client.post('/admin/content/blogs/import/', {'file': upload})
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['failed'], 1)
+        # Navigation is rebuilt by a job, not inside the request
+        self.assertTrue(JobModel.objects.filter(name='rebuild_related_posts', status=JobModel.STATUS_PENDING).exists())
+
+        response = self.client.get('/admin/content/blogs/export/?format=csv')
+        self.assertIn('Uploaded Post', b''.join(response.streaming_content).decode())
+
+
+# ======================================================================
+# CONTACT RETENTION TESTS
+# ======================================================================
+
+class ContactRetentionTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        for index, age in enumerate((400, 300, 200, 10)):
+            contact = ContactModel.objects.create(
+                your_name=f'Customer {index}', your_email=f'customer{index}@example.com', your_message='Hello',
+            )
+            # auto_now_add ignores values passed to create()
+            ContactModel.objects.filter(pk=contact.pk).update(sended_at=now - timedelta(days=age))
+
+    def test_dry_run_reports_without_moving(self):
+        report = archive_contacts(older_than_days=180, dry_run=True)
+        self.assertEqual(report.rows, 3)
+        self.assertEqual(report.bytes, 3 * (len('Customer 0') + len('customer0@example.com') + len('Hello')))
+        self.assertEqual(ContactModel.objects.count(), 4)
+
+    def test_table_archive_runs_in_resumable_batches(self):
+        first = archive_contacts(older_than_days=180, batch_size=2, max_batches=1)
+        self.assertEqual((first.rows, first.batches), (2, 1))
+        rest = archive_contacts(older_than_days=180, batch_size=2)
+        self.assertEqual(rest.rows, 1)
+        self.assertEqual(list(ContactModel.objects.values_list('your_name', flat=True)), ['Customer 3'])
+        self.assertEqual(ArchivedContactModel.objects.count(), 3)
+
+    def test_jsonl_archive_writes_compressed_batches(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            report = archive_contacts(older_than_days=180, destination='jsonl', batch_size=2, archive_dir=archive_dir)
+            with gzip.open(report.files[0], 'rt') as handle:
+                rows = [json.loads(line) for line in handle]
+        self.assertEqual(len(report.files), 2)
+        self.assertEqual([row['your_name'] for row in rows], ['Customer 0', 'Customer 1'])
+        self.assertEqual(ContactModel.objects.count(), 1)
+        self.assertFalse(ArchivedContactModel.objects.exists())
+
+    def test_admin_list_searches_archive_only_on_request(self):
+        archive_contacts(older_than_days=180)
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+
+        response = self.client.get('/admin/manage-contacts/messages/', {'key': 'customer0@example.com'})
+        self.assertEqual(response.json()['messages'], [])
+
+        response = self.client.get('/admin/manage-contacts/', {'search': 'customer0', 'archive': '1'})
+        self.assertEqual([contact.your_name for contact in response.context['CustomerContacts']], ['Customer 0'])
+
+
+# ======================================================================
+# LEAD TESTS
+# ======================================================================
+
+class LeadTests(TestCase):
+
+    def contact(self, name, email, days_ago=0):
+        contact = ContactModel.objects.create(your_name=name, your_email=email, your_message=f'Hello from {name}')
+        if days_ago:
+            sent_at = timezone.now() - timedelta(days=days_ago)
+            ContactModel.objects.filter(pk=contact.pk).update(sended_at=sent_at)
+            contact.sended_at = sent_at
+        return contact
+
+    def test_new_messages_are_grouped_by_normalized_email(self):
+        first = self.contact('Ram', ' Ram@Example.com')
+        self.contact('Ram', 'ram@example.com')
+        last = self.contact('Ram Sharma', 'RAM@example.com')
+        self.contact('Sita', 'sita@example.com')
+
+        self.assertEqual(first.email_key, 'ram@example.com')
+        lead = LeadModel.objects.get(email_key='ram@example.com')
+        self.assertEqual((lead.message_count, lead.name, lead.email), (3, 'Ram Sharma', 'RAM@example.com'))
+        self.assertEqual((lead.first_seen, lead.last_seen), (first.sended_at, last.sended_at))
+        self.assertEqual(LeadModel.objects.count(), 2)
+
+    def test_backfill_streams_unkeyed_rows_into_leads_and_is_idempotent(self):
+        oldest = self.contact('Ram', 'ram@example.com', days_ago=30)
+        self.contact('Sita', 'sita@example.com', days_ago=20)
+        newest = self.contact('Ram Sharma', 'Ram@Example.com', days_ago=10)
+        # Rows saved before the key existed
+        ContactModel.objects.update(email_key='')
+        LeadModel.objects.all().delete()
+
+        first = backfill_leads(batch_size=2, max_batches=1)
+        self.assertEqual((first.rows, first.batches, first.leads_created), (2, 1, 2))
+        rest = backfill_leads(batch_size=2)
+        self.assertEqual((rest.rows, rest.leads_created, rest.leads_updated), (1, 0, 1))
+        self.assertEqual(backfill_leads().rows, 0)
+
+        lead = LeadModel.objects.get(email_key='ram@example.com')
+        self.assertEqual((lead.message_count, lead.name), (2, 'Ram Sharma'))
+        self.assertEqual((lead.first_seen, lead.last_seen), (oldest.sended_at, newest.sended_at))
+        self.assertFalse(ContactModel.objects.filter(email_key='').exists())
+
+    def test_backfill_counts_only_the_batch_keys(self):
+        self.contact('Ram', 'ram@example.com')
+        self.contact('Sita', 'sita@example.com')
+        ContactModel.objects.update(email_key='')
+        LeadModel.objects.filter(email_key='sita@example.com').delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            report = backfill_leads()
+        self.assertEqual((report.leads_created, report.leads_updated), (1, 1))
+        counts = [query['sql'] for query in queries if 'COUNT(' in query['sql'] and 'backend_leadmodel' in query['sql']]
+        self.assertTrue(counts)
+        for sql in counts:
+            self.assertIn('WHERE', sql)
+
+    def test_backfill_command_prints_a_report(self):
+        self.contact('Ram', 'ram@example.com')
+        ContactModel.objects.update(email_key='')
+        LeadModel.objects.all().delete()
+        out = io.StringIO()
+        call_command('backfill_leads', '--batch-size', '10', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['rows'], 1)
+        self.assertEqual(LeadModel.objects.get().message_count, 1)
+
+    def test_contacts_page_lists_leads_with_lazy_history(self):
+        self.contact('Ram', 'ram@example.com', days_ago=2)
+        self.contact('Sita', 'sita@example.com', days_ago=1)
+        self.contact('Ram', 'ram@example.com')
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+
+        response = self.client.get('/admin/manage-contacts/')
+        self.assertEqual(
+            [(lead.name, lead.message_count) for lead in response.context['Leads']], [('Ram', 2), ('Sita', 1)]
+        )
+        self.assertContains(response, 'data-lead-key="ram@example.com"')
+
+        response = self.client.get('/admin/manage-contacts/', {'search': 'SITA@'})
+        self.assertEqual([lead.name for lead in response.context['Leads']], ['Sita'])
+
+        history = self.client.get('/admin/manage-contacts/messages/', {'key': 'ram@example.com'}).json()
+        self.assertEqual(len(history['messages']), 2)
+        self.assertGreater(history['messages'][0]['sent_at'], history['messages'][1]['sent_at'])
+
+
+# ======================================================================
+# TRASH AND BULK ACTION TESTS
+# ======================================================================
+
+class TrashTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(self.user)
+
+    def carriers(self, count):
+        return [
+            CarrierModel.objects.create(carrier_title=f'Painter {index}', deadline_date='2030-01-01', description='Job').pk
+            for index in range(count)
+        ]
+
+    def bulk(self, url, action, pks):
+        return self.client.post(url, {'action': 'bulk', 'bulk_action': action, 'selected': pks})
+
+    def test_trashed_blog_leaves_the_popular_ranking(self):
+        blog = BlogModel.objects.create(title='Popular Post')
+        BlogModel.objects.filter(pk=blog.pk).update(views=5, popularity=3)
+        self.assertEqual([post.pk for post in popularity.get_popular_blogs()], [blog.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trash.trash('blogs', [blog.pk])
+        self.assertEqual(popularity.get_popular_blogs(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            trash.restore('blogs', [blog.pk])
+        self.assertEqual([post.pk for post in popularity.get_popular_blogs()], [blog.pk])
+
+    def test_side_effects_only_cover_rows_that_moved(self):
+        already, blog = BlogModel.objects.create(title='Old Post'), BlogModel.objects.create(title='New Post')
+        trash.trash('blogs', [already.pk])
+        JobModel.objects.all().delete()
+        self.assertEqual(trash.trash('blogs', [already.pk, blog.pk]), 1)
+        job = JobModel.objects.get()
+        self.assertEqual((job.name, job.payload['pk']), ('refresh_deleted_blog_navigation', blog.pk))
+
+        live = ContactModel.objects.create(your_name='Ram', your_email='ram@example.com', your_message='Hello')
+        trashed = ContactModel.objects.create(your_name='Ram', your_email='ram@example.com', your_message='Again')
+        trash.trash('contacts', [trashed.pk])
+        self.assertEqual(trash.restore('contacts', [live.pk, trashed.pk]), 1)
+        self.assertEqual(LeadModel.objects.get(email_key='ram@example.com').message_count, 3)
+
+    def test_trashed_rows_are_hidden_until_restored(self):
+        first, second, third = self.carriers(3)
+        career = CarrierModel.objects.get(pk=first)
+        response = self.bulk('/admin/manage-carriers/', 'trash', [first, second])
+        self.assertRedirects(response, '/admin/manage-carriers/')
+
+        self.assertEqual(list(CarrierModel.objects.values_list('pk', flat=True)), [third])
+        self.assertEqual(self.client.get(f'/career/{career.slug}/').status_code, 404)
+        self.assertEqual(self.client.get('/admin/admin-dashboard/').context['total_carriers'], 1)
+        listed = self.client.get('/admin/manage-carriers/', {'trash': '1'}).context['carriers']
+        self.assertEqual(sorted(carrier.pk for carrier in listed), [first, second])
+
+        self.bulk('/admin/manage-carriers/?trash=1', 'restore', [first])
+        self.assertEqual(self.client.get(f'/career/{career.slug}/').status_code, 200)
+        self.assertEqual(self.client.get('/admin/admin-dashboard/').context['total_carriers'], 2)
+
+    def test_bulk_actions_are_single_queries_whatever_the_selection(self):
+        def queries(action, pks):
+            with CaptureQueriesContext(connection) as captured:
+                trash.apply_bulk_action('carriers', action, pks)
+            return len(captured)
+
+        few, many = self.carriers(2), self.carriers(40)
+        self.assertEqual(queries('trash', few), queries('trash', many))
+        self.assertEqual(queries('restore', few), queries('restore', many))
+
+    @override_settings(TRASH_PURGE_BATCH_SIZE=2)
+    def test_purge_job_deletes_selected_rows_and_images_in_batches(self):
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            blogs = [
+                BlogModel.objects.create(title=f'Post {index}', image=SimpleUploadedFile(f'{index}.jpg', b'image'))
+                for index in range(3)
+            ]
+            kept = BlogModel.objects.create(title='Kept in trash')
+            trash.trash('blogs', [blog.pk for blog in blogs] + [kept.pk])
+
+            self.assertEqual(trash.schedule_purge('blogs', [blog.pk for blog in blogs]), 3)
+            jobs.run_pending_jobs()
+            self.assertEqual(list(BlogModel.all_objects.values_list('pk', flat=True)), [kept.pk])
+            self.assertEqual(os.listdir(os.path.join(media_root, 'BlogImages')), [])
+
+    def test_periodic_purge_only_removes_rows_past_retention(self):
+        old, recent, live = self.carriers(3)
+        trash.trash('carriers', [old, recent])
+        CarrierModel.all_objects.filter(pk=old).update(
+            deleted_at=timezone.now() - timedelta(days=settings.TRASH_RETENTION_DAYS + 1)
+        )
+        self.assertEqual(trash.purge_trash(), {'blogs': 0, 'carriers': 1, 'contacts': 0})
+        self.assertEqual(sorted(CarrierModel.all_objects.values_list('pk', flat=True)), [recent, live])
+
+    def test_trashed_slugs_stay_reserved(self):
+        blog = BlogModel.objects.create(title='Fresh Paint')
+        trash.trash('blogs', [blog.pk])
+        self.assertEqual(BlogModel.objects.create(title='Fresh Paint').slug, 'fresh-paint-1')
+
+    def test_customers_are_trashed_restored_and_archived_with_all_their_messages(self):
+        for name, email in [('Ram', 'ram@example.com'), ('Ram', 'RAM@example.com'), ('Sita', 'sita@example.com')]:
+            ContactModel.objects.create(your_name=name, your_email=email, your_message='Hello')
+        ram = LeadModel.objects.get(email_key='ram@example.com')
+        sita = LeadModel.objects.get(email_key='sita@example.com')
+
+        self.bulk('/admin/manage-contacts/bulk/', 'trash', [ram.pk])
+        self.assertEqual(list(LeadModel.objects.values_list('name', flat=True)), ['Sita'])
+        trashed = self.client.get('/admin/manage-contacts/', {'trash': '1'}).context['CustomerContacts']
+        self.assertEqual(len(trashed), 2)
+
+        response = self.bulk('/admin/manage-contacts/bulk/?trash=1', 'restore', [contact.pk for contact in trashed])
+        self.assertRedirects(response, '/admin/manage-contacts/?trash=1')
+        self.assertEqual(LeadModel.objects.get(email_key='ram@example.com').message_count, 2)
+
+        self.bulk('/admin/manage-contacts/bulk/', 'archive', [sita.pk])
+        self.assertEqual(ArchivedContactModel.objects.get().your_name, 'Sita')
+        self.assertEqual(ContactModel.objects.count(), 2)
+        self.assertTrue(LeadModel.objects.filter(pk=sita.pk).exists())
+
+    def test_unknown_actions_and_empty_selections_are_rejected(self):
+        pk, = self.carriers(1)
+        response = self.bulk('/admin/manage-contacts/bulk/', 'purge', [pk])
+        self.assertIn('Unknown action', str(list(response.wsgi_request._messages)[0]))
+        response = self.client.post('/admin/manage-carriers/', {'action': 'bulk', 'bulk_action': 'trash'}, follow=True)
+        self.assertContains(response, 'Select at least one row first.')
+        self.assertEqual(CarrierModel.objects.count(), 1)
+
+
+# ======================================================================
+# SCHEDULED PUBLISHING TESTS
+# ======================================================================
+
+@override_settings(CDN_PURGER='log')
+class PublishingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        cdn.flush_purges()
+        self.user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(self.user)
+
+    def save_blog(self, title, status, publish_at=''):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/admin/manage-blogs/', {
+                'title': title, 'content': 'Body', 'status': status, 'publish_at': publish_at,
+            })
+        return BlogModel.objects.get(title=title)
+
+    def test_drafts_and_scheduled_posts_stay_off_public_pages(self):
+        live = self.save_blog('Live post', 'published')
+        cdn.flush_purges()
+        draft = self.save_blog('Draft post', 'draft')
+        later = timezone.localtime() + timedelta(days=1)
+        scheduled = self.save_blog('Scheduled post', 'scheduled', later.strftime('%Y-%m-%dT%H:%M'))
+
+        self.assertEqual(scheduled.status, 'scheduled')
+        self.assertEqual(scheduled.publish_at, later.replace(second=0, microsecond=0))
+        self.assertEqual(list(self.client.get('/blogs/').context['blogs']), [live])
+        for blog in (draft, scheduled):
+            self.assertEqual(self.client.get(f'/blogs/{blog.slug}/').status_code, 404)
+        self.assertEqual([row[0] for row in related_posts._load_corpus()], [live.pk])
+        # New unpublished posts change no public page
+        self.assertEqual(cdn._pending_keys, set())
+
+    def test_unpublished_post_leaves_the_popular_ranking(self):
+        live = self.save_blog('Live post', 'published')
+        BlogModel.objects.filter(pk=live.pk).update(views=5, popularity=3)
+        self.assertEqual([post.pk for post in popularity.get_popular_blogs()], [live.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/admin/manage-blogs/', {
+                'action': 'update', 'blog_id': live.pk, 'title': 'Live post', 'content': 'Body', 'status': 'draft',
+            })
+        self.assertEqual(BlogModel.objects.get(pk=live.pk).status, 'draft')
+        self.assertEqual(popularity.get_popular_blogs(), [])
+
+    def test_scheduled_posts_go_live_at_publish_at_with_exact_purges(self):
+        publish_at = timezone.now() + timedelta(hours=1)
+        blog = BlogModel.objects.create(title='Spring colours', status='scheduled', publish_at=publish_at)
+        carrier = CarrierModel.objects.create(
+            carrier_title='Painter', deadline_date='2030-01-01', description='Job', status='draft',
+        )
+        queued = JobModel.objects.get(name='publish_scheduled')
+        self.assertEqual(queued.run_at, publish_at)
+        version = get_content_version()
+
+        self.assertEqual(jobs.run_pending_jobs(), 0)
+        self.assertEqual(publishing.publish_due(), {'blogs': 0, 'carriers': 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(publishing.publish_due(publish_at), {'blogs': 1, 'carriers': 0})
+        self.assertEqual(cdn._pending_keys, {f'blog-{blog.pk}', 'blog-list'})
+        self.assertNotEqual(get_content_version(), version)
+        self.assertEqual(self.client.get(f'/blogs/{blog.slug}/').status_code, 200)
+        self.assertEqual(self.client.get(f'/career/{carrier.slug}/').status_code, 404)
+        self.assertTrue(JobModel.objects.filter(name='refresh_blog_navigation', payload={'pk': blog.pk}).exists())
+
+    def test_schedules_in_the_past_publish_now_and_missing_times_are_rejected(self):
+        published = self.save_blog('Overdue post', 'scheduled', '2020-01-01T09:00')
+        self.assertEqual(published.status, 'published')
+        self.assertEqual(self.client.get(f'/blogs/{published.slug}/').status_code, 200)
+
+        response = self.client.post('/admin/manage-blogs/', {
+            'title': 'Undated post', 'status': 'scheduled', 'publish_at': '',
+        }, follow=True)
+        self.assertContains(response, 'Choose a date and time to publish at.')
+        self.assertFalse(BlogModel.objects.filter(title='Undated post').exists())
+
+
+# ======================================================================
+# CONTACT NOTIFICATION TESTS
+# ======================================================================
+
+@override_settings(CONTACT_NOTIFY_RECIPIENTS=['owner@example.com'], CONTACT_NOTIFY_DIGEST_SIZE=2)
+class ContactNotificationTests(TestCase):
+
+    def test_contact_form_leaves_the_message_for_the_digest_job(self):
+        response = self.client.post('/contacts/', {
+            'your_name': 'Asha', 'your_email': 'asha@example.com', 'your_message': 'Quote please',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(JobModel.objects.exists())
+
+        tasks.send_contact_digest()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['owner@example.com'])
+        self.assertEqual(mail.outbox[0].reply_to, ['asha@example.com'])
+        self.assertIn('Quote please', mail.outbox[0].body)
+        self.assertIsNotNone(ContactModel.objects.get().notified_at)
+        self.assertEqual(notifications.flush_contact_notifications(), 0)
+
+    def test_messages_are_sent_as_digests(self):
+        for index in range(3):
+            ContactModel.objects.create(
+                your_name=f'Customer {index}', your_email=f'c{index}@example.com', your_message='Hi',
+            )
+        self.assertEqual(notifications.flush_contact_notifications(), 3)
+        self.assertEqual([message.subject for message in mail.outbox], [
+            '[Royal Paints] 2 new contact messages', '[Royal Paints] 1 new contact message',
+        ])
+
+    def test_failed_sends_are_retried_then_left_for_the_next_run(self):
+        contact = ContactModel.objects.create(your_name='Ravi', your_email='ravi@example.com', your_message='Hi')
+        send = 'django.core.mail.backends.locmem.EmailBackend.send_messages'
+
+        with override_settings(CONTACT_NOTIFY_RETRIES=1):
+            with mock.patch(send, side_effect=smtplib.SMTPServerDisconnected('gone')):
+                with self.assertRaises(smtplib.SMTPServerDisconnected), self.assertLogs('backend.notifications'):
+                    notifications.flush_contact_notifications()
+        contact.refresh_from_db()
+        self.assertIsNone(contact.notified_at)
+
+        with mock.patch(send, side_effect=[smtplib.SMTPServerDisconnected('gone'), 1]) as send_messages:
+            with self.assertLogs('backend.notifications', 'WARNING'):
+                self.assertEqual(notifications.flush_contact_notifications(), 1)
+        self.assertEqual(send_messages.call_count, 2)
+        contact.refresh_from_db()
+        self.assertIsNotNone(contact.notified_at)
+
+    def test_digests_sent_before_a_failure_are_not_repeated(self):
+        for index in range(3):
+            ContactModel.objects.create(
+                your_name=f'Customer {index}', your_email=f'c{index}@example.com', your_message='Hi',
+            )
+        send = 'django.core.mail.backends.locmem.EmailBackend.send_messages'
+        with override_settings(CONTACT_NOTIFY_RETRIES=0):
+            with mock.patch(send, side_effect=[1, smtplib.SMTPServerDisconnected('gone')]):
+                with self.assertRaises(smtplib.SMTPServerDisconnected):
+                    notifications.flush_contact_notifications()
+        self.assertEqual(ContactModel.objects.filter(notified_at__isnull=True).count(), 1)
+        self.assertEqual(notifications.flush_contact_notifications(), 1)
+
+
+# ======================================================================
+# BACKGROUND JOB TESTS
+# ======================================================================
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        jobs.job('test_record')(lambda **payload: self.calls.append(payload))
+        jobs.job('test_fail')(self.fail_job)
+
+    def tearDown(self):
+        jobs._registry.pop('test_record', None)
+        jobs._registry.pop('test_fail', None)
+
+    @staticmethod
+    def fail_job():
+        raise RuntimeError('boom')
+
+    def test_jobs_run_in_order_and_record_timing(self):
+        jobs.enqueue('test_record', {'step': 1})
+        jobs.enqueue('test_record', {'step': 2})
+        later = jobs.enqueue('test_record', {'step': 3}, delay=3600)
+
+        self.assertEqual(jobs.run_pending_jobs(), 2)
+        self.assertEqual(self.calls, [{'step': 1}, {'step': 2}])
+        later.refresh_from_db()
+        self.assertEqual(later.status, JobModel.STATUS_PENDING)
+        done = JobModel.objects.filter(status=JobModel.STATUS_DONE)
+        self.assertEqual(done.count(), 2)
+        self.assertTrue(all(job.duration_ms is not None for job in done))
+        self.assertEqual(jobs.job_stats()['test_record']['done'], 2)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        queued = jobs.enqueue('test_fail', max_attempts=2)
+        with self.assertLogs('backend.jobs', 'WARNING') as logs:
+            self.assertEqual(jobs.run_pending_jobs(), 2)
+        self.assertIn('failed permanently', logs.output[-1])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, JobModel.STATUS_FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertIn('boom', queued.last_error)
+
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        jobs.enqueue('test_record')
+        self.assertEqual(len(jobs.claim_jobs('worker-a', limit=5)), 1)
+        self.assertEqual(jobs.claim_jobs('worker-b', limit=5), [])
+
+        JobModel.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.release_stale_jobs(), 1)
+        self.assertEqual(len(jobs.claim_jobs('worker-b')), 1)
+
+    def test_stale_job_without_attempts_left_is_marked_failed(self):
+        queued = jobs.enqueue('test_record', max_attempts=1)
+        jobs.claim_jobs('worker-a')
+        JobModel.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        with self.assertLogs('backend.jobs', 'ERROR'):
+            self.assertEqual(jobs.release_stale_jobs(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.locked_by), (JobModel.STATUS_FAILED, ''))
+        self.assertIn('lock timed out', queued.last_error)
+        self.assertEqual(jobs.claim_jobs('worker-b'), [])
+
+    def test_outcome_is_not_recorded_once_the_lock_is_lost(self):
+        queued = jobs.enqueue('test_record')
+        # Released as stale and claimed by another worker mid-run
+        jobs.job('test_record')(lambda: JobModel.objects.filter(pk=queued.pk).update(locked_by='worker-b'))
+        claimed, = jobs.claim_jobs('worker-a')
+        self.assertEqual(jobs.heartbeat(queued.pk, 'worker-a'), 1)
+        with self.assertLogs('backend.jobs', 'WARNING') as logs:
+            jobs.run_job(claimed)
+        self.assertIn('lost its lock', logs.output[0])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.locked_by), (JobModel.STATUS_RUNNING, 'worker-b'))
+        self.assertEqual(jobs.heartbeat(queued.pk, 'worker-a'), 0)
+
+    @override_settings(JOB_PERIODIC={'test_record': 60})
+    def test_periodic_jobs_are_scheduled_once(self):
+        self.assertEqual(jobs.schedule_periodic_jobs(), ['test_record'])
+        self.assertEqual(jobs.schedule_periodic_jobs(), [])
+        jobs.run_pending_jobs()
+        jobs.schedule_periodic_jobs()
+        upcoming = JobModel.objects.get(status=JobModel.STATUS_PENDING)
+        self.assertGreater(upcoming.run_at, timezone.now() + timedelta(seconds=50))
+
+    def test_purging_a_trashed_blog_removes_its_image_in_the_background(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            blog = BlogModel.objects.create(
+                title='Wall Art', image=SimpleUploadedFile('wall.jpg', b'image-bytes'),
+            )
+            path = blog.image.path
+            self.client.post('/admin/manage-blogs/', {'action': 'delete', 'blog_id': blog.id})
+            jobs.run_pending_jobs()
+            self.assertTrue(os.path.isfile(path))
+
+            self.client.post('/admin/manage-blogs/?trash=1', {
+                'action': 'bulk', 'bulk_action': 'purge', 'selected': [blog.id],
+            })
+            self.assertTrue(os.path.isfile(path))
+            jobs.run_pending_jobs()
+            self.assertFalse(os.path.isfile(path))
+            self.assertFalse(BlogModel.all_objects.exists())
+
+
+@override_settings(JOB_HEARTBEAT_INTERVAL=0.05)
+class JobHeartbeatTests(TransactionTestCase):
+    """Transactional: the heartbeat thread uses its own DB connection"""
+
+    def setUp(self):
+        self.seen = []
+        jobs.job('test_slow')(self.slow_job)
+
+    def tearDown(self):
+        jobs._registry.pop('test_slow', None)
+
+    def slow_job(self, pk):
+        time.sleep(0.5)
+        self.seen.append(JobModel.objects.get(pk=pk).locked_at)
+
+    def test_running_job_keeps_its_lock_fresh(self):
+        queued = jobs.enqueue('test_slow')
+        queued.payload = {'pk': queued.pk}
+        queued.save()
+        claimed, = jobs.claim_jobs('worker-a')
+        claimed_at = claimed.locked_at
+        jobs.run_job(claimed)
+        self.assertGreater(self.seen[0], claimed_at)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, JobModel.STATUS_DONE)
+
+
+# ======================================================================
+# CACHE WARMING TESTS
+# ======================================================================
+
+class CacheWarmTests(TransactionTestCase):
+    """Transactional: the warmer's threads use their own DB connections"""
+
+    def setUp(self):
+        cache.clear()
+        popularity._pending_views.clear()
+        self.quiet = BlogModel.objects.create(title='Quiet post', content='Body')
+        self.popular = BlogModel.objects.create(title='Popular post', content='Body')
+        BlogModel.objects.filter(pk=self.popular.pk).update(popularity=10)
+        self.carrier = CarrierModel.objects.create(
+            carrier_title='Painter', deadline_date='2030-01-01', description='Job'
+        )
+
+    def test_full_warm_renders_every_public_url_by_priority(self):
+        urls = public_urls()
+        self.assertEqual(urls[0], '/')
+        self.assertIn('/offline/', urls)
+        self.assertLess(urls.index('/blogs/popular-post/'), urls.index('/blogs/quiet-post/'))
+        self.assertEqual(urls[-1], '/career/painter/')
+
+        report = warm_cache(concurrency=3).as_dict()
+        self.assertEqual(report['warmed'], len(urls))
+        self.assertEqual(report['failed'], 0)
+        self.assertIsNotNone(report['throughput_rps'])
+        # Warm-up requests aren't blog views
+        self.assertEqual(popularity._pending_views, {})
+        # The test cache is locmem: warming in-process only fills this process
+        self.assertIn('process-local', report['warnings'][0])
+
+    def test_http_warming_is_the_default_when_a_base_url_is_configured(self):
+        with self.settings(CACHE_WARM_BASE_URL='http://127.0.0.1:9'):
+            report = warm_cache(timeout=2)
+        self.assertEqual(report.mode, 'http')
+        self.assertEqual(report.warnings, [])
+
+    def test_incremental_warm_covers_only_changed_rows(self):
+        warm_cache()
+        self.quiet.content = 'Edited'
+        self.quiet.save()
+        report = warm_cache(incremental=True)
+        self.assertTrue(report.incremental)
+        self.assertEqual(report.as_dict()['warmed'], 3)  # index, blog list, the edited post
+        self.assertEqual(warm_cache(incremental=True).as_dict()['warmed'], 0)
+
+    def test_failures_are_reported(self):
+        report = warm_cache(base_url='http://127.0.0.1:9', timeout=2).as_dict()
+        self.assertEqual(report['warmed'], 0)
+        self.assertEqual(report['failed'], len(public_urls()))
+        self.assertIn('URLError', report['failures'][0]['error'])
+
+
+# ======================================================================
+# LIVE UPDATE TESTS
+# ======================================================================
+
+class LiveUpdatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+
+    def test_changes_publish_contacts_and_count_deltas_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            contact = ContactModel.objects.create(
+                your_name='Visitor', your_email='visitor@example.com', your_message='Hello'
+            )
+            blog = BlogModel.objects.create(title='Post', content='Body')
+        with self.captureOnCommitCallbacks(execute=True):
+            blog.delete()
+
+        events = [(event['type'], event['data']) for event in live_updates.events_since(0)]
+        self.assertEqual(events, [
+            ('counts', {'delta': {'total_contacts': 1}}),
+            ('contact', live_updates.contact_payload(contact)),
+            ('counts', {'delta': {'total_blogs': 1}}),
+            ('counts', {'delta': {'total_blogs': -1}}),
+        ])
+
+    def test_stream_requires_login(self):
+        self.assertEqual(self.client.get('/admin/live-updates/').status_code, 403)
+
+    @override_settings(LIVE_UPDATES_HEARTBEAT_SECONDS=1, LIVE_UPDATES_WSGI_MAX_SECONDS=2)
+    def test_stream_is_sent_incrementally_under_wsgi(self):
+        self.client.force_login(self.staff)
+        missed = live_updates.publish('counts', {'delta': {'total_blogs': 1}})
+        started = time.monotonic()
+        response = self.client.get('/admin/live-updates/', headers={'Last-Event-ID': '0'})
+        stream = iter(response.streaming_content)
+        self.assertEqual(next(stream), b'retry: 3000\n\n')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIn(f'id: {missed["id"]}\nevent: counts\n'.encode(), next(stream))
+
+        publisher = threading.Timer(0.2, live_updates.publish, ['contact', {'id': 1}])
+        publisher.start()
+        self.assertIn(b'event: contact\ndata: {"id":1}', next(stream))
+        publisher.join()
+        # Ends well inside the worker timeout; the browser reconnects
+        self.assertIn(b': keep-alive\n\n', list(stream))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(live_updates.broker.client_count, 0)
+
+    @override_settings(LIVE_UPDATES_HEARTBEAT_SECONDS=1, LIVE_UPDATES_MAX_SECONDS=3)
+    async def test_stream_pushes_live_events_and_replays_missed_ones(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.staff)
+        missed = await sync_to_async(live_updates.publish)('counts', {'delta': {'total_blogs': 1}})
+
+        response = await client.get('/admin/live-updates/', headers={'Last-Event-ID': '0'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertNotIn('Content-Encoding', response)
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        self.assertIn(f'id: {missed["id"]}\nevent: counts\n'.encode(), await anext(stream))
+
+        await sync_to_async(live_updates.publish)('contact', {'id': 1, 'name': 'Visitor'})
+        chunk = await asyncio.wait_for(anext(stream), 5)
+        self.assertIn(b'event: contact\ndata: {"id":1,"name":"Visitor"}', chunk)
+        self.assertEqual(live_updates.broker.client_count, 1)
+
+        # Idle: heartbeats, then the stream ends and the client is released
+        rest = [chunk async for chunk in stream]
+        self.assertIn(b': keep-alive\n\n', rest)
+        self.assertEqual(live_updates.broker.client_count, 0)
+
+    def test_slow_clients_get_one_resync_instead_of_a_backlog(self):
+        async def scenario():
+            with override_settings(LIVE_UPDATES_QUEUE_SIZE=2):
+                subscription = live_updates.broker.subscribe()
+            try:
+                for index in range(1, 6):
+                    live_updates.broker.dispatch({'id': index, 'type': 'counts', 'data': {}})
+                await asyncio.sleep(0)
+                events = []
+                while not subscription.queue.empty():
+                    events.append(subscription.queue.get_nowait())
+                return events
+            finally:
+                live_updates.broker.unsubscribe(subscription)
+
+        events = asyncio.run(scenario())
+        # 1, 2 queued; 3 overflows (backlog -> resync); 4 queued; 5 overflows
+        self.assertEqual([(event['id'], event['type']) for event in events], [(5, 'resync')])
+
+    def test_events_from_other_workers_are_fanned_out_from_the_cache(self):
+        async def scenario():
+            subscription = live_updates.broker.subscribe()
+            try:
+                cache.set(live_updates.SEQUENCE_CACHE_KEY, live_updates.broker._last_seen + 1)
+                event = {'id': live_updates.broker._last_seen + 1, 'type': 'counts', 'data': {}, 'origin': 'other:1'}
+                cache.set(live_updates.EVENT_CACHE_KEY.format(event['id']), event)
+                self.assertEqual(live_updates.broker.poll_once(), 1)
+                return await asyncio.wait_for(subscription.queue.get(), 5)
+            finally:
+                live_updates.broker.unsubscribe(subscription)
+
+        self.assertEqual(asyncio.run(scenario())['origin'], 'other:1')
+
+    def test_expired_events_turn_into_a_resync(self):
+        first = live_updates.publish('counts', {'delta': {'total_blogs': 1}})
+        live_updates.publish('counts', {'delta': {'total_blogs': 1}})
+        cache.delete(live_updates.EVENT_CACHE_KEY.format(first['id']))
+        self.assertEqual([event['type'] for event in live_updates.events_since(0)], ['resync', 'counts'])
+
+
+# ======================================================================
+# PROFILING TESTS
+# ======================================================================
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        profiling.disable_global_profiling()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_override = override_settings(PROFILING_DIR=directory.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.store = profiling.ProfileStore()
+        self.staff = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        BlogModel.objects.create(title='Profiled post', content='Body')
+
+    def test_only_staff_can_profile_a_request(self):
+        self.assertNotIn('X-Profile-Id', self.client.get('/admin/admin-dashboard/?__profile=1'))
+        self.client.force_login(User.objects.create_user('editor', 'editor@example.com', 'secret-pass'))
+        self.assertNotIn('X-Profile-Id', self.client.get('/admin/admin-dashboard/?__profile=1'))
+        self.assertEqual(self.store.list(), [])
+        self.assertEqual(self.client.get('/admin/profiles/').status_code, 302)
+
+    def test_staff_profiles_are_listed_and_downloadable(self):
+        self.client.force_login(self.staff)
+        sampled = self.client.get('/admin/admin-dashboard/?__profile=1')
+        traced = self.client.get('/admin/manage-contacts/?__profile=cprofile')
+        self.assertIn('no-cache', sampled['Cache-Control'])
+
+        listed = {profile['id']: profile for profile in self.store.list()}
+        self.assertEqual(set(listed), {sampled['X-Profile-Id'], traced['X-Profile-Id']})
+        self.assertEqual(listed[traced['X-Profile-Id']]['view'], 'customer_contact_view')
+        self.assertTrue(listed[traced['X-Profile-Id']]['pstats'])
+        self.assertFalse(listed[sampled['X-Profile-Id']]['pstats'])
+
+        page = self.client.get('/admin/profiles/')
+        self.assertContains(page, '/admin/manage-contacts/?__profile=cprofile')
+        stacks = b''.join(self.client.get(f'/admin/profiles/{traced["X-Profile-Id"]}/collapsed/').streaming_content)
+        for line in stacks.decode().splitlines():
+            self.assertRegex(line, r'^\S+(;\S+)* \d+$')
+        pstats = b''.join(self.client.get(f'/admin/profiles/{traced["X-Profile-Id"]}/prof/').streaming_content)
+        self.assertIn(b'customer_contact_view', pstats)
+        self.assertEqual(self.client.get(f'/admin/profiles/{sampled["X-Profile-Id"]}/prof/').status_code, 404)
+
+    def test_sampler_collects_stacks_of_the_profiled_thread(self):
+        def busy_loop():
+            deadline = time.perf_counter() + 0.1
+            while time.perf_counter() < deadline:
+                pass
+
+        sampler = profiling.StackSampler(0.001)
+        sampler.start()
+        busy_loop()
+        sampler.stop()
+        self.assertGreater(sampler.samples, 0)
+        self.assertTrue(any(stack.endswith('tests.py:busy_loop') for stack in sampler.collapsed()))
+
+    def test_global_toggle_profiles_every_request_until_switched_off(self):
+        self.client.force_login(self.staff)
+        self.client.post('/admin/profiles/', {'action': 'enable', 'minutes': 1})
+        self.assertGreater(profiling.global_profiling_until(), 0)
+        self.client.logout()
+        self.assertIn('X-Profile-Id', self.client.get('/blogs/'))
+
+        self.client.force_login(self.staff)
+        self.client.post('/admin/profiles/', {'action': 'disable'})
+        self.assertNotIn('X-Profile-Id', self.client.get('/blogs/'))
+        self.assertEqual(len(self.store.list()), 1)
+
+    def test_store_evicts_least_recently_used_profiles(self):
+        profiler = profiling.StackSampler(0.001)
+        profiler.stacks = {'a.py:main;b.py:work': 3}
+        first = self.store.save(profiler, {'path': '/first/'})
+        second = self.store.save(profiler, {'path': '/second/'})
+        old = os.path.getmtime(self.store.path(second, 'json')) - 60
+        for profile_id in (first, second):
+            for suffix in ('json', 'collapsed'):
+                os.utime(self.store.path(profile_id, suffix), (old, old))
+        self.store.open(first, 'collapsed').close()
+
+        size = sum(os.path.getsize(self.store.path(first, suffix)) for suffix in ('json', 'collapsed'))
+        self.assertEqual(profiling.ProfileStore(max_bytes=size).evict(), [second])
+        self.assertEqual([profile['id'] for profile in self.store.list()], [first])
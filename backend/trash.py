@@ -0,0 +1,241 @@
+"""
+Soft-delete trash and bulk actions for the admin tables
+
+Deleting from the admin only sets deleted_at, with one UPDATE for the
+whole selection; the default managers (models.LiveManager) hide trashed
+rows everywhere else. Restoring clears it again. Rows leave the database
+in the `purge_trash` job, in batches, together with their image files:
+queued for a selection ("Delete forever") and run daily by run_workers
+for rows trashed more than TRASH_RETENTION_DAYS ago.
+
+Set-based updates send no model signals, so the side effects the
+signals take care of for single saves happen here instead: dashboard
+counts, the public content version, CDN purges, the popular posts
+ranking and blog navigation.
+backend.signals ignores the deletes of rows purged from the trash.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from royal_paints_website.cdn import queue_purge
+
+from . import leads, live_updates, popularity
+from .content_version import invalidate_content_version
+from .dashboard import invalidate_dashboard_counts
+from .jobs import enqueue
+from .models import BlogModel, CarrierModel, ContactModel, LeadModel
+from .retention import archive_selected
+
+
+TRASHABLE = {
+    'blogs': BlogModel,
+    'carriers': CarrierModel,
+    'contacts': ContactModel,
+}
+COUNTERS = {
+    'blogs': 'total_blogs',
+    'carriers': 'total_carriers',
+    'contacts': 'total_contacts',
+}
+IMAGE_FIELDS = {
+    'blogs': 'image',
+    'carriers': 'carrier_image',
+}
+
+
+def _visible_rows_changed(kind, pks, delta):
+    """Side effects of rows entering (delta < 0) or leaving the trash"""
+    invalidate_dashboard_counts()
+    counts = {COUNTERS[kind]: delta}
+    transaction.on_commit(lambda: live_updates.publish('counts', {'delta': counts}))
+    if kind not in IMAGE_FIELDS:
+        return
+    model = TRASHABLE[kind]
+    invalidate_content_version()
+    keys = [model.surrogate_key(pk) for pk in pks] + [model.SURROGATE_LIST_KEY]
+    transaction.on_commit(lambda: queue_purge(keys))
+    if kind == 'blogs':
+        popularity.invalidate_popular_blogs()
+
+
+# ======================================================================
+# TRASH AND RESTORE
+# ======================================================================
+
+def trash(kind, pks):
+    """
+    Moves the rows `pks` of `kind` to the trash
+
+    Returns:
+        int: rows moved (rows already in the trash are skipped)
+    """
+    model = TRASHABLE[kind]
+    columns = ('pk', 'adjacent_posts') if kind == 'blogs' else ('pk',)
+    with transaction.atomic():
+        # The side effects below cover the rows moved, not the selection
+        rows = list(model.objects.select_for_update().filter(pk__in=pks).values_list(*columns))
+        pks = [row[0] for row in rows]
+        moved = model.objects.filter(pk__in=pks).trash()
+    if not moved:
+        return 0
+    _visible_rows_changed(kind, pks, -moved)
+    if kind == 'blogs':
+        if len(rows) == 1:
+            pk, adjacent_posts = rows[0]
+            enqueue('refresh_deleted_blog_navigation', {'pk': pk, 'adjacent_posts': adjacent_posts})
+        else:
+            enqueue('rebuild_related_posts')
+    return moved
+
+
+def restore(kind, pks):
+    """
+    Takes the rows `pks` of `kind` out of the trash
+
+    Returns:
+        int: rows restored (rows not in the trash are skipped)
+    """
+    model = TRASHABLE[kind]
+    with transaction.atomic():
+        pks = list(model.all_objects.trashed().select_for_update().filter(pk__in=pks).values_list('pk', flat=True))
+        restored = model.all_objects.filter(pk__in=pks).restore()
+    if not restored:
+        return 0
+    _visible_rows_changed(kind, pks, restored)
+    if kind == 'blogs':
+        if len(pks) == 1:
+            enqueue('refresh_blog_navigation', {'pk': pks[0]})
+        else:
+            enqueue('rebuild_related_posts')
+    elif kind == 'contacts':
+        # Trashing a lead deleted it; the restored messages rebuild it
+        leads.fold_contacts(list(
+            ContactModel.objects.filter(pk__in=pks).values('id', 'your_name', 'your_email', 'sended_at')
+        ))
+    return restored
+
+
+# ======================================================================
+# LEADS (ALL MESSAGES OF A CUSTOMER)
+# ======================================================================
+
+def _lead_contacts(lead_pks):
+    keys = LeadModel.objects.filter(pk__in=lead_pks).values('email_key')
+    return ContactModel.objects.filter(email_key__in=keys)
+
+
+def trash_leads(lead_pks):
+    """Trashes every message of the given leads and drops the leads"""
+    moved = _lead_contacts(lead_pks).trash()
+    LeadModel.objects.filter(pk__in=lead_pks).delete()
+    if moved:
+        _visible_rows_changed('contacts', [], -moved)
+    return moved
+
+
+def archive_leads(lead_pks):
+    """
+    Moves every message of the given leads to the archive table now
+
+    The leads stay: their message_count already includes archived messages.
+    """
+    moved = archive_selected(_lead_contacts(lead_pks))
+    if moved:
+        _visible_rows_changed('contacts', [], -moved)
+    return moved
+
+
+# ======================================================================
+# PURGING
+# ======================================================================
+
+def schedule_purge(kind, pks):
+    """
+    Queues the permanent deletion of the trashed rows among `pks`
+
+    Returns:
+        int: rows that will be purged
+    """
+    pks = list(TRASHABLE[kind].all_objects.trashed().filter(pk__in=pks).values_list('pk', flat=True))
+    if pks:
+        enqueue('purge_trash', {'kind': kind, 'pks': pks})
+    return len(pks)
+
+
+def purge_trash(kind=None, pks=None, older_than_days=None, batch_size=None):
+    """
+    Deletes trashed rows and their image files, one batch at a time
+
+    Args:
+        kind: 'blogs', 'carriers' or 'contacts' (default: all of them)
+        pks: only these rows (default: everything trashed more than
+            older_than_days ago)
+        older_than_days: default TRASH_RETENTION_DAYS when pks is None
+        batch_size: rows per DELETE (default TRASH_PURGE_BATCH_SIZE)
+
+    Returns:
+        dict: rows purged per kind
+    """
+    batch_size = batch_size or settings.TRASH_PURGE_BATCH_SIZE
+    if pks is None and older_than_days is None:
+        older_than_days = settings.TRASH_RETENTION_DAYS
+    purged = {}
+    for name in ([kind] if kind else TRASHABLE):
+        model = TRASHABLE[name]
+        queryset = model.all_objects.trashed()
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        if older_than_days is not None:
+            queryset = queryset.filter(deleted_at__lt=timezone.now() - timedelta(days=older_than_days))
+        image_field = IMAGE_FIELDS.get(name)
+        columns = ('pk', image_field) if image_field else ('pk',)
+
+        purged[name] = 0
+        while True:
+            batch = list(queryset.order_by('pk').values_list(*columns)[:batch_size])
+            if not batch:
+                break
+            model.all_objects.filter(pk__in=[row[0] for row in batch]).delete()
+            # Files go once their rows are gone; missing files are ignored
+            for row in batch:
+                if image_field and row[1]:
+                    default_storage.delete(row[1])
+            purged[name] += len(batch)
+    return purged
+
+
+# ======================================================================
+# BULK ACTIONS
+# ======================================================================
+
+# Actions offered per admin table ('leads': the contacts page, one row
+# per customer; 'contacts': its trash, one row per message)
+BULK_ACTIONS = {
+    'blogs': ('trash', 'restore', 'purge'),
+    'carriers': ('trash', 'restore', 'purge'),
+    'contacts': ('restore', 'purge'),
+    'leads': ('trash', 'archive'),
+}
+
+
+def apply_bulk_action(kind, action, pks):
+    """
+    Runs bulk `action` on the selected rows of table `kind`
+
+    Raises:
+        ValueError: the table has no such action
+
+    Returns:
+        int: rows affected
+    """
+    if action not in BULK_ACTIONS[kind]:
+        raise ValueError(f'Unknown action "{action}"')
+    if kind == 'leads':
+        return trash_leads(pks) if action == 'trash' else archive_leads(pks)
+    if action == 'purge':
+        return schedule_purge(kind, pks)
+    return trash(kind, pks) if action == 'trash' else restore(kind, pks)
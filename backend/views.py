@@ -1,19 +1,54 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
 from django.db import transaction
 from django.db.models import Q
-import os
+from django.utils import timezone
+import datetime
+import hmac
+import io
+import logging
 
-from .models import BlogModel, ContactModel, CarrierModel
+from royal_paints_website.instrumentation import query_budget
+from royal_paints_website.metrics import render_prometheus
+from royal_paints_website.profiling import (
+    ProfileStore, disable_global_profiling, enable_global_profiling, global_profiling_until,
+)
+from .auth_backends import client_ip, is_locked_out
+from .content_io import CONTENT_TYPES, FORMATS, import_content, iter_export
+from .dashboard import get_dashboard_counts
+from .jobs import enqueue
+from .leads import lead_messages
+from .live_updates import broker, event_stream, sync_event_stream
+from . import publishing, trash
+from .models import (
+    BlogModel, ContactModel, CarrierModel, LeadModel, STATUS_DRAFT, STATUS_PUBLISHED, STATUS_SCHEDULED,
+    normalize_email_key,
+)
+from .retention import search_archived_contacts
+
+
+logger = logging.getLogger(__name__)
+
+# Messages shown when a lead is expanded on the contacts page
+LEAD_HISTORY_LIMIT = 100
 
 
 # ======================================================================
 # ERROR HANDLING VIEWS
 # ======================================================================
 
+@query_budget(0)
 def unauthorized_acess(request):    
     """
     Renders unauthorized access error page for users without proper permissions
@@ -31,15 +66,59 @@ def unauthorized_acess(request):
 # AUTHENTICATION VIEWS
 # ======================================================================
 
+# Default admin credentials (hidden from template)
+DEFAULT_EMAIL = 'royalpaints@admin.com'
+DEFAULT_PASSWORD = 'admin@1200'
+DEFAULT_USERNAME = 'admin'
+DEFAULT_FIRST_NAME = 'Admin'
+DEFAULT_LAST_NAME = 'User'
+
+# Set once the default admin has been verified in this process, so the
+# PBKDF2 check below doesn't run on every login page request
+_default_admin_ready = False
+
+
+def ensure_default_admin():
+    """
+    Creates the default admin user if it doesn't exist and resets its
+    email/password to the defaults. Runs once per process.
+    """
+    global _default_admin_ready
+    if _default_admin_ready:
+        return
+
+    with transaction.atomic():
+        admin_user, created = User.objects.get_or_create(
+            username=DEFAULT_USERNAME,
+            defaults={
+                'email': DEFAULT_EMAIL,
+                'first_name': DEFAULT_FIRST_NAME,
+                'last_name': DEFAULT_LAST_NAME,
+                'is_staff': True,
+                'is_superuser': True,
+                'is_active': True,
+            }
+        )
+        
+        # Set password for new user or update existing user's password
+        if created or not admin_user.check_password(DEFAULT_PASSWORD):
+            admin_user.set_password(DEFAULT_PASSWORD)
+            admin_user.email = DEFAULT_EMAIL  # Ensure email is correct
+            admin_user.save()
+
+    _default_admin_ready = True
+
+
+@query_budget(9)
 def login_view(request):
     """
     Simple function-based login view with default admin user
     Default credentials are handled internally
     
     Features:
-    - Creates default admin user if doesn't exist
-    - Handles both admin and regular user authentication
-    - Email-based login with username lookup
+    - Creates default admin user if doesn't exist (once per process)
+    - Email-based login through the indexed EmailBackend
+    - Rejects locked-out accounts/IPs before any password hashing
     - Proper error handling and user feedback
     
     Args:
@@ -49,36 +128,12 @@ def login_view(request):
         HttpResponse: Login template or redirect to dashboard
     """
     
-    # Default admin credentials (hidden from template)
-    DEFAULT_EMAIL = 'royalpaints@admin.com'
-    DEFAULT_PASSWORD = 'admin@1200'
-    DEFAULT_USERNAME = 'admin'
-    DEFAULT_FIRST_NAME = 'Admin'
-    DEFAULT_LAST_NAME = 'User'
-    
     # ==================== Admin User Creation ====================
     # Ensure default admin user exists
     try:
-        with transaction.atomic():
-            admin_user, created = User.objects.get_or_create(
-                username=DEFAULT_USERNAME,
-                defaults={
-                    'email': DEFAULT_EMAIL,
-                    'first_name': DEFAULT_FIRST_NAME,
-                    'last_name': DEFAULT_LAST_NAME,
-                    'is_staff': True,
-                    'is_superuser': True,
-                    'is_active': True,
-                }
-            )
-            
-            # Set password for new user or update existing user's password
-            if created or not admin_user.check_password(DEFAULT_PASSWORD):
-                admin_user.set_password(DEFAULT_PASSWORD)
-                admin_user.email = DEFAULT_EMAIL  # Ensure email is correct
-                admin_user.save()
-                
-    except Exception as e:
+        ensure_default_admin()
+    except Exception:
+        logger.exception('Creating the default admin user failed')
         messages.error(request, 'System error occurred. Please try again.')
         return render(request, 'Admin/login.html')
     
@@ -98,40 +153,26 @@ def login_view(request):
             messages.error(request, 'Please enter both email and password')
             return render(request, 'Admin/login.html')
         
-        # Handle default admin login
-        if email == DEFAULT_EMAIL.lower() and password == DEFAULT_PASSWORD:
-            user = authenticate(request, username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD)
-            if user is not None and user.is_active:
-                login(request, user)
-                messages.success(request, f'Welcome back, {user.first_name}!')
-                return redirect('admin_dashboard')
+        # Reject locked-out attempts before any hashing
+        if is_locked_out(email, client_ip(request)):
+            messages.error(request, 'Too many failed login attempts. Please try again later.')
+            return render(request, 'Admin/login.html', status=429)
         
-        # For other users, find by email
-        try:
-            user_obj = User.objects.get(email__iexact=email)
-            username = user_obj.username
-        except User.DoesNotExist:
-            messages.error(request, 'Invalid email or password')
-            return render(request, 'Admin/login.html')
-        
-        # Authenticate using username and password
-        user = authenticate(request, username=username, password=password)
+        # Authenticate by email (see backend.auth_backends.EmailBackend)
+        user = authenticate(request, email=email, password=password)
         
         if user is not None:
-            if user.is_active:
-                login(request, user)
-                messages.success(request, f'Welcome back, {user.first_name or user.username}!')
-                return redirect('admin_dashboard')
-            else:
-                messages.error(request, 'Your account has been deactivated')
-        else:
-            messages.error(request, 'Invalid email or password')
+            login(request, user)
+            messages.success(request, f'Welcome back, {user.first_name or user.username}!')
+            return redirect('admin_dashboard')
+        messages.error(request, 'Invalid email or password')
     
     # ==================== GET Request Handling ====================
     # Render login page for GET requests or failed login attempts
     return render(request, 'Admin/login.html')
 
 
+@query_budget(4)
 def logout_view(request):
     """
     Handles user logout and redirects to login page
@@ -150,6 +191,7 @@ def logout_view(request):
 # ADMIN DASHBOARD VIEWS
 # ======================================================================
 
+@query_budget(5)
 @login_required(login_url='unauthorized_acess')
 def admin_dashboard(request):
     """
@@ -170,24 +212,85 @@ def admin_dashboard(request):
         messages.error(request, 'Please log in to access the admin dashboard')
         return redirect('login_view')
     
-    # Counts Of Data 
-    total_carriers = CarrierModel.objects.count()
-    total_blogs = BlogModel.objects.count()
-    total_contacts = ContactModel.objects.count()
+    # Counts Of Data (cached, dropped whenever a record is added or removed)
     context = {
         'user': request.user,
         'dashboard_title': 'Admin Dashboard',
-        'total_carriers': total_carriers,
-        'total_blogs': total_blogs,
-        'total_contacts': total_contacts,
+        **get_dashboard_counts(),
     }
     return render(request, 'Admin/AdminDashboard.html', context)
 
 
+# ======================================================================
+# BULK ACTIONS
+# ======================================================================
+
+BULK_ACTION_MESSAGES = {
+    'trash': '{count} {noun} moved to the trash.',
+    'restore': '{count} {noun} restored.',
+    'purge': '{count} {noun} will be deleted permanently.',
+    'archive': '{count} {noun} archived.',
+}
+
+
+def _bulk_action(request, kind, noun, next_url=None):
+    """
+    Applies the bulk action posted from a table's row selection
+
+    Args:
+        request: POST with 'bulk_action' and the 'selected' row ids
+        kind: table name in backend.trash.BULK_ACTIONS
+        noun: plural used in the result message, e.g. 'blogs'
+        next_url: where to go afterwards (default: the posted URL)
+
+    Returns:
+        HttpResponseRedirect: Back to the page (and mode) the form was on
+    """
+    action = request.POST.get('bulk_action', '')
+    pks = [int(pk) for pk in request.POST.getlist('selected') if pk.isdigit()]
+    if not pks:
+        messages.error(request, 'Select at least one row first.')
+    else:
+        try:
+            count = trash.apply_bulk_action(kind, action, pks)
+            messages.success(request, BULK_ACTION_MESSAGES[action].format(count=count, noun=noun))
+        except Exception as e:
+            logger.exception('Bulk action failed', extra={
+                'kind': kind, 'action': action, 'rows': len(pks), 'user_id': request.user.pk,
+            })
+            messages.error(request, f'Error applying "{action}": {str(e)}')
+    return redirect(next_url or request.get_full_path())
+
+
+# ======================================================================
+# PUBLISHING
+# ======================================================================
+
+def _apply_publication(request, item):
+    """
+    Sets status and publish_at of a blog or carrier from the posted form
+
+    Raises:
+        ValueError: unknown status or missing schedule (backend.publishing)
+    """
+    current = (item.status, item.publish_at) if item.pk else None
+    item.status, item.publish_at = publishing.publication(
+        request.POST.get('status', STATUS_PUBLISHED), request.POST.get('publish_at', ''), current,
+    )
+
+
+def _publication_note(item):
+    """'published', 'saved as a draft' or 'scheduled for <time>', for messages"""
+    if item.status == STATUS_SCHEDULED:
+        return f'scheduled for {timezone.localtime(item.publish_at):%b %d, %Y %I:%M %p}'
+    return 'saved as a draft' if item.status == STATUS_DRAFT else 'published'
+
+
 # ======================================================================
 # BLOG MANAGEMENT VIEWS
 # ======================================================================
 
+@query_budget(7)
 @login_required(login_url='unauthorized_acess')
 def manage_blogs(request):
     """
@@ -196,7 +299,9 @@ def manage_blogs(request):
     Features:
     - Create new blogs with title, content, and image
     - Update existing blogs
-    - Delete blogs with file cleanup
+    - Publish now, save as a draft or schedule for later (backend.publishing)
+    - Delete blogs to the trash, one or many at a time (?trash=1 lists
+      the trash, where blogs are restored or deleted for good)
     - Search functionality across title and content
     - Image file management (upload/delete)
     
@@ -212,21 +317,20 @@ def manage_blogs(request):
     if request.method == 'POST':
         action = request.POST.get('action', 'create')
         
+        # ========== Bulk Actions ==========
+        if action == 'bulk':
+            return _bulk_action(request, 'blogs', 'blogs')
+
         # ========== Delete Blog ==========
         if action == 'delete':
-            # Delete blog
+            # Move blog to the trash; the image goes when it is purged
             blog_id = request.POST.get('blog_id')
             try:
                 blog = get_object_or_404(BlogModel, id=blog_id)
-                blog_title = blog.title
-                
-                # Delete image file if exists
-                if blog.image and os.path.isfile(blog.image.path):
-                    os.remove(blog.image.path)
-                
-                blog.delete()
-                messages.success(request, f'Blog "{blog_title}" has been deleted successfully.')
+                trash.trash('blogs', [blog.pk])
+                messages.success(request, f'Blog "{blog.title}" has been moved to the trash.')
             except Exception as e:
+                logger.exception('Deleting blog failed', extra={'blog_id': blog_id, 'user_id': request.user.pk})
                 messages.error(request, f'Error deleting blog: {str(e)}')
         
         # ========== Create/Update Blog ==========
@@ -249,32 +353,45 @@ def manage_blogs(request):
                     
                     blog.title = title
                     blog.content = content
+                    _apply_publication(request, blog)
                     
                     if image:
-                        # Delete old image if exists
-                        if old_image and os.path.isfile(old_image.path):
-                            os.remove(old_image.path)
                         blog.image = image
                     
                     blog.save()  # This will auto-update the slug
-                    messages.success(request, f'Blog "{title}" has been updated successfully.')
+                    
+                    # Delete replaced image in the background
+                    if image and old_image:
+                        enqueue('delete_media_file', {'name': old_image.name})
+                    messages.success(request, f'Blog "{title}" has been updated successfully ({_publication_note(blog)}).')
                 
                 else:  # Create new blog
-                    blog = BlogModel.objects.create(
+                    blog = BlogModel(
                         title=title,
                         content=content,
                         image=image
                     )
-                    messages.success(request, f'Blog "{title}" has been published successfully.')
+                    _apply_publication(request, blog)
+                    blog.save()
+                    messages.success(request, f'Blog "{title}" has been {_publication_note(blog)} successfully.')
             
+            except ValueError as e:
+                messages.error(request, str(e))
             except Exception as e:
+                logger.exception('Saving blog failed', extra={
+                    'blog_id': blog_id or None, 'title': title, 'user_id': request.user.pk,
+                })
                 messages.error(request, f'Error saving blog: {str(e)}')
         
         return redirect('manage_blogs')
     
     # ==================== GET Request Handling ====================
-    # GET request - Display blogs
-    blogs = BlogModel.objects.all()
+    # GET request - Display blogs (or the trash)
+    show_trash = request.GET.get('trash') == '1'
+    if show_trash:
+        blogs = BlogModel.all_objects.trashed().order_by('-deleted_at')
+    else:
+        blogs = BlogModel.objects.all()
     
     # Search functionality
     if search_query:
@@ -286,6 +403,8 @@ def manage_blogs(request):
     context = {
         'blogs': blogs,
         'search_query': search_query,
+        'show_trash': show_trash,
+        'trash_retention_days': settings.TRASH_RETENTION_DAYS,
     }
     
     return render(request, 'Admin/ManageBlogs.html', context)
@@ -295,29 +414,118 @@ def manage_blogs(request):
 # ======================================================================
 # CUSTOMER CONTACT VIEWS
 # ======================================================================
+@query_budget(3)
 @login_required(login_url='unauthorized_acess')
+@require_GET
 def customer_contact_view(request):
+    """
+    Lists customers who sent contact messages, most recent first
+
+    Features:
+    - One row per lead (messages grouped by normalized email) with its
+      message count and first/last contact time; the messages themselves
+      are loaded on expand from lead_messages_view
+    - Bulk trash or archive of all messages of the selected customers,
+      posted to contacts_bulk_view
+    - Search across name and email (email-like queries use the indexed key)
+    - Archive search as a separate opt-in (?archive=1), listing the
+      archived messages one by one
+    - Trash (?trash=1): trashed messages, restored or deleted for good
+
+    Args:
+        request: HTTP request object
+
+    Returns:
+        HttpResponse: Contact management template with lead or message list
+    """
     search_query = request.GET.get('search', '')
-    CustomerContacts = ContactModel.objects.all()
-    if search_query:
-        CustomerContacts = CustomerContacts.filter(
-            Q(your_name__icontains=search_query) | 
-            Q(your_email__icontains=search_query)
-        )
+    show_archive = request.GET.get('archive') == '1'
+    show_trash = request.GET.get('trash') == '1'
+
+    Leads = CustomerContacts = None
+    if show_archive:
+        CustomerContacts = search_archived_contacts(search_query)
+    elif show_trash:
+        CustomerContacts = ContactModel.all_objects.trashed().order_by('-deleted_at')
+        if search_query:
+            CustomerContacts = CustomerContacts.filter(
+                Q(your_name__icontains=search_query) |
+                Q(your_email__icontains=search_query)
+            )
+    else:
+        Leads = LeadModel.objects.order_by('-last_seen')
+        if '@' in search_query:
+            Leads = Leads.filter(email_key__startswith=normalize_email_key(search_query))
+        elif search_query:
+            Leads = Leads.filter(
+                Q(name__icontains=search_query) |
+                Q(email__icontains=search_query)
+            )
     context = {
+        'Leads': Leads,
         'CustomerContacts': CustomerContacts,
-        'search_query': search_query
+        'search_query': search_query,
+        'show_archive': show_archive,
+        'show_trash': show_trash,
+        'trash_retention_days': settings.TRASH_RETENTION_DAYS,
     }
     return render(request, 'Admin/ManageContacts.html', context)
 
 
+# Restoring messages re-folds them into their leads in one transaction
+@query_budget(13)
+@login_required(login_url='unauthorized_acess')
+@require_POST
+def contacts_bulk_view(request):
+    """
+    Bulk actions from the contacts page's row selection
+
+    Features:
+    - Trash or archive every message of the selected customers (leads)
+    - With ?trash=1, restore or delete for good the selected messages
 
+    Args:
+        request: POST with 'bulk_action' and the 'selected' row ids
+
+    Returns:
+        HttpResponseRedirect: Back to the contacts page (or its trash)
+    """
+    show_trash = request.GET.get('trash') == '1'
+    next_url = reverse('customer_contact_view') + ('?trash=1' if show_trash else '')
+    return _bulk_action(request, 'contacts' if show_trash else 'leads', 'messages', next_url)
+
+
+@query_budget(3)
+@login_required(login_url='unauthorized_acess')
+def lead_messages_view(request):
+    """
+    Message history of one lead, for the expandable rows of the contacts page
+
+    Args:
+        request: HTTP request object with ?key=<lead email key>
+
+    Returns:
+        JsonResponse: The lead's messages still in ContactModel, newest first
+    """
+    key = request.GET.get('key', '')
+    history = [
+        {
+            'id': contact.pk,
+            'name': contact.your_name,
+            'email': contact.your_email,
+            'message': contact.your_message,
+            'sent_at': contact.sended_at.isoformat(),
+        }
+        for contact in lead_messages(key, LEAD_HISTORY_LIMIT)
+    ] if key else []
+    return JsonResponse({'messages': history, 'limit': LEAD_HISTORY_LIMIT})
 
 
 # ======================================================================
 # CARRIER MANAGEMENT VIEWS
 # ======================================================================
 
+@query_budget(7)
 @login_required(login_url='unauthorized_acess')
 def manage_carriers(request):
     """
@@ -326,7 +534,9 @@ def manage_carriers(request):
     Features:
     - Create new carriers with title, description, deadline, and image
     - Update existing carriers
-    - Delete carriers with file cleanup
+    - Publish now, save as a draft or schedule for later (backend.publishing)
+    - Delete carriers to the trash, one or many at a time (?trash=1
+      lists the trash, where carriers are restored or deleted for good)
     - Search functionality across title and description
     - Image file management (upload/delete)
     
@@ -342,20 +552,20 @@ def manage_carriers(request):
     if request.method == 'POST':
         action = request.POST.get('action', 'create')
         
+        # ========== Bulk Actions ==========
+        if action == 'bulk':
+            return _bulk_action(request, 'carriers', 'carriers')
+
         # ========== Delete Carrier ==========
         if action == 'delete':
+            # Move carrier to the trash; the image goes when it is purged
             carrier_id = request.POST.get('carrier_id')
             try:
                 carrier = get_object_or_404(CarrierModel, id=carrier_id)
-                carrier_title = carrier.carrier_title
-                
-                # Delete image file if exists
-                if carrier.carrier_image and os.path.isfile(carrier.carrier_image.path):
-                    os.remove(carrier.carrier_image.path)
-                
-                carrier.delete()
-                messages.success(request, f'Carrier "{carrier_title}" has been deleted successfully.')
+                trash.trash('carriers', [carrier.pk])
+                messages.success(request, f'Carrier "{carrier.carrier_title}" has been moved to the trash.')
             except Exception as e:
+                logger.exception('Deleting carrier failed', extra={'carrier_id': carrier_id, 'user_id': request.user.pk})
                 messages.error(request, f'Error deleting carrier: {str(e)}')
         
         # ========== Create/Update Carrier ==========
@@ -383,33 +593,46 @@ def manage_carriers(request):
                     carrier.carrier_title = carrier_title
                     carrier.description = description
                     carrier.deadline_date = deadline_date
+                    _apply_publication(request, carrier)
                     
                     if carrier_image:
-                        # Delete old image if exists
-                        if old_image and os.path.isfile(old_image.path):
-                            os.remove(old_image.path)
                         carrier.carrier_image = carrier_image
                     
                     carrier.save()
-                    messages.success(request, f'Carrier "{carrier_title}" has been updated successfully.')
+                    
+                    # Delete replaced image in the background
+                    if carrier_image and old_image:
+                        enqueue('delete_media_file', {'name': old_image.name})
+                    messages.success(request, f'Carrier "{carrier_title}" has been updated successfully ({_publication_note(carrier)}).')
                 
                 else:  # Create new carrier
-                    carrier = CarrierModel.objects.create(
+                    carrier = CarrierModel(
                         carrier_title=carrier_title,
                         description=description,
                         deadline_date=deadline_date,
                         carrier_image=carrier_image
                     )
-                    messages.success(request, f'Carrier "{carrier_title}" has been created successfully.')
+                    _apply_publication(request, carrier)
+                    carrier.save()
+                    messages.success(request, f'Carrier "{carrier_title}" has been created successfully ({_publication_note(carrier)}).')
             
+            except ValueError as e:
+                messages.error(request, str(e))
             except Exception as e:
+                logger.exception('Saving carrier failed', extra={
+                    'carrier_id': carrier_id or None, 'title': carrier_title, 'user_id': request.user.pk,
+                })
                 messages.error(request, f'Error saving carrier: {str(e)}')
         
         return redirect('manage_carriers')
     
     # ==================== GET Request Handling ====================
-    # GET request - Display carriers
-    carriers = CarrierModel.objects.all().order_by('-created_at')
+    # GET request - Display carriers (or the trash)
+    show_trash = request.GET.get('trash') == '1'
+    if show_trash:
+        carriers = CarrierModel.all_objects.trashed().order_by('-deleted_at')
+    else:
+        carriers = CarrierModel.objects.all().order_by('-created_at')
     
     # Search functionality
     if search_query:
@@ -421,6 +644,220 @@ def manage_carriers(request):
     context = {
         'carriers': carriers,
         'search_query': search_query,
+        'show_trash': show_trash,
+        'trash_retention_days': settings.TRASH_RETENTION_DAYS,
     }
     
-    return render(request, 'Admin/ManageCarriers.html', context)
\ No newline at end of file
+    return render(request, 'Admin/ManageCarriers.html', context)
+
+
+
+# ======================================================================
+# CONTENT IMPORT / EXPORT VIEWS
+# ======================================================================
+
+@login_required(login_url='unauthorized_acess')
+@require_POST
+def import_content_view(request, kind):
+    """
+    Bulk-imports blogs or carriers from an uploaded JSONL/CSV file
+    
+    Features:
+    - Streams the upload row by row with per-row validation
+    - Unique slugs assigned in memory, rows inserted in batches
+    - Image paths resolved against CONTENT_IMPORT_IMAGE_ROOT
+    - Invalid rows are reported without aborting the import
+    
+    Args:
+        request: HTTP request object (multipart with 'file', optional 'format')
+        kind: 'blogs' or 'carriers'
+        
+    Returns:
+        JsonResponse: Import report with created/failed counts and row errors
+    """
+    if kind not in CONTENT_TYPES:
+        raise Http404('Unknown content type')
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'Upload a JSONL or CSV file as "file".'}, status=400)
+    fmt = request.POST.get('format') or ('csv' if upload.name.endswith('.csv') else 'jsonl')
+    if fmt not in FORMATS:
+        return JsonResponse({'error': f'Unsupported format "{fmt}".'}, status=400)
+
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+    report = import_content(stream, kind, fmt, image_root=settings.CONTENT_IMPORT_IMAGE_ROOT)
+    return JsonResponse(report.as_dict())
+
+
+@login_required(login_url='unauthorized_acess')
+def export_content_view(request, kind):
+    """
+    Streams all blogs or carriers as a JSONL (default) or CSV download
+    
+    Args:
+        request: HTTP request object (?format=jsonl|csv)
+        kind: 'blogs' or 'carriers'
+        
+    Returns:
+        StreamingHttpResponse: Export file
+    """
+    if kind not in CONTENT_TYPES:
+        raise Http404('Unknown content type')
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        fmt = 'jsonl'
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(iter_export(kind, fmt), content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
+# ======================================================================
+# MONITORING VIEWS
+# ======================================================================
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint with this worker's request histograms
+    
+    Features:
+    - Request latency, DB time, query count and template time per view
+    - Needs a staff session or `Authorization: Bearer <METRICS_TOKEN>`
+    - And, when METRICS_ALLOWED_IPS is set, a client address from it
+    
+    Args:
+        request: HTTP request object
+        
+    Returns:
+        HttpResponse: Metrics in the Prometheus text exposition format
+    """
+    allowed_ips = settings.METRICS_ALLOWED_IPS
+    if allowed_ips and request.META.get('REMOTE_ADDR') not in allowed_ips:
+        return HttpResponseForbidden()
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    has_token = bool(token) and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
+    if not has_token and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ======================================================================
+# LIVE UPDATE VIEWS
+# ======================================================================
+
+@query_budget(2)
+async def live_updates_view(request):
+    """
+    Server-Sent Events stream of new contacts and record count changes
+    
+    Features:
+    - Pushes "contact", "counts" and "resync" events to open dashboards
+      (see backend.live_updates); no polling or page reloads
+    - Replays missed events to clients reconnecting with Last-Event-ID
+    - Heartbeats keep proxies from closing idle streams; streams end after
+      LIVE_UPDATES_MAX_SECONDS and the browser reconnects
+    - Under WSGI, a sync stream that ends after LIVE_UPDATES_WSGI_MAX_SECONDS
+      (an async one would only be sent once it finished)
+    - 503 with Retry-After once this worker serves LIVE_UPDATES_MAX_CLIENTS
+    
+    Args:
+        request: HTTP request object
+        
+    Returns:
+        StreamingHttpResponse: text/event-stream
+    """
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return HttpResponseForbidden()
+    if broker.client_count >= settings.LIVE_UPDATES_MAX_CLIENTS:
+        response = HttpResponse('Too many live dashboards open', status=503)
+        response['Retry-After'] = '30'
+        return response
+
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+    stream = event_stream if isinstance(request, ASGIRequest) else sync_event_stream
+    response = StreamingHttpResponse(stream(last_event_id), content_type='text/event-stream')
+    # no-transform keeps CompressionMiddleware (and proxies) from buffering
+    response['Cache-Control'] = 'no-cache, no-transform'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ======================================================================
+# PROFILING VIEWS
+# ======================================================================
+
+staff_required = user_passes_test(lambda user: user.is_active and user.is_staff, login_url='unauthorized_acess')
+
+PROFILE_DOWNLOADS = {
+    'collapsed': 'text/plain; charset=utf-8',
+    'prof': 'application/octet-stream',
+}
+
+
+@staff_required
+def profiles_view(request):
+    """
+    Lists recent request profiles and controls the global profiling toggle
+    
+    Features:
+    - Newest first, with path, view, status, duration and sample count
+    - Collapsed-stack (flamegraph) and pstats downloads per profile
+    - POST action=enable&minutes=N profiles every request for N minutes
+      (capped by PROFILING_TOGGLE_MAX_SECONDS); action=disable stops it
+    
+    Args:
+        request: HTTP request object
+        
+    Returns:
+        HttpResponse: Profiles template
+    """
+    if request.method == 'POST':
+        if request.POST.get('action') == 'enable':
+            try:
+                minutes = max(int(request.POST.get('minutes', 5)), 1)
+            except ValueError:
+                minutes = 5
+            enable_global_profiling(minutes * 60)
+            messages.success(request, 'Profiling every request until the toggle expires.')
+        else:
+            disable_global_profiling()
+            messages.success(request, 'Global profiling switched off.')
+        return redirect('profiles_view')
+
+    profiles = ProfileStore().list()
+    for profile in profiles:
+        profile['created'] = datetime.datetime.fromtimestamp(profile['created_at'], datetime.timezone.utc)
+    until = global_profiling_until()
+    context = {
+        'profiles': profiles,
+        'profiling_until': datetime.datetime.fromtimestamp(until, datetime.timezone.utc) if until else None,
+        'max_minutes': settings.PROFILING_TOGGLE_MAX_SECONDS // 60,
+    }
+    return render(request, 'Admin/Profiles.html', context)
+
+
+@staff_required
+def profile_download_view(request, profile_id, kind):
+    """
+    Downloads one profile as collapsed stacks or a pstats dump
+    
+    Args:
+        request: HTTP request object
+        profile_id: id from the profiles list
+        kind: 'collapsed' or 'prof'
+        
+    Returns:
+        FileResponse: Profile file as an attachment
+    """
+    if kind not in PROFILE_DOWNLOADS:
+        raise Http404('Unknown profile format')
+    try:
+        handle = ProfileStore().open(profile_id, kind)
+    except FileNotFoundError:
+        raise Http404('Profile not found (it may have been evicted)')
+    return FileResponse(
+        handle, as_attachment=True, filename=f'{profile_id}.{kind}', content_type=PROFILE_DOWNLOADS[kind],
+    )
@@ -1,6 +1,4 @@
 from django.urls import path
-from django.conf import settings
-from django.conf.urls.static import static
 from . import views
 
 # ======================================================================
@@ -19,6 +17,9 @@ urlpatterns = [
     # Example: /blogs/my-blog-post-title/
     path('blogs/<slug:slug>/', views.blog_detail, name='blog_detail'),
 
+    # View counter posted by the (shared-cached) blog page
+    path('blogs/<int:pk>/view/', views.blog_view_beacon, name='blog_view_beacon'),
+
 
     path('careers/', views.carriers_page, name='carriers_page'),
     path('career/<slug:slug>/', views.carrier_detail, name='carrier_detail'),
@@ -32,15 +33,9 @@ urlpatterns = [
 
     # Contacts page - Company/organization contact information
     path('contacts/', views.contacts_page, name='contacts_page'),
-]
-
-# ======================================================================
-# STATIC AND MEDIA FILES CONFIGURATION
-# ======================================================================
 
-# Serve static and media files during development (when DEBUG is True)
-if settings.DEBUG:
-    # Serve media files (user uploads, blog images, documents)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    # Serve static files (CSS, JS, fonts, static images)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+    # ==================== SERVICE WORKER URLS ====================
+    # Served from the root so the worker's scope covers the whole site
+    path('service-worker.js', views.service_worker, name='service_worker'),
+    path('offline/', views.offline_page, name='offline_page'),
+]
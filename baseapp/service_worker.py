@@ -0,0 +1,51 @@
+"""
+Inputs of the generated service worker (see views.service_worker)
+
+- precache_urls(): static files matching SERVICE_WORKER_PRECACHE. With
+  ManifestStaticFilesStorage the paths come from staticfiles.json and the
+  URLs are the hashed names; otherwise the static finders are searched.
+- static_version(): changes whenever a precached file does, which makes
+  the browser install the new worker and rebuild the static cache
+"""
+import fnmatch
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.templatetags.static import static
+
+
+def uses_hashed_static():
+    return isinstance(staticfiles_storage, ManifestFilesMixin)
+
+
+def _static_paths():
+    if uses_hashed_static():
+        return set(staticfiles_storage.hashed_files)
+    return {path for finder in finders.get_finders() for path, _ in finder.list([])}
+
+
+@lru_cache(maxsize=None)
+def _precache():
+    paths = sorted(
+        path for path in _static_paths()
+        if any(fnmatch.fnmatch(path, pattern) for pattern in settings.SERVICE_WORKER_PRECACHE)
+    )
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(static(path).encode())
+        if not uses_hashed_static():
+            # Unhashed URLs don't change with the file, its content does
+            with open(finders.find(path), 'rb') as handle:
+                digest.update(handle.read())
+    return [static(path) for path in paths], digest.hexdigest()[:12]
+
+
+def precache_urls():
+    return _precache()[0]
+
+
+def static_version():
+    return _precache()[1]
@@ -0,0 +1,35 @@
+import json
+
+from django import template
+from django.conf import settings
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+
+register = template.Library()
+
+# Links marked data-prefetch are prefetched; static/Assests/js/site/prefetch.js
+# uses the same selector as a hover fallback where speculation rules aren't supported
+PREFETCH_SELECTOR = 'a[data-prefetch]'
+
+
+@register.simple_tag
+def speculation_rules():
+    """
+    Speculation rules prefetching the blog and career detail pages linked
+    with data-prefetch, at PREFETCH_EAGERNESS
+
+    Usage:
+        {% load resource_hints %}
+        {% speculation_rules %}
+    """
+    if not settings.PREFETCH_EAGERNESS:
+        return ''
+    rules = {
+        'prefetch': [{
+            'source': 'document',
+            'where': {'selector_matches': PREFETCH_SELECTOR},
+            'eagerness': settings.PREFETCH_EAGERNESS,
+        }],
+    }
+    return format_html('<script type="speculationrules">{}</script>', mark_safe(json.dumps(rules)))
@@ -1,3 +1,492 @@
-from django.test import TestCase
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from backend.models import BlogModel, CarrierModel, ContactModel
+from royal_paints_website import cdn, logs
+from royal_paints_website.compression import available_encodings, choose_encoding, compress_bytes, get_compressor
+from royal_paints_website.db import routers
+from royal_paints_website.db.middleware import ReplicaRoutingMiddleware
+from royal_paints_website.db.routers import PrimaryReplicaRouter, read_from_replicas
+from royal_paints_website.html_minify import minify_html
+from royal_paints_website.preload import EarlyHintsMiddleware, add_image_hints
+from royal_paints_website.warmup import warm_up
+
+
+# ======================================================================
+# DATABASE ROUTING TESTS
+# ======================================================================
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTests(TestCase):
+    """
+    'default' and 'replica_1' are two independent SQLite databases, so a
+    row only present on one of them shows which database served a read.
+    """
+
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        BlogModel.objects.create(title='Primary Only Post')
+        BlogModel.objects.using('replica_1').create(title='Replica Only Post')
+
+    def tearDown(self):
+        routers.mark_replica_healthy('replica_1')
+
+    def test_reads_default_to_primary(self):
+        self.assertEqual(self.router.db_for_read(BlogModel), 'default')
+
+    def test_replica_reads_only_inside_block(self):
+        with read_from_replicas():
+            self.assertEqual(self.router.db_for_read(BlogModel), 'replica_1')
+            self.assertEqual(self.router.db_for_write(BlogModel), 'default')
+        self.assertEqual(self.router.db_for_read(BlogModel), 'default')
+
+    def test_public_get_views_read_from_replica(self):
+        response = self.client.get('/blogs/')
+        self.assertContains(response, 'Replica Only Post')
+        self.assertNotContains(response, 'Primary Only Post')
+        self.assertEqual(routers.get_read_target(), routers.PRIMARY)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        routers.mark_replica_unhealthy('replica_1')
+        response = self.client.get('/blogs/')
+        self.assertContains(response, 'Primary Only Post')
+
+    @override_settings(DATABASE_REPLICA_WEIGHTS={'replica_1': 0})
+    def test_zero_weight_replica_is_out_of_rotation(self):
+        self.assertEqual(self.router.choose_replica(), 'default')
+        response = self.client.get('/blogs/')
+        self.assertContains(response, 'Primary Only Post')
+
+    def test_admin_write_pins_session_to_primary(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+
+        response = self.client.post('/admin/manage-blogs/', {'title': 'Fresh Post', 'content': 'New'})
+        self.assertIn(ReplicaRoutingMiddleware.PIN_COOKIE, response.cookies)
+
+        response = self.client.get('/blogs/')
+        self.assertContains(response, 'Fresh Post')
+
+
+# ======================================================================
+# SESSION USAGE TESTS
+# ======================================================================
+
+class PublicPagesSessionTests(TestCase):
+
+    def setUp(self):
+        blog = BlogModel.objects.create(title='Session Test Post', content='Body')
+        carrier = CarrierModel.objects.create(
+            carrier_title='Painter', deadline_date='2030-01-01', description='Job'
+        )
+        self.urls = [
+            '/', '/blogs/', f'/blogs/{blog.slug}/', '/careers/',
+            f'/career/{carrier.slug}/', '/about/', '/services/', '/contacts/',
+        ]
+
+    def assertNoSessionQueries(self):
+        for url in self.urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            session_queries = [q['sql'] for q in queries if 'django_session' in q['sql']]
+            self.assertEqual(session_queries, [], url)
+
+    def test_anonymous_public_gets_never_touch_sessions(self):
+        self.assertNoSessionQueries()
+        self.assertNotIn('sessionid', self.client.cookies)
+
+    def test_logged_in_public_gets_never_touch_sessions(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+        self.assertNoSessionQueries()
+
+
+# ======================================================================
+# COMPRESSION AND MINIFICATION TESTS
+# ======================================================================
+
+class CompressionTests(TestCase):
+
+    def test_html_is_gzipped_for_clients_that_accept_it(self):
+        plain = self.client.get('/about/')
+        response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('comp;dur=', response['Server-Timing'])
+        # Same page (the CSRF token differs per request)
+        self.assertEqual(len(gzip.decompress(response.content)), len(plain.content))
+        self.assertLess(len(response.content), len(plain.content) // 2)
+
+    def test_pages_with_a_csrf_token_get_a_random_length(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+        lengths = set()
+        for _ in range(10):
+            response = self.client.get('/admin/manage-blogs/?search=x', HTTP_ACCEPT_ENCODING='br, gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn(b'csrfmiddlewaretoken', gzip.decompress(response.content))
+            lengths.add(len(response.content) - len(gzip.compress(gzip.decompress(response.content), mtime=0)))
+        self.assertGreater(len(lengths), 1)
+
+    def test_gzip_output_without_filler_is_standard(self):
+        data = b'<p>' + b'paint ' * 500 + b'</p>'
+        compressor = get_compressor('gzip')
+        streamed = compressor.compress(data[:100]) + compressor.flush() + compressor.compress(data[100:]) + compressor.finish()
+        self.assertEqual(gzip.decompress(streamed), data)
+        self.assertEqual(gzip.decompress(compress_bytes(data, 'gzip', max_random_bytes=100)), data)
+
+    def test_small_and_refused_bodies_stay_uncompressed(self):
+        self.assertFalse(self.client.get('/about/').has_header('Content-Encoding'))
+        response = self.client.get('/about/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(choose_encoding('br;q=0.9, gzip;q=0.8', preferred=('gzip',)), 'gzip')
+        self.assertEqual(choose_encoding('*'), available_encodings()[0])
+
+    def test_streaming_responses_are_compressed_incrementally(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+        for index in range(50):
+            BlogModel.objects.create(title=f'Streamed {index}', content='Body text ' * 20)
+        response = self.client.get('/admin/content/blogs/export/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'Streamed 49', gzip.decompress(b''.join(response.streaming_content)))
+
+    def test_minifier_keeps_raw_blocks_and_template_comments(self):
+        source = (
+            '<div>\n    <p>Hello   world</p>\n  <!-- note -->\n</div>\n'
+            '<pre>  keep\n    this</pre><script>\nvar a = 1\nvar b = 2\n</script>'
+            '<!-- {% if x %} -->'
+        )
+        self.assertEqual(
+            minify_html(source),
+            '<div>\n<p>Hello world</p>\n</div>\n<pre>  keep\n    this</pre>'
+            '<script>\nvar a = 1\nvar b = 2\n</script><!-- {% if x %} -->',
+        )
+
+
+# ======================================================================
+# CLIENT BUNDLE TESTS
+# ======================================================================
+
+class ClientBundleTests(TestCase):
+
+    def test_public_pages_load_only_the_deferred_module_bundle(self):
+        for url in ['/', '/blogs/', '/careers/', '/about/', '/services/', '/contacts/']:
+            content = self.client.get(url).content.decode()
+            self.assertIn('<script type="module" src="/static/Assests/js/site/main.js">', content, url)
+            # Speculation rules are JSON, not JavaScript
+            inline_scripts = re.findall(r'<script(?![^>]*\b(?:src=|type="speculationrules"))[^>]*>', content)
+            self.assertEqual(inline_scripts, [], url)
+
+
+# ======================================================================
+# RESOURCE HINT TESTS
+# ======================================================================
+
+class ResourceHintsTests(TestCase):
+
+    def test_pages_send_preload_links_from_the_manifest(self):
+        response = self.client.get('/')
+        self.assertIn('</static/Assests/img/HeroBg.jpg>; rel=preload; as=image; fetchpriority=high', response['Link'])
+        self.assertIn('<https://fonts.gstatic.com>; rel=preconnect; crossorigin', response['Link'])
+        about = self.client.get('/about/')['Link']
+        self.assertIn('RedLogo.png', about)
+        self.assertNotIn('HeroBg.jpg', about)
+
+    def test_below_the_fold_images_are_lazy_and_the_hero_has_priority(self):
+        content = self.client.get('/').content.decode()
+        self.assertRegex(content, r'<img[^>]*HeroBg\.jpg[^>]*fetchpriority="high"')
+        self.assertRegex(content, r'<img[^>]*Intro\.png[^>]*loading="lazy" decoding="async"')
+        self.assertNotRegex(content, r'<img[^>]*RedLogo\.png[^>]*loading=')
+        source = '<img src="a.png"><img src="b.png" loading="eager"><img src="{% static \'c.png\' %}" />'
+        self.assertEqual(
+            add_image_hints(source, 'Client/about.html'),
+            '<img src="a.png"><img src="b.png" loading="eager" decoding="async">'
+            '<img src="{% static \'c.png\' %}" loading="lazy" decoding="async" />',
+        )
+
+    def test_detail_links_are_prefetched(self):
+        BlogModel.objects.create(title='Prefetched', content='Body')
+        content = self.client.get('/blogs/').content.decode()
+        self.assertIn('<script type="speculationrules">', content)
+        self.assertIn('"selector_matches": "a[data-prefetch]"', content)
+        self.assertIn('href="/blogs/prefetched/" data-prefetch', content)
+
+    def test_early_hints_are_sent_once_the_template_is_known(self):
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200})
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/services/',
+            'extensions': {'http.response.early_hint': {}},
+        }
+        self.client.get('/services/')
+        async_to_sync(EarlyHintsMiddleware(app))(scope, None, send)
+        self.assertEqual(sent[0]['type'], 'http.response.early_hint')
+        self.assertIn(b'<https://fonts.googleapis.com>; rel=preconnect', sent[0]['links'])
+        self.assertEqual(sent[1]['status'], 200)
+
+        sent.clear()
+        async_to_sync(EarlyHintsMiddleware(app))(dict(scope, extensions={}), None, send)
+        self.assertEqual([message['type'] for message in sent], ['http.response.start'])
+
+
+# ======================================================================
+# SERVICE WORKER TESTS
+# ======================================================================
+
+class ServiceWorkerTests(TestCase):
+
+    def get_config(self):
+        response = self.client.get('/service-worker.js')
+        self.assertEqual(response.status_code, 200)
+        match = re.search(r'^const CONFIG = (.*);$', response.content.decode(), re.MULTILINE)
+        return response, json.loads(match.group(1))
+
+    def test_worker_is_served_from_the_root_with_its_precache(self):
+        response, config = self.get_config()
+        self.assertEqual(response['Content-Type'], 'application/javascript')
+        self.assertEqual(response['Service-Worker-Allowed'], '/')
+        self.assertIn('/static/Assests/js/site/main.js', config['precache'])
+        self.assertEqual(config['offlineUrl'], '/offline/')
+        pages = [re.compile(pattern) for pattern in config['pages']]
+        for path in ['/', '/blogs/', '/blogs/some-post/', '/careers/', '/career/painter/']:
+            self.assertTrue(any(pattern.match(path) for pattern in pages), path)
+        self.assertFalse(any(pattern.match('/contacts/') for pattern in pages))
+
+        offline = self.client.get('/offline/').content.decode()
+        self.assertNotIn('cdn.', offline)
+
+    def test_content_version_changes_with_blogs_and_careers(self):
+        _, config = self.get_config()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_config()[1]['contentVersion'], config['contentVersion'])
+
+        BlogModel.objects.create(title='Fresh post', content='Body')
+        _, after_blog = self.get_config()
+        self.assertNotEqual(after_blog['contentVersion'], config['contentVersion'])
+
+        carrier = CarrierModel.objects.create(carrier_title='Painter', deadline_date='2030-01-01', description='Job')
+        _, after_carrier = self.get_config()
+        carrier.description = 'Updated job'
+        carrier.save()
+        _, after_edit = self.get_config()
+        self.assertEqual(len({after_blog['contentVersion'], after_carrier['contentVersion'],
+                              after_edit['contentVersion']}), 3)
+        self.assertEqual(after_edit['staticVersion'], config['staticVersion'])
+
+
+# ======================================================================
+# SHARED CACHE TESTS
+# ======================================================================
+
+class PurgeRecorder(ThreadingHTTPServer):
+    """Local HTTP stand-in for a CDN purge API; records the JSON bodies it receives"""
+
+    def __init__(self):
+        self.purges = []
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                recorder.purges.append((self.headers.get('Authorization'), json.loads(body)))
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/purge'
+
+
+class SharedCacheTests(TestCase):
+
+    def setUp(self):
+        self.recorder = PurgeRecorder()
+        self.addCleanup(self.recorder.server_close)
+        self.addCleanup(self.recorder.shutdown)
+        self.settings_override = override_settings(
+            CDN_PURGER='http', CDN_PURGE_BATCH_SIZE=3,
+            CDN_PURGER_OPTIONS={'url': self.recorder.url, 'token': 'secret', 'body_key': 'tags'},
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_public_pages_are_tagged_and_shared_cacheable(self):
+        blog = BlogModel.objects.create(title='Tagged post', content='Body')
+        response = self.client.get('/blogs/')
+        self.assertEqual(response['Surrogate-Key'], 'blog-list site')
+        self.assertEqual(response['Cache-Tag'], 'blog-list,site')
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+        self.assertIn('stale-while-revalidate=86400', response['Cache-Control'])
+        self.assertIn('max-age=0', response['Cache-Control'])
+
+        self.assertIn(f'blog-{blog.pk}', self.client.get(f'/blogs/{blog.slug}/')['Surrogate-Key'].split())
+        # Pages with a CSRF form set a cookie and must not be shared
+        home = self.client.get('/')
+        self.assertEqual(home['Surrogate-Key'], 'blog-list home site')
+        self.assertIn('private', home['Cache-Control'])
+        self.assertNotIn('s-maxage', home['Cache-Control'])
+
+    def test_admin_saves_and_deletes_are_purged_in_batches(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'secret-pass', is_staff=True)
+        self.client.force_login(user)
+        blog = BlogModel.objects.create(title='Old post', content='Body')
+        cdn.flush_purges()
+        self.recorder.purges.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/admin/manage-blogs/', {'action': 'delete', 'blog_id': blog.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            carrier = CarrierModel.objects.create(
+                carrier_title='Painter', deadline_date='2030-01-01', description='Job'
+            )
+        self.assertEqual(self.recorder.purges, [])
+
+        self.assertEqual(cdn.flush_purges(), 4)
+        keys = sorted([f'blog-{blog.pk}', 'blog-list', f'carrier-{carrier.pk}', 'carrier-list'])
+        self.assertEqual(self.recorder.purges, [
+            ('Bearer secret', {'tags': keys[:3]}),
+            ('Bearer secret', {'tags': keys[3:]}),
+        ])
+        self.assertEqual(cdn.flush_purges(), 0)
+
+    def test_failed_purges_are_retried(self):
+        self.recorder.shutdown()
+        self.recorder.server_close()
+        cdn.queue_purge(['blog-1'])
+        with self.assertRaises(OSError):
+            cdn.flush_purges()
+
+        self.recorder = PurgeRecorder()
+        with override_settings(CDN_PURGER_OPTIONS={'url': self.recorder.url}):
+            self.assertEqual(cdn.flush_purges(), 1)
+        self.assertEqual(self.recorder.purges, [(None, {'keys': ['blog-1']})])
+        self.recorder.shutdown()
+        self.recorder.server_close()
+
+
+class WarmUpTests(TestCase):
+    def test_every_project_template_compiles(self):
+        report = warm_up(connect=False)
+        self.assertGreater(report['templates'], 10)
+        self.assertEqual(report['template_errors'], [])
+        self.assertNotIn('unreachable_databases', report)
+
+    def test_static_routes_are_only_declared_once(self):
+        from backend import routes as backend_routes
+        from baseapp import routes as baseapp_routes
+
+        for module in (backend_routes, baseapp_routes):
+            self.assertFalse([p for p in module.urlpatterns if 'static/' in str(p.pattern)])
+
+
+class StructuredLoggingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'app.log')
+        self.handler = logs.QueueHandler(target=self.path)
+        self.handler.addFilter(logs.RequestContextFilter())
+        self.handler.addFilter(logs.SamplingFilter())
+        self.addCleanup(self.handler.close)
+        self.logger = logging.getLogger('tests.structured')
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def records(self):
+        self.handler.flush_and_stop()
+        with open(self.path, encoding='utf-8') as handle:
+            return [json.loads(line) for line in handle]
+
+    def handle(self, view):
+        def view_func(request):
+            self.logger.info('handling %s', 'request', extra={'blog_id': 7})
+            try:
+                1 / 0
+            except ZeroDivisionError:
+                self.logger.exception('swallowed')
+            return HttpResponse('ok')
+
+        def get_response(request):
+            # What BaseHandler does between the middleware calls
+            request.resolver_match = mock.Mock(view_name=view)
+            middleware.process_view(request, view_func, (), {})
+            return view_func(request)
+
+        middleware = logs.CorrelationIdMiddleware(get_response)
+        return middleware(RequestFactory().get('/blogs/', HTTP_X_REQUEST_ID='upstream-id-1234'))
+
+    def test_request_ids_are_assigned_and_echoed(self):
+        generated = self.client.get('/offline/')['X-Request-ID']
+        self.assertRegex(generated, r'^[0-9a-f]{32}$')
+        echoed = self.client.get('/offline/', HTTP_X_REQUEST_ID='edge-7f3a9c21')
+        self.assertEqual(echoed['X-Request-ID'], 'edge-7f3a9c21')
+        rejected = self.client.get('/offline/', HTTP_X_REQUEST_ID='bad id\nInjected: 1')
+        self.assertRegex(rejected['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    @override_settings(LOG_SAMPLE_RATES={})
+    def test_records_are_json_lines_with_request_context(self):
+        response = self.handle('blogs_page')
+        self.assertEqual(response['X-Request-ID'], 'upstream-id-1234')
+        info, error = self.records()
+        self.assertEqual(info['message'], 'handling request')
+        self.assertEqual(info['blog_id'], 7)
+        self.assertEqual((info['request_id'], info['method'], info['path'], info['view']),
+                         ('upstream-id-1234', 'GET', '/blogs/', 'blogs_page'))
+        self.assertEqual(error['level'], 'ERROR')
+        self.assertEqual(error['request_id'], 'upstream-id-1234')
+        self.assertIn('ZeroDivisionError', error['exception'])
+
+    @override_settings(LOG_SAMPLE_RATES={'blogs_page': 0.0})
+    def test_hot_views_are_sampled_but_errors_are_kept(self):
+        self.handle('blogs_page')
+        self.assertEqual([record['level'] for record in self.records()], ['ERROR'])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = logs.QueueHandler(queue_size=1)
+        record = logging.makeLogRecord({'msg': 'x'})
+        handler.enqueue(record)
+        handler.enqueue(record)
+        self.assertEqual(handler.dropped, 1)
+
+    def test_swallowed_contact_errors_are_logged(self):
+        with mock.patch.object(ContactModel.objects, 'create', side_effect=RuntimeError('db down')):
+            with self.assertLogs('baseapp.views', 'ERROR') as captured:
+                response = self.client.post('/contacts/', {
+                    'your_name': 'Visitor', 'your_email': 'visitor@example.com', 'your_message': 'Hi',
+                })
+        self.assertContains(response, 'Error saving message')
+        self.assertEqual(captured.records[0].form, 'contacts')
+        self.assertEqual(captured.records[0].email_domain, 'example.com')
+        self.assertNotIn('visitor@', captured.output[0])
@@ -1,13 +1,30 @@
+import json
+import logging
+import re
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse
+from django.urls import NoReverseMatch, reverse
+from backend.content_version import get_content_version
 from backend.models import BlogModel, ContactModel , CarrierModel
+from backend.popularity import get_popular_blogs, record_blog_view
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from royal_paints_website.cdn import add_surrogate_keys
+from royal_paints_website.instrumentation import query_budget
+from .service_worker import precache_urls, static_version, uses_hashed_static
+
+
+logger = logging.getLogger(__name__)
 
 # ======================================================================
 # FRONTEND PUBLIC VIEWS
 # ======================================================================
 
+@query_budget(5)
 def index_page(request):
     """
     Homepage view - renders the main landing page with quote form
@@ -38,16 +55,21 @@ def index_page(request):
                     your_message=message
                 )
                 # Get recent blogs and return with success
-                recent_blogs = BlogModel.objects.all().order_by('-created_at')[:3]
+                recent_blogs = BlogModel.published.order_by('-created_at')[:3]
                 return render(request, 'Client/index.html', {
                     'success': True,
-                    'recent_blogs': recent_blogs
+                    'recent_blogs': recent_blogs,
+                    'popular_blogs': get_popular_blogs(),
+                })
+            except Exception:
+                # Email domain only: the address itself is personal data
+                logger.exception('Saving contact message failed', extra={
+                    'form': 'index', 'email_domain': email.rpartition('@')[2],
                 })
-            except:
                 errors['general'] = 'Error saving message. Please try again.'
         
         # If errors, return form with errors
-        recent_blogs = BlogModel.objects.all().order_by('-created_at')[:3]
+        recent_blogs = BlogModel.published.order_by('-created_at')[:3]
         return render(request, 'Client/index.html', {
             'errors': errors,
             'form_data': {
@@ -55,25 +77,29 @@ def index_page(request):
                 'email': email,
                 'message': message
             },
-            'recent_blogs': recent_blogs
+            'recent_blogs': recent_blogs,
+            'popular_blogs': get_popular_blogs(),
         })
     
     # GET request - just show the page with recent blogs
-    recent_blogs = BlogModel.objects.all().order_by('-created_at')[:3]
+    add_surrogate_keys(request, 'home', BlogModel.SURROGATE_LIST_KEY)
+    recent_blogs = BlogModel.published.order_by('-created_at')[:3]
     context = {
-        'recent_blogs': recent_blogs
+        'recent_blogs': recent_blogs,
+        'popular_blogs': get_popular_blogs(),
     }
     return render(request, 'Client/index.html', context)
 # ======================================================================
 # BLOG VIEWS
 # ======================================================================
 
+@query_budget(1)
 def blogs_page(request):
     """
     Blog listing page - displays all published blogs
     
     Features:
-    - Fetches all blog posts from database
+    - Fetches published blog posts (drafts and scheduled posts stay hidden)
     - Public access to blog content
     - Blog overview and navigation
     
@@ -84,11 +110,13 @@ def blogs_page(request):
         HttpResponse: Rendered blogs.html template with blog list
     """
     #** Render the blogs.html template
+    add_surrogate_keys(request, BlogModel.SURROGATE_LIST_KEY)
     context = {
-        'blogs': BlogModel.objects.all()  
+        'blogs': BlogModel.published.all()
     }
     return render(request, 'Client/blogs.html', context)
 
+@query_budget(2)
 def blog_detail(request, slug):
     """
     Individual blog post detail view
@@ -97,6 +125,9 @@ def blog_detail(request, slug):
     - Displays single blog post by slug
     - 404 error handling for non-existent blogs
     - SEO-friendly URL structure using slugs
+    - Cached popular posts (views are counted by blog_view_beacon, since
+      this page is served from shared caches)
+    - Related posts and previous/next links precomputed on the blog row
     
     Args:
         request: HTTP request object
@@ -106,18 +137,52 @@ def blog_detail(request, slug):
         HttpResponse: Rendered blog_detail.html template with blog data
         
     Raises:
-        Http404: If blog with given slug doesn't exist
+        Http404: If no published blog has the given slug
     """
-    blog = get_object_or_404(BlogModel, slug=slug)
+    blog = get_object_or_404(BlogModel.published, slug=slug)
     context = {
-        'blog': blog
+        'blog': blog,
+        'popular_blogs': get_popular_blogs(),
     }
+    # The page links to its related, adjacent and popular posts by title
+    linked_ids = [post['id'] for post in blog.related_posts]
+    linked_ids += [post['id'] for post in blog.adjacent_posts.values() if post]
+    linked_ids += [post.pk for post in context['popular_blogs']]
+    add_surrogate_keys(request, *(BlogModel.surrogate_key(pk) for pk in [blog.pk, *linked_ids]))
     return render(request, 'Client/blog_detail.html', context)
 
+@query_budget(0)
+@csrf_exempt
+@require_POST
+def blog_view_beacon(request, pk):
+    """
+    Counts one view of a blog, posted by the page's script
+    (navigator.sendBeacon)
+    
+    Features:
+    - blog_detail responses are shared by the CDN and only reach Django on
+      a miss, so views are counted here, on an uncached request, instead
+    - Buffered in memory (backend.popularity); no queries
+    - CSRF-exempt: the cached page can't carry a per-visitor token, and a
+      forged beacon can do no more than a page view can
+    
+    Args:
+        request: HTTP request object (POST, empty body)
+        pk: id of the viewed blog
+        
+    Returns:
+        HttpResponse: 204 No Content, never cached
+    """
+    record_blog_view(pk)
+    response = HttpResponse(status=204)
+    response['Cache-Control'] = 'no-store'
+    return response
+
 # ======================================================================
 # About Us Page
 # ======================================================================
 
+@query_budget(3)
 def about_page(request):
     """
     About page view - renders company information and handles quote form submission
@@ -148,7 +213,10 @@ def about_page(request):
                     your_message=message
                 )
                 return render(request, 'Client/about.html', {'success': True})
-            except:
+            except Exception:
+                logger.exception('Saving contact message failed', extra={
+                    'form': 'about', 'email_domain': email.rpartition('@')[2],
+                })
                 errors['general'] = 'Error saving message. Please try again.'
         
         # If errors, return form with errors
@@ -162,12 +230,14 @@ def about_page(request):
         })
     
     # GET request - just show the page
+    add_surrogate_keys(request, 'about')
     return render(request, 'Client/about.html')
 
 # ======================================================================
 # Services Page
 # ======================================================================
 
+@query_budget(0)
 def services_page(request):
     """
     Services page view - renders company/organization information
@@ -183,6 +253,7 @@ def services_page(request):
     Returns:
         HttpResponse: Rendered services.html template
     """
+    add_surrogate_keys(request, 'services')
     #** Render the services.html template
     return render(request, 'Client/services.html')
 
@@ -190,6 +261,7 @@ def services_page(request):
 # Contacts Us Page
 # ======================================================================
 
+@query_budget(3)
 def contacts_page(request):
     """
     Simple contacts page view - handles GET and POST requests
@@ -220,7 +292,10 @@ def contacts_page(request):
                     your_message=message
                 )
                 return render(request, 'Client/contacts.html', {'success': True})
-            except:
+            except Exception:
+                logger.exception('Saving contact message failed', extra={
+                    'form': 'contacts', 'email_domain': email.rpartition('@')[2],
+                })
                 errors['general'] = 'Error saving message. Please try again.'
         
         # If errors, return form with errors
@@ -234,6 +309,7 @@ def contacts_page(request):
         })
     
     # GET request - just show the page
+    add_surrogate_keys(request, 'contacts')
     return render(request, 'Client/contacts.html')
 
 
@@ -243,12 +319,13 @@ def contacts_page(request):
 # CARRIER VIEWS
 # ======================================================================
 
+@query_budget(1)
 def carriers_page(request):
     """
     Carrier listing page - displays all available career opportunities
     
     Features:
-    - Fetches all carrier posts from database
+    - Fetches published carrier posts (drafts and scheduled posts stay hidden)
     - Shows deadline dates for applications
     - Public access to career opportunities
     
@@ -258,11 +335,13 @@ def carriers_page(request):
     Returns:
         HttpResponse: Rendered carriers.html template with carrier list
     """
+    add_surrogate_keys(request, CarrierModel.SURROGATE_LIST_KEY)
     context = {
-        'carriers': CarrierModel.objects.all().order_by('-created_at')  
+        'carriers': CarrierModel.published.order_by('-created_at')
     }
     return render(request, 'Client/carriers.html', context)
 
+@query_budget(1)
 def carrier_detail(request, slug):
     """
     Individual carrier post detail view
@@ -280,10 +359,87 @@ def carrier_detail(request, slug):
         HttpResponse: Rendered carrier_detail.html template with carrier data
         
     Raises:
-        Http404: If carrier with given ID doesn't exist
+        Http404: If no published carrier has the given slug
     """
-    carrier = get_object_or_404(CarrierModel, slug=slug)
+    carrier = get_object_or_404(CarrierModel.published, slug=slug)
+    add_surrogate_keys(request, CarrierModel.surrogate_key(carrier.pk))
     context = {
         'carrier': carrier
     }
-    return render(request, 'Client/carrier_detail.html', context)
\ No newline at end of file
+    return render(request, 'Client/carrier_detail.html', context)
+
+
+# ======================================================================
+# SERVICE WORKER AND OFFLINE PAGE
+# ======================================================================
+
+def _page_pattern(url_name):
+    # Detail routes are reversed with a placeholder slug, then widened
+    try:
+        path = reverse(url_name)
+    except NoReverseMatch:
+        path = reverse(url_name, args=['SLUG'])
+    return '^' + re.escape(path).replace('SLUG', '[^/]+') + '$'
+
+
+@query_budget(2)
+def service_worker(request):
+    """
+    Generated service worker, served from the site root so its scope
+    covers every page
+
+    Features:
+    - Precaches the SERVICE_WORKER_PRECACHE static files and the offline page
+    - Stale-while-revalidate for the SERVICE_WORKER_PAGES public pages, in
+      a cache named after the blog/career content version
+    - Offline page for navigations that fail with nothing cached
+    - Byte-for-byte identical until static files or content change, so
+      browsers only reinstall it when there is something new
+
+    Args:
+        request: HTTP request object
+
+    Returns:
+        HttpResponse: Rendered service-worker.js (application/javascript)
+    """
+    config = {
+        'staticVersion': static_version(),
+        'contentVersion': get_content_version(),
+        'precache': precache_urls(),
+        'hashedStatic': uses_hashed_static(),
+        'offlineUrl': reverse('offline_page'),
+        'pages': [_page_pattern(url_name) for url_name in settings.SERVICE_WORKER_PAGES],
+        'staticUrl': settings.STATIC_URL,
+        'mediaUrl': settings.MEDIA_URL,
+        'maxMediaEntries': settings.SERVICE_WORKER_MAX_MEDIA_ENTRIES,
+        'runtimeOrigins': settings.SERVICE_WORKER_RUNTIME_ORIGINS,
+        'bypass': settings.SERVICE_WORKER_BYPASS,
+    }
+    # Embeds the content version
+    add_surrogate_keys(request, 'service-worker', BlogModel.SURROGATE_LIST_KEY, CarrierModel.SURROGATE_LIST_KEY)
+    response = render(
+        request, 'Client/service-worker.js', {'config': json.dumps(config)},
+        content_type='application/javascript',
+    )
+    # Browsers revalidate the worker on navigation; never let a cache hold it
+    response['Cache-Control'] = 'no-cache'
+    response['Service-Worker-Allowed'] = '/'
+    return response
+
+
+@query_budget(0)
+def offline_page(request):
+    """
+    Offline fallback page precached by the service worker
+
+    Features:
+    - Self-contained (inline styles, no CDN assets) so it renders offline
+
+    Args:
+        request: HTTP request object
+
+    Returns:
+        HttpResponse: Rendered offline.html template
+    """
+    add_surrogate_keys(request, 'offline')
+    return render(request, 'Client/offline.html')
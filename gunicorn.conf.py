@@ -0,0 +1,57 @@
+"""
+Gunicorn configuration, picked up automatically from the project root:
+
+    gunicorn royal_paints_website.wsgi
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn royal_paints_website.asgi
+
+The application is loaded once in the master (preload_app) and warmed up
+there by royal_paints_website.warmup: views are imported, the URL
+resolver is built and every Frontend/ template is compiled before the
+workers are forked, so each worker inherits that state copy-on-write
+instead of rebuilding it during its first requests. Workers recycled by
+max_requests fork from the same warm master.
+
+Database connections are checked in the master but closed before forking
+(a socket shared by several processes corrupts the protocol stream);
+every worker opens its own as soon as it starts.
+"""
+import multiprocessing
+import os
+
+
+wsgi_app = 'royal_paints_website.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# Recycles workers to bound memory growth; jitter avoids restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'royal_paints_website.settings')
+os.environ.setdefault('DJANGO_ENV', 'production')
+
+
+def when_ready(server):
+    from royal_paints_website.warmup import warm_up
+
+    server.log.info('Warm-up: %s', warm_up())
+
+
+def pre_fork(server, worker):
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    from royal_paints_website.warmup import open_connections
+
+    # Sync and uvicorn workers serve from this thread; gthread workers
+    # connect lazily from their request threads instead
+    open_connections()
@@ -1,10 +1,16 @@
 """
 ASGI config for royal_paints_website project.
+
+The Django application is wrapped in EarlyHintsMiddleware, which sends
+103 Early Hints on servers that support them (see
+royal_paints_website.preload).
 """
 
 import os
 from django.core.asgi import get_asgi_application
 
+from royal_paints_website.preload import EarlyHintsMiddleware
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'royal_paints_website.settings')
 
-application = get_asgi_application()
+application = EarlyHintsMiddleware(get_asgi_application())
@@ -0,0 +1,233 @@
+"""
+Shared-cache (nginx/CDN) headers and debounced purging by surrogate key
+
+Views list what a response rendered with add_surrogate_keys(request, ...)
+(e.g. 'blog-42', 'blog-list', 'home'). SurrogateKeyMiddleware sends them,
+plus the global 'site' key, as Surrogate-Key (Fastly, nginx, Varnish) and
+Cache-Tag (Cloudflare, Akamai) headers, and lets shared caches keep GET
+responses:
+
+    Cache-Control: public, max-age=0, s-maxage=CDN_CACHE_SECONDS,
+                   stale-while-revalidate=CDN_STALE_SECONDS
+
+Browsers still revalidate every time (the service worker caches for
+them). A shared page only reaches Django on a miss, so nothing per-visit
+may happen in a cached view: blog views are counted by an uncached
+beacon instead (backend.popularity). Responses that set or vary on cookies (pages with a CSRF form,
+logged-in sessions) are marked private and never shared.
+
+queue_purge(keys) is called after saves and deletes (backend.signals).
+Keys are collected in-process; a background thread sends them once no
+new key arrived for CDN_PURGE_DEBOUNCE_SECONDS (or CDN_PURGE_MAX_WAIT_SECONDS
+after the first one), in batches of CDN_PURGE_BATCH_SIZE, through the
+CDN_PURGER class. A failed purge puts its keys back for the next round.
+
+Settings:
+    CDN_CACHE_SECONDS / CDN_STALE_SECONDS: s-maxage / stale-while-revalidate
+    CDN_PURGER: dotted path or short name of a purger class ('' disables
+        purging)
+    CDN_PURGER_OPTIONS: keyword arguments for the purger class
+    CDN_PURGE_DEBOUNCE_SECONDS: quiet period before purging (0 disables the
+        background thread; call flush_purges() yourself)
+    CDN_PURGE_MAX_WAIT_SECONDS: longest delay of a purge under constant writes
+    CDN_PURGE_BATCH_SIZE: keys per purge request
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+import urllib.request
+
+from django.conf import settings
+from django.utils.cache import has_vary_header, patch_cache_control
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+# Added to every tagged response, so purging it empties the whole cache
+SITE_KEY = 'site'
+
+
+def add_surrogate_keys(request, *keys):
+    """Tags the response to `request` with surrogate keys"""
+    if not hasattr(request, 'surrogate_keys'):
+        request.surrogate_keys = set()
+    request.surrogate_keys.update(keys)
+
+
+class SurrogateKeyMiddleware:
+    """
+    Adds Surrogate-Key/Cache-Tag and shared-cache Cache-Control headers to
+    responses tagged with add_surrogate_keys()
+
+    Place it above SessionMiddleware and CsrfViewMiddleware so the cookies
+    and Vary headers they add are seen here.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        keys = getattr(request, 'surrogate_keys', None)
+        if keys is None:
+            return response
+
+        tags = sorted(keys | {SITE_KEY})
+        response['Surrogate-Key'] = ' '.join(tags)
+        response['Cache-Tag'] = ','.join(tags)
+        if response.has_header('Cache-Control') or response.status_code != 200:
+            return response
+        if request.method not in ('GET', 'HEAD') or response.cookies or has_vary_header(response, 'Cookie'):
+            patch_cache_control(response, private=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=0,
+                s_maxage=settings.CDN_CACHE_SECONDS, stale_while_revalidate=settings.CDN_STALE_SECONDS,
+            )
+        return response
+
+
+# ======================================================================
+# PURGERS
+# ======================================================================
+
+class LoggingPurger:
+    """Logs the keys it would purge (development)"""
+
+    def __init__(self, **options):
+        pass
+
+    def purge(self, keys):
+        logger.info('Purge surrogate keys: %s', ' '.join(keys))
+
+
+class HTTPPurger:
+    """
+    POSTs {body_key: [keys]} as JSON to `url`
+
+    Works with key-based purge APIs (Cloudflare: body_key='tags' and a
+    bearer token) and with a purge endpoint in front of nginx or Varnish.
+    """
+
+    def __init__(self, url, token=None, body_key='keys', timeout=5):
+        self.url = url
+        self.token = token
+        self.body_key = body_key
+        self.timeout = timeout
+
+    def purge(self, keys):
+        request = urllib.request.Request(
+            self.url, data=json.dumps({self.body_key: list(keys)}).encode(), method='POST',
+            headers={'Content-Type': 'application/json'},
+        )
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def get_purger():
+    path = settings.CDN_PURGERS.get(settings.CDN_PURGER, settings.CDN_PURGER)
+    return import_string(path)(**settings.CDN_PURGER_OPTIONS)
+
+
+# ======================================================================
+# DEBOUNCED PURGE QUEUE
+# ======================================================================
+
+_pending_keys = set()
+_pending_condition = threading.Condition()
+# monotonic times of the first and the latest key queued since the last purge
+_first_queued_at = None
+_last_queued_at = None
+_purger_thread = None
+
+
+def _add_keys(keys):
+    global _first_queued_at, _last_queued_at
+    with _pending_condition:
+        now = time.monotonic()
+        if not _pending_keys:
+            _first_queued_at = now
+        _last_queued_at = now
+        _pending_keys.update(keys)
+        _pending_condition.notify()
+
+
+def queue_purge(keys):
+    """Queues surrogate keys for the next purge; no I/O"""
+    if not settings.CDN_PURGER:
+        return
+    _add_keys(keys)
+    _ensure_purger_thread()
+
+
+def _purge_forever(debounce, max_wait):
+    while True:
+        with _pending_condition:
+            _pending_condition.wait_for(lambda: _pending_keys)
+            while True:
+                deadline = min(_last_queued_at + debounce, _first_queued_at + max_wait)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                _pending_condition.wait(remaining)
+        try:
+            flush_purges()
+        except Exception:
+            logger.exception('Purging cached pages failed')
+            # Don't hammer a CDN API that is down
+            time.sleep(debounce)
+
+
+def _ensure_purger_thread():
+    """Starts the purger thread lazily, so it is created after a fork"""
+    global _purger_thread
+    debounce = settings.CDN_PURGE_DEBOUNCE_SECONDS
+    if not debounce or (_purger_thread is not None and _purger_thread.is_alive()):
+        return
+    with _pending_condition:
+        if _purger_thread is None or not _purger_thread.is_alive():
+            _purger_thread = threading.Thread(
+                target=_purge_forever, args=(debounce, settings.CDN_PURGE_MAX_WAIT_SECONDS),
+                name='cdn-purger', daemon=True,
+            )
+            _purger_thread.start()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_purges()
+    except Exception:
+        pass
+
+
+def flush_purges():
+    """
+    Purges every queued key now
+
+    Returns:
+        int: number of keys purged
+    """
+    with _pending_condition:
+        keys = sorted(_pending_keys)
+        _pending_keys.clear()
+    if not keys:
+        return 0
+
+    purger = get_purger()
+    size = settings.CDN_PURGE_BATCH_SIZE
+    purged = 0
+    try:
+        for start in range(0, len(keys), size):
+            batch = keys[start:start + size]
+            purger.purge(batch)
+            purged += len(batch)
+    except Exception:
+        _add_keys(keys[purged:])
+        raise
+    return purged
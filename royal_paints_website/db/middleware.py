@@ -0,0 +1,49 @@
+from django.conf import settings
+
+from .routers import REPLICA, get_read_target, reset_request_state, set_read_target, wrote_content
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests to public views read from the replicas
+
+    Only GET/HEAD requests whose view lives in one of REPLICA_APPS are
+    routed; admin (backend) views and every write keep using the primary.
+
+    Write-after-read consistency: a request that saves a blog or carrier
+    sets a short-lived cookie, and while it is present the client reads
+    from the primary, so staff never see a stale list from a lagging replica.
+    """
+
+    REPLICA_APPS = ('baseapp',)
+    SAFE_METHODS = ('GET', 'HEAD')
+    PIN_COOKIE = 'db_primary_pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        previous = get_read_target()
+        reset_request_state()
+        try:
+            response = self.get_response(request)
+            if wrote_content():
+                response.set_cookie(
+                    self.PIN_COOKIE, '1',
+                    max_age=settings.DATABASE_PRIMARY_PIN_SECONDS,
+                    httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            set_read_target(previous)
+            reset_request_state()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        app_label = view_func.__module__.split('.')[0]
+        if (
+            request.method in self.SAFE_METHODS
+            and app_label in self.REPLICA_APPS
+            and self.PIN_COOKIE not in request.COOKIES
+        ):
+            set_read_target(REPLICA)
+        return None
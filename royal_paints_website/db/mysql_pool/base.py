@@ -0,0 +1,85 @@
+"""
+MySQL backend with a small in-process connection pool
+
+Enabled with DB_ENGINE=mysql_pool or DB_POOL_SIZE > 0. Django's persistent
+connections (CONN_MAX_AGE) already reuse one connection per thread; the pool
+additionally lets short-lived threads (runserver, ASGI sync_to_async workers)
+hand connections to each other instead of reconnecting.
+
+Settings:
+    POOL_SIZE: maximum number of idle connections kept per alias
+"""
+import queue
+import threading
+
+from django.db.backends.mysql.base import Database
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+
+class ConnectionPool:
+    """LIFO pool of idle raw MySQLdb connections"""
+
+    def __init__(self, size):
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self, conn_params):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return Database.connect(**conn_params)
+            try:
+                connection.ping()
+                return connection
+            except Database.Error:
+                # Server dropped it while idle - try the next one
+                continue
+
+    def release(self, connection):
+        try:
+            connection.rollback()
+            self._idle.put_nowait(connection)
+        except (Database.Error, queue.Full):
+            connection.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+            except Database.Error:
+                continue
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, size):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(size)
+        return _pools[alias]
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL_SIZE', 10))
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.acquire(conn_params)
+        if connection.encoders.get(bytes) is bytes:
+            connection.encoders.pop(bytes)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.errors_occurred:
+            # Don't recycle a connection that may be in a broken state
+            with self.wrap_database_errors:
+                return self.connection.close()
+        self.pool.release(self.connection)
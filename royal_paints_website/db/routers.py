@@ -0,0 +1,150 @@
+"""
+Database routing between the MySQL primary and its read replicas
+
+Writes always go to the primary ('default'). Reads go to the primary too,
+unless the current request opted into replica reads through
+ReplicaRoutingMiddleware (public baseapp GET views) or code wrapped in
+read_from_replicas().
+
+Replicas are picked by weight (DATABASE_REPLICA_WEIGHTS); a weight of 0
+takes a replica out of rotation. A replica that
+fails to connect is skipped for DATABASE_REPLICA_RETRY_SECONDS, and when no
+replica is healthy reads fall back to the primary.
+"""
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+
+# Read target for the current request/task; contextvars keep it isolated
+# between threads and between coroutines under ASGI
+_read_target = contextvars.ContextVar('db_read_target', default=PRIMARY)
+
+# Replica picked for the current request, so all its reads see one snapshot
+_request_replica = contextvars.ContextVar('db_request_replica', default=None)
+
+# Set when the current request wrote one of PrimaryReplicaRouter.PIN_MODELS
+_wrote_content = contextvars.ContextVar('db_wrote_content', default=False)
+
+# alias -> monotonic time until which the replica is skipped
+_unhealthy_until = {}
+_unhealthy_lock = threading.Lock()
+
+
+def get_read_target():
+    return _read_target.get()
+
+
+def set_read_target(target):
+    _read_target.set(target)
+
+
+def reset_request_state():
+    """Clears the per-request replica choice and write flag"""
+    _request_replica.set(None)
+    _wrote_content.set(False)
+
+
+def wrote_content():
+    return _wrote_content.get()
+
+
+@contextmanager
+def _use_read_target(target):
+    token = _read_target.set(target)
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+def read_from_replicas():
+    """Context manager routing reads inside the block to a replica"""
+    return _use_read_target(REPLICA)
+
+
+def read_from_primary():
+    """Context manager forcing reads inside the block to the primary"""
+    return _use_read_target(PRIMARY)
+
+
+# ======================================================================
+# REPLICA HEALTH
+# ======================================================================
+
+def mark_replica_unhealthy(alias):
+    retry_after = getattr(settings, 'DATABASE_REPLICA_RETRY_SECONDS', 30)
+    with _unhealthy_lock:
+        _unhealthy_until[alias] = time.monotonic() + retry_after
+
+
+def mark_replica_healthy(alias):
+    with _unhealthy_lock:
+        _unhealthy_until.pop(alias, None)
+
+
+def is_replica_healthy(alias):
+    until = _unhealthy_until.get(alias)
+    return until is None or until <= time.monotonic()
+
+
+def _can_connect(alias):
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        mark_replica_unhealthy(alias)
+        return False
+    mark_replica_healthy(alias)
+    return True
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to a weighted, healthy replica when allowed, everything
+    else to the primary
+    """
+
+    # Admin writes to these models pin the client to the primary for a while
+    PIN_MODELS = ('backend.blogmodel', 'backend.carriermodel')
+
+    def choose_replica(self):
+        weights = getattr(settings, 'DATABASE_REPLICA_WEIGHTS', {})
+        # A weight of 0 drains a replica; random.choices rejects all-zero weights
+        candidates = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if weights.get(alias, 1) > 0 and is_replica_healthy(alias)
+        ]
+        while candidates:
+            alias = random.choices(
+                candidates, weights=[weights.get(alias, 1) for alias in candidates]
+            )[0]
+            if _can_connect(alias):
+                return alias
+            candidates.remove(alias)
+        return 'default'
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or _read_target.get() != REPLICA:
+            return 'default'
+        alias = _request_replica.get()
+        if alias is None:
+            alias = self.choose_replica()
+            _request_replica.set(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if model._meta.label_lower in self.PIN_MODELS:
+            _wrote_content.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
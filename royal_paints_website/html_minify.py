@@ -0,0 +1,44 @@
+"""
+Load-time HTML minification for Django templates
+
+minify_html() is applied to the project's templates by
+royal_paints_website.template_loaders.Loader before they are compiled, so
+it runs once per template per process instead of on every response.
+
+The minifier is deliberately conservative:
+- <pre>, <textarea>, <script> and <style> blocks are left untouched
+- whitespace runs collapse to a single newline (if they contained one) or
+  a single space, never to nothing, so inline layout and JavaScript
+  automatic semicolon insertion in event handlers are unaffected
+- HTML comments are removed, except conditional comments and comments
+  wrapping template tags ({% ... %}), which would unbalance blocks
+"""
+import re
+
+
+RAW_BLOCK = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+COMMENT = re.compile(r'<!--(?!\[if|\s*<!\[endif).*?-->', re.DOTALL)
+WHITESPACE = re.compile(r'\s{2,}|[\t\r\n]')
+
+
+def _collapse_whitespace(match):
+    return '\n' if '\n' in match.group(0) else ' '
+
+
+def _drop_comment(match):
+    return match.group(0) if '{%' in match.group(0) else ''
+
+
+def _minify_markup(markup):
+    return WHITESPACE.sub(_collapse_whitespace, COMMENT.sub(_drop_comment, markup))
+
+
+def minify_html(source):
+    output, position = [], 0
+    for match in RAW_BLOCK.finditer(source):
+        output.append(_minify_markup(source[position:match.start()]))
+        output.append(match.group(0))
+        position = match.end()
+    output.append(_minify_markup(source[position:]))
+    return ''.join(output)
+
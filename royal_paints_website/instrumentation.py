@@ -0,0 +1,102 @@
+"""
+Per-request instrumentation helpers: SQL counting, template timing and
+per-view query budgets
+
+Used by royal_paints_website.middleware.InstrumentationMiddleware.
+"""
+import contextvars
+import time
+
+
+# Stats of the request being handled in the current thread/task
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a view runs more queries than its budget"""
+
+
+class RequestStats:
+    """Counters collected while one request is handled"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        # Name of the last top-level template rendered
+        self.template_name = None
+        # (encoding, original bytes, compressed bytes, seconds) when
+        # CompressionMiddleware compressed the response body
+        self.compression = None
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def get_current_stats():
+    return _current_stats.get()
+
+
+def start_request_stats():
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def finish_request_stats(token):
+    _current_stats.reset(token)
+
+
+def query_budget(max_queries):
+    """
+    Declares the maximum number of SQL queries a view may run per request
+
+    The budget covers the whole request, including session and user
+    lookups done by middleware. QUERY_BUDGETS in settings overrides it
+    per URL name.
+
+    Usage:
+        @query_budget(2)
+        def blogs_page(request):
+            ...
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def install_template_timer():
+    """
+    Wraps the Django template backend's render() so the time spent
+    rendering is added to the current request's stats. Safe to call twice.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'is_timed', False):
+        return
+
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return original_render(self, context, request)
+        if stats.template_depth == 0:
+            stats.template_name = self.origin.template_name
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            stats.template_depth -= 1
+            if stats.template_depth == 0:
+                stats.template_time += time.perf_counter() - start
+
+    render.is_timed = True
+    Template.render = render
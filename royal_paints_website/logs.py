@@ -0,0 +1,230 @@
+"""
+Structured, non-blocking logging with per-request correlation IDs
+
+- CorrelationIdMiddleware gives every request an id (the incoming
+  X-Request-ID when it looks sane, a new one otherwise), echoes it in the
+  X-Request-ID response header and writes one access record per request
+- RequestContextFilter stamps records with that id, the method, path and
+  view, so every line logged while handling a request can be grouped
+- SamplingFilter keeps only a share (LOG_SAMPLE_RATES) of the INFO/DEBUG
+  records of hot views; the decision is made once per request, so a kept
+  request keeps all its lines. Warnings and errors are never dropped.
+- QueueHandler only puts records on an in-memory queue; a QueueListener
+  thread formats them as JSON lines (JSONFormatter) and does the actual
+  I/O, off the request path. When the queue is full records are dropped
+  and counted rather than blocking the request.
+
+Wired up by LOGGING in settings.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+# {'request_id', 'method', 'path', 'view', 'sampled'} of the request being
+# handled in the current thread/task
+_request_context = contextvars.ContextVar('log_request_context', default=None)
+
+access_logger = logging.getLogger('royal_paints_website.request')
+
+
+def get_request_id():
+    context = _request_context.get()
+    return context['request_id'] if context else None
+
+
+# ======================================================================
+# FILTERS
+# ======================================================================
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, method, path and view of the current request"""
+
+    def filter(self, record):
+        context = _request_context.get()
+        if context is not None:
+            for key in ('request_id', 'method', 'path', 'view'):
+                if not hasattr(record, key):
+                    setattr(record, key, context[key])
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Drops INFO/DEBUG records of unsampled requests to hot views"""
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        context = _request_context.get()
+        if context is None:
+            return True
+        if context['sampled'] is None:
+            if context['view'] is None:
+                # Not resolved yet; decide once the view is known
+                return True
+            rate = settings.LOG_SAMPLE_RATES.get(context['view'], 1.0)
+            context['sampled'] = rate >= 1 or random.random() < rate
+        return context['sampled']
+
+
+# ======================================================================
+# FORMATTER
+# ======================================================================
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and context"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+# ======================================================================
+# QUEUE HANDLER
+# ======================================================================
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking handler: the calling thread only enqueues the record
+
+    The listener thread writes to `target`: 'stream' (stderr) or a file
+    path (WatchedFileHandler, so logrotate can move the file). It is
+    started on the first record in each process, which keeps it alive in
+    workers forked from a preloaded master.
+    """
+
+    def __init__(self, target='stream', queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        if target == 'stream':
+            self.target = logging.StreamHandler()
+        else:
+            self.target = logging.handlers.WatchedFileHandler(target, encoding='utf-8')
+        self.target.setFormatter(JSONFormatter())
+        self.dropped = 0
+        self._listener = None
+        self._listener_pid = None
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Resolve everything that can't cross threads (args, traceback) now;
+        # formatting itself happens on the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.target.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self._listener_pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self._listener_pid == os.getpid():
+                return
+            # A queue inherited through fork may hold the parent's records
+            # and a lock held by its (now missing) listener thread
+            self.queue = queue.Queue(self.queue.maxsize)
+            self._listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+            atexit.register(self.flush_and_stop)
+
+    def flush_and_stop(self):
+        """Writes out the queued records and stops the listener thread"""
+        if self._listener is not None and self._listener_pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+    def close(self):
+        self.flush_and_stop()
+        self.target.close()
+        super().close()
+
+
+# ======================================================================
+# MIDDLEWARE
+# ======================================================================
+
+class CorrelationIdMiddleware:
+    """
+    Assigns the request id, exposes it as request.request_id and in the
+    X-Request-ID response header, and logs one access record per request
+    (sampled with the rest of the request's INFO records)
+
+    Keep it first in MIDDLEWARE so everything below logs with the id.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        request.request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        context = {
+            'request_id': request.request_id, 'method': request.method, 'path': request.path,
+            'view': None, 'sampled': None,
+        }
+        token = _request_context.set(context)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            match = getattr(request, 'resolver_match', None)
+            context['view'] = match.view_name if match else 'unresolved'
+            access_logger.info(
+                '%s %s %s', request.method, request.get_full_path(), response.status_code,
+                extra={'status': response.status_code, 'duration_ms': round((time.perf_counter() - start) * 1000, 2)},
+            )
+        finally:
+            _request_context.reset(token)
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        context = _request_context.get()
+        if context is not None:
+            context['view'] = request.resolver_match.view_name
+        return None
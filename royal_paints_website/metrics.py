@@ -0,0 +1,96 @@
+"""
+In-process request metrics rendered in the Prometheus text format
+
+Each worker process keeps its own histograms; scrape every worker (or run
+one worker per scrape target) to get the full picture.
+"""
+import math
+import threading
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+BYTE_BUCKETS = (0, 1024, 5 * 1024, 10 * 1024, 25 * 1024, 50 * 1024, 100 * 1024, 250 * 1024, 1024 * 1024)
+
+
+class Histogram:
+    """Cumulative histogram with one series per label value"""
+
+    def __init__(self, name, documentation, buckets, label='view'):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.label = label
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = {
+                    'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0,
+                }
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                label: {'counts': list(data['counts']), 'sum': data['sum'], 'count': data['count']}
+                for label, data in self._series.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label, data in sorted(self.snapshot().items()):
+            for bound, count in zip(self.buckets, data['counts']):
+                le = '+Inf' if bound == math.inf else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{self.label}="{label}",le="{le}"}} {count}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label}"}} {data["sum"]}')
+            lines.append(f'{self.name}_count{{{self.label}="{label}"}} {data["count"]}')
+        return '\n'.join(lines)
+
+
+REQUEST_DURATION = Histogram(
+    'royalpaints_request_duration_seconds', 'Total time spent handling the request.', LATENCY_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'royalpaints_db_duration_seconds', 'Time spent executing SQL per request.', LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'royalpaints_db_queries', 'Number of SQL queries per request.', QUERY_COUNT_BUCKETS,
+)
+TEMPLATE_DURATION = Histogram(
+    'royalpaints_template_duration_seconds',
+    'Time spent rendering templates per request (includes lazy queries run by the template).',
+    LATENCY_BUCKETS,
+)
+
+COMPRESSION_DURATION = Histogram(
+    'royalpaints_compression_duration_seconds', 'CPU time spent compressing the response body.',
+    LATENCY_BUCKETS,
+)
+COMPRESSION_SAVED_BYTES = Histogram(
+    'royalpaints_compression_saved_bytes', 'Response bytes saved by compression.', BYTE_BUCKETS,
+)
+
+REGISTRY = [
+    REQUEST_DURATION, DB_DURATION, DB_QUERIES, TEMPLATE_DURATION, COMPRESSION_DURATION, COMPRESSION_SAVED_BYTES,
+]
+
+
+def render_prometheus():
+    return '\n'.join(histogram.render() for histogram in REGISTRY) + '\n'
+
+
+def reset_metrics():
+    for histogram in REGISTRY:
+        histogram.reset()
@@ -0,0 +1,245 @@
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+from .compression import COMPRESSIBLE_TYPES, choose_encoding, get_compressor
+from .instrumentation import (
+    QueryBudgetExceeded, finish_request_stats, get_current_stats, install_template_timer, start_request_stats,
+)
+from .preload import link_values, remember_template
+
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentationMiddleware:
+    """
+    Records query count, DB time, template render time and total latency
+    for every request
+
+    Results are exposed three ways:
+    - a Server-Timing response header (visible in browser dev tools)
+    - in-process histograms served in Prometheus format by metrics_view
+    - per-view query budgets (@query_budget / QUERY_BUDGETS); exceeding one
+      raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (tests),
+      otherwise it is logged as a warning
+
+    Keep it first in MIDDLEWARE so session and auth queries are counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        stats, token = start_request_stats()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            finish_request_stats(token)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        metrics.REQUEST_DURATION.observe(view_name, total)
+        metrics.DB_DURATION.observe(view_name, stats.db_time)
+        metrics.DB_QUERIES.observe(view_name, stats.queries)
+        metrics.TEMPLATE_DURATION.observe(view_name, stats.template_time)
+
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                f'tpl;dur={stats.template_time * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}'
+            )
+            if stats.compression:
+                encoding, original, compressed, elapsed = stats.compression
+                response['Server-Timing'] += (
+                    f', comp;dur={elapsed * 1000:.2f};desc="{encoding} {original} to {compressed} bytes"'
+                )
+
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and stats.queries > budget:
+            message = f'{view_name} ran {stats.queries} queries, budget is {budget}'
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        request.query_budget = settings.QUERY_BUDGETS.get(
+            view_name, getattr(view_func, 'query_budget', None)
+        )
+        return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses text responses with Brotli (when the brotli package is
+    installed) or gzip, whichever the client prefers
+
+    - Skips bodies shorter than COMPRESSION_MIN_LENGTH, non-text content
+      types, responses that already have a Content-Encoding and responses
+      marked Cache-Control: no-transform
+    - Streaming responses are compressed chunk by chunk and flushed after
+      every chunk, so streamed exports still reach the client progressively
+    - Bytes saved and compression time are added to Server-Timing (as
+      "comp") and to the Prometheus histograms
+    - Responses that used the CSRF token are only gzipped, with a random
+      length filler (COMPRESSION_BREACH_RANDOM_BYTES) against BREACH
+
+    Place it right after InstrumentationMiddleware, before anything that
+    sets headers the compressed body depends on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.can_compress(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        # A CSRF token in the body: gzip only, with a random-length filler
+        max_random_bytes = settings.COMPRESSION_BREACH_RANDOM_BYTES if request.META.get('CSRF_COOKIE_USED') else 0
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), preferred=('gzip',) if max_random_bytes else None,
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            self.compress_streaming(request, response, encoding, max_random_bytes)
+            return response
+
+        content = response.content
+        if len(content) < settings.COMPRESSION_MIN_LENGTH:
+            return response
+        start = time.perf_counter()
+        compressor = self.compressor(encoding, max_random_bytes)
+        compressed = compressor.compress(content) + compressor.finish()
+        elapsed = time.perf_counter() - start
+        if len(compressed) >= len(content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        self.set_encoding_headers(response, encoding)
+        self.record(request, encoding, len(content), len(compressed), elapsed, current=True)
+        return response
+
+    def can_compress(self, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 206, 304):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        return bool(COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')))
+
+    def compressor(self, encoding, max_random_bytes=0):
+        return get_compressor(
+            encoding,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            max_random_bytes=max_random_bytes,
+        )
+
+    def set_encoding_headers(self, response, encoding):
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            # The compressed body is no longer byte-identical to the ETag's
+            response['ETag'] = re.sub(r'^"?', 'W/"', etag, count=1)
+
+    def compress_streaming(self, request, response, encoding, max_random_bytes=0):
+        compressor = self.compressor(encoding, max_random_bytes)
+        totals = {'original': 0, 'compressed': 0, 'elapsed': 0.0}
+
+        def compress_chunk(chunk):
+            start = time.perf_counter()
+            output = compressor.compress(chunk) + compressor.flush()
+            totals['elapsed'] += time.perf_counter() - start
+            totals['original'] += len(chunk)
+            totals['compressed'] += len(output)
+            return output
+
+        def finish():
+            start = time.perf_counter()
+            output = compressor.finish()
+            totals['elapsed'] += time.perf_counter() - start
+            totals['compressed'] += len(output)
+            # Headers are long gone; only the histograms see streamed totals
+            self.record(request, encoding, totals['original'], totals['compressed'], totals['elapsed'])
+            return output
+
+        original = response.streaming_content
+        if response.is_async:
+            async def stream():
+                async for chunk in original:
+                    yield compress_chunk(chunk)
+                yield finish()
+        else:
+            def stream():
+                for chunk in original:
+                    yield compress_chunk(chunk)
+                yield finish()
+
+        response.streaming_content = stream()
+        if response.has_header('Content-Length'):
+            del response['Content-Length']
+        self.set_encoding_headers(response, encoding)
+
+    def record(self, request, encoding, original, compressed, elapsed, current=False):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        metrics.COMPRESSION_DURATION.observe(view_name, elapsed)
+        metrics.COMPRESSION_SAVED_BYTES.observe(view_name, max(original - compressed, 0))
+        stats = get_current_stats()
+        if current and stats is not None:
+            stats.compression = (encoding, original, compressed, elapsed)
+
+
+class PreloadMiddleware:
+    """
+    Adds `Link: rel=preload` / `rel=preconnect` headers for the critical
+    assets of the template a view rendered, from PRELOAD_MANIFEST
+
+    It also records which template each view renders, so
+    preload.EarlyHintsMiddleware can send the same links as 103 Early Hints
+    on the next request, before the view runs. Must sit below
+    InstrumentationMiddleware, which tracks the rendered template.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        stats = get_current_stats()
+        template_name = stats.template_name if stats else None
+        if (
+            template_name is None or response.status_code != 200
+            or not response.get('Content-Type', '').startswith('text/html')
+        ):
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        if match and request.method == 'GET':
+            remember_template(match.view_name, template_name)
+        links = link_values(template_name)
+        if links:
+            existing = response.get('Link')
+            response['Link'] = ', '.join(([existing] if existing else []) + links)
+        return response
@@ -0,0 +1,158 @@
+"""
+Resource hints for the public pages: preload/preconnect links, 103 Early
+Hints and lazy-loading attributes, all driven by PRELOAD_MANIFEST
+
+The manifest maps template names to entries; a key ending in '*' matches
+every template starting with the rest of the key:
+
+    'Client/index.html': {
+        'preconnect': [{'href': 'https://fonts.gstatic.com', 'crossorigin': True}],
+        'preload': [{'href': 'Assests/img/HeroBg.jpg', 'as': 'image', 'fetchpriority': 'high'}],
+        'eager_images': 2,
+    }
+
+Relative hrefs are static files (resolved like {% static %}); 'type',
+'crossorigin' and 'fetchpriority' are optional.
+
+- PreloadMiddleware sends the links of the template a view rendered as a
+  Link header and remembers which template that view renders
+- EarlyHintsMiddleware (ASGI) sends the same links as 103 Early Hints
+  before the view runs, once the view's template is known, when the server
+  implements the http.response.early_hint extension
+- template_loaders.Loader runs add_image_hints() on every project template:
+  <img> tags after the first `eager_images` get loading="lazy" and
+  decoding="async", images preloaded with a fetchpriority get it too
+"""
+import re
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.urls import Resolver404, resolve
+
+
+# View name -> template it rendered, learned by PreloadMiddleware
+_view_templates = {}
+
+IMG_TAG = re.compile(r'<img\b(?:\{%.*?%\}|\{\{.*?\}\}|[^>])*>', re.IGNORECASE | re.DOTALL)
+
+
+def _manifest_configs(template_name):
+    for key, config in settings.PRELOAD_MANIFEST.items():
+        if key == template_name or (key.endswith('*') and template_name.startswith(key[:-1])):
+            yield config
+
+
+def _entries(template_name, kind):
+    return [entry for config in _manifest_configs(template_name) for entry in config.get(kind, ())]
+
+
+def resolve_href(href):
+    if urlsplit(href).scheme or href.startswith('/'):
+        return href
+    return static(href)
+
+
+def link_values(template_name):
+    """Link header values (preconnects first) for a page rendered from `template_name`"""
+    links = []
+    for rel in ('preconnect', 'preload'):
+        for entry in _entries(template_name, rel):
+            parts = [f'<{resolve_href(entry["href"])}>', f'rel={rel}']
+            if 'as' in entry:
+                parts.append(f'as={entry["as"]}')
+            if 'type' in entry:
+                parts.append(f'type="{entry["type"]}"')
+            if entry.get('crossorigin'):
+                parts.append('crossorigin')
+            if 'fetchpriority' in entry:
+                parts.append(f'fetchpriority={entry["fetchpriority"]}')
+            links.append('; '.join(parts))
+    return links
+
+
+def remember_template(view_name, template_name):
+    _view_templates[view_name] = template_name
+
+
+def links_for_path(path):
+    """Links for the template the view at `path` rendered last time, if any"""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return []
+    template_name = _view_templates.get(match.view_name)
+    return link_values(template_name) if template_name else []
+
+
+# ======================================================================
+# 103 EARLY HINTS
+# ======================================================================
+
+class EarlyHintsMiddleware:
+    """
+    ASGI wrapper sending 103 Early Hints for GET requests
+
+    The browser starts fetching fonts and hero images while the view is
+    still querying the database. Servers without the
+    http.response.early_hint extension (uvicorn, daphne) are left alone.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] == 'http' and scope.get('method') == 'GET' and settings.PRELOAD_EARLY_HINTS
+            and 'http.response.early_hint' in scope.get('extensions', {})
+        ):
+            links = links_for_path(scope['path'])
+            if links:
+                await send({
+                    'type': 'http.response.early_hint',
+                    'links': [link.encode('latin-1') for link in links],
+                })
+        await self.app(scope, receive, send)
+
+
+# ======================================================================
+# IMAGE LOADING ATTRIBUTES
+# ======================================================================
+
+def add_image_hints(source, template_name):
+    """
+    Adds loading/decoding/fetchpriority attributes to the <img> tags of a
+    template source; attributes already present are kept
+    """
+    configs = list(_manifest_configs(template_name))
+    eager = next(
+        (config['eager_images'] for config in reversed(configs) if 'eager_images' in config),
+        settings.IMAGE_HINTS_EAGER_IMAGES,
+    )
+    priorities = {
+        entry['href']: entry['fetchpriority']
+        for entry in _entries(template_name, 'preload')
+        if entry.get('as') == 'image' and 'fetchpriority' in entry
+    }
+    position = 0
+
+    def hint(match):
+        nonlocal position
+        position += 1
+        tag = match.group(0)
+        attributes = []
+        priority = next((value for href, value in priorities.items() if href in tag), None)
+        if priority and 'fetchpriority=' not in tag:
+            attributes.append(f'fetchpriority="{priority}"')
+        elif position > eager and not priority:
+            if 'loading=' not in tag:
+                attributes.append('loading="lazy"')
+            if 'decoding=' not in tag:
+                attributes.append('decoding="async"')
+        if not attributes:
+            return tag
+        if tag.endswith('/>'):
+            return f'{tag[:-2].rstrip()} {" ".join(attributes)} />'
+        return f'{tag[:-1].rstrip()} {" ".join(attributes)}>'
+
+    return IMG_TAG.sub(hint, source)
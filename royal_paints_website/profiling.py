@@ -0,0 +1,313 @@
+"""
+On-demand request profiling for staff users
+
+A staff user adds `?__profile=1` to any URL to sample that one request
+(`?__profile=cprofile` runs cProfile instead), or turns on a time-boxed
+global toggle from the profiles page in the admin to profile every request
+for a few minutes. Each profile is written to PROFILING_DIR as:
+
+- <id>.json       metadata (path, view, duration, mode, sample count)
+- <id>.collapsed  collapsed stacks ("a;b;c 12" per line), the input format
+                  of flamegraph.pl, speedscope and inferno
+- <id>.prof       pstats dump (cProfile mode only; snakeviz, pstats)
+
+The directory is bounded by PROFILING_MAX_BYTES; the least recently used
+profiles (by file mtime, touched on every download) are evicted first.
+
+With PROFILING_ENABLED off the middleware removes itself at startup
+(MiddlewareNotUsed), so disabled profiling costs nothing per request.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import add_never_cache_headers
+
+
+PROFILE_PARAM = '__profile'
+TOGGLE_CACHE_KEY = 'profiling:until'
+MODES = ('sample', 'cprofile')
+
+# Process-local copy of the global toggle, re-read from the cache at most
+# every PROFILING_TOGGLE_POLL_SECONDS
+_toggle = {'until': 0.0, 'checked': 0.0}
+
+
+# ======================================================================
+# GLOBAL TOGGLE
+# ======================================================================
+
+def enable_global_profiling(seconds):
+    seconds = max(0, min(int(seconds), settings.PROFILING_TOGGLE_MAX_SECONDS))
+    until = time.time() + seconds
+    cache.set(TOGGLE_CACHE_KEY, until, seconds or None)
+    _toggle.update(until=until, checked=time.monotonic())
+    return until
+
+
+def disable_global_profiling():
+    cache.delete(TOGGLE_CACHE_KEY)
+    _toggle.update(until=0.0, checked=time.monotonic())
+
+
+def global_profiling_until():
+    """Unix time the global toggle expires at, or 0 when it is off"""
+    now = time.monotonic()
+    if now - _toggle['checked'] >= settings.PROFILING_TOGGLE_POLL_SECONDS:
+        _toggle.update(until=cache.get(TOGGLE_CACHE_KEY) or 0.0, checked=now)
+    return _toggle['until'] if _toggle['until'] > time.time() else 0.0
+
+
+# ======================================================================
+# PROFILERS
+# ======================================================================
+
+def _frame_label(code):
+    return f'{os.path.basename(code.co_filename)}:{code.co_name}'
+
+
+class StackSampler:
+    """
+    Statistical profiler: a background thread records the stack of the
+    profiled thread every PROFILING_SAMPLE_INTERVAL seconds
+
+    Only the sampling thread pays for the walk, so the request itself runs
+    at close to full speed.
+    """
+
+    mode = 'sample'
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                stack = ';'.join(reversed(labels))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+                self.samples += 1
+
+    def collapsed(self):
+        return self.stacks
+
+    def dump(self, path):
+        return False
+
+
+class DeterministicProfiler:
+    """
+    cProfile of the request (exact call counts and times, as a pstats
+    dump), with a StackSampler running alongside for the collapsed stacks
+
+    cProfile only keeps caller -> callee edges, not whole stacks, and
+    Django's middleware chain reuses the same wrapper function at every
+    level, so stacks can't be rebuilt from its data. The tracing slows all
+    of the request down evenly, so the sampled proportions still hold.
+    """
+
+    mode = 'cprofile'
+
+    def __init__(self, interval):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(interval)
+
+    @property
+    def samples(self):
+        return self.sampler.samples
+
+    def start(self):
+        self.sampler.start()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.sampler.stop()
+
+    def collapsed(self):
+        return self.sampler.collapsed()
+
+    def dump(self, path):
+        self.profiler.dump_stats(path)
+        return True
+
+
+def make_profiler(mode):
+    if mode == 'cprofile':
+        return DeterministicProfiler(settings.PROFILING_SAMPLE_INTERVAL)
+    return StackSampler(settings.PROFILING_SAMPLE_INTERVAL)
+
+
+# ======================================================================
+# PROFILE STORE
+# ======================================================================
+
+class ProfileStore:
+    """Size-bounded directory of profiles with least-recently-used eviction"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or settings.PROFILING_DIR
+        self.max_bytes = settings.PROFILING_MAX_BYTES if max_bytes is None else max_bytes
+
+    def path(self, profile_id, suffix):
+        return os.path.join(self.directory, f'{profile_id}.{suffix}')
+
+    def save(self, profiler, meta):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        stacks = profiler.collapsed()
+        with open(self.path(profile_id, 'collapsed'), 'w', encoding='utf-8') as handle:
+            for stack, value in sorted(stacks.items(), key=lambda item: -item[1]):
+                handle.write(f'{stack} {value}\n')
+        has_pstats = profiler.dump(self.path(profile_id, 'prof'))
+        meta = dict(meta, id=profile_id, mode=profiler.mode, samples=profiler.samples,
+                    stacks=len(stacks), pstats=has_pstats, created_at=time.time())
+        # Metadata last: a profile is listed only once all its files exist
+        with open(self.path(profile_id, 'json'), 'w', encoding='utf-8') as handle:
+            json.dump(meta, handle)
+        self.evict()
+        return profile_id
+
+    def _files(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((name, stat))
+        return files
+
+    def evict(self):
+        """Deletes least recently used profiles until the directory fits"""
+        groups = {}
+        for name, stat in self._files():
+            profile_id = name.rsplit('.', 1)[0]
+            size, last_used = groups.get(profile_id, (0, 0.0))
+            groups[profile_id] = (size + stat.st_size, max(last_used, stat.st_mtime))
+        total = sum(size for size, _ in groups.values())
+        evicted = []
+        for profile_id, (size, _) in sorted(groups.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for suffix in ('json', 'collapsed', 'prof'):
+                try:
+                    os.remove(self.path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+            total -= size
+            evicted.append(profile_id)
+        return evicted
+
+    def list(self):
+        profiles = []
+        for name, _ in self._files():
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as handle:
+                    profiles.append(json.load(handle))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda meta: meta['created_at'], reverse=True)
+
+    def open(self, profile_id, suffix):
+        """Opens one profile file for download and marks it recently used"""
+        path = self.path(os.path.basename(profile_id), suffix)
+        handle = open(path, 'rb')
+        now = time.time()
+        for other in ('json', 'collapsed', 'prof'):
+            try:
+                os.utime(self.path(os.path.basename(profile_id), other), (now, now))
+            except FileNotFoundError:
+                pass
+        return handle
+
+
+# ======================================================================
+# MIDDLEWARE
+# ======================================================================
+
+class ProfilingMiddleware:
+    """
+    Profiles requests from staff users that carry `?__profile=1` (or
+    `=cprofile`), and every request while the global toggle is on
+
+    Sits right after AuthenticationMiddleware so request.user is known; the
+    profile covers the remaining middleware, the view and template
+    rendering. Profiled responses get an X-Profile-Id header and are never
+    cached.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        profiler = make_profiler(mode)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        profile_id = ProfileStore().save(profiler, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else 'unresolved',
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'user': user.get_username() if user is not None and user.is_authenticated else '',
+        })
+        response['X-Profile-Id'] = profile_id
+        add_never_cache_headers(response)
+        return response
+
+    def requested_mode(self, request):
+        # Plain substring test first: no query string parsing per request
+        if PROFILE_PARAM in request.META.get('QUERY_STRING', '') and PROFILE_PARAM in request.GET:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_active and user.is_staff:
+                value = request.GET[PROFILE_PARAM]
+                return value if value in MODES else 'sample'
+        if global_profiling_until() and not request.path.startswith(settings.PROFILING_EXCLUDE_PREFIXES):
+            return 'sample'
+        return None
@@ -1,20 +1,60 @@
 from pathlib import Path
 import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-# Quick-start development settings - unsuitable for production
+# Environment helpers - every deploy-specific value can be overridden
+# through environment variables without editing this file
+def env(name, default=None):
+    return os.environ.get(name, default)
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def env_list(name, default=''):
+    return [item.strip() for item in os.environ.get(name, default).split(',') if item.strip()]
+
+
+# True while running `manage.py test`
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+
+# Deployment profile. DJANGO_ENV=production turns DEBUG off, requires
+# DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS, and switches on the secure
+# cookie, TLS proxy and hashed static file defaults further down; each of
+# those can still be overridden on its own.
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+DJANGO_ENV = env('DJANGO_ENV', 'development')
+PRODUCTION = DJANGO_ENV == 'production'
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-ekl2udwz5bqp=%mbinz32-ni8_&1at#5xb6_$d-fy3x#!4or9s'
+SECRET_KEY = env(
+    'DJANGO_SECRET_KEY',
+    '' if PRODUCTION else 'django-insecure-ekl2udwz5bqp=%mbinz32-ni8_&1at#5xb6_$d-fy3x#!4or9s',
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool('DJANGO_DEBUG', not PRODUCTION)
 
-ALLOWED_HOSTS = ['*']
+ALLOWED_HOSTS = env_list('DJANGO_ALLOWED_HOSTS', '' if PRODUCTION else '*')
+
+if PRODUCTION and not (SECRET_KEY and ALLOWED_HOSTS):
+    raise ImproperlyConfigured('DJANGO_ENV=production needs DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS')
 
 
 # Application definition
@@ -37,22 +77,34 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'royal_paints_website.logs.CorrelationIdMiddleware',
+    'royal_paints_website.middleware.InstrumentationMiddleware',
+    'royal_paints_website.middleware.CompressionMiddleware',
+    'royal_paints_website.middleware.PreloadMiddleware',
+    'royal_paints_website.cdn.SurrogateKeyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'royal_paints_website.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'royal_paints_website.db.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'royal_paints_website.urls'
 
+# The project's HTML templates are rewritten once, when they are loaded (see
+# royal_paints_website.template_loaders): minified, and below-the-fold
+# <img> tags get loading="lazy". Third-party app templates are left as is.
+HTML_MINIFY_TEMPLATES = env_bool('HTML_MINIFY_TEMPLATES', True)
+TEMPLATE_IMAGE_HINTS = env_bool('TEMPLATE_IMAGE_HINTS', True)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'Frontend')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -60,6 +112,12 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'royal_paints_website.template_loaders.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -70,20 +128,435 @@ ASGI_APPLICATION = 'royal_paints_website.asgi.application'
 
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'royalpai_database',
-        'USER': 'royalpai_user',
-        'PASSWORD': 'admin@1200',
-        'HOST': 'localhost',
-        'PORT': '3306',
+# ======================================================================
+# DATABASE CONFIGURATION
+# ======================================================================
+# DB_ENGINE accepts any Django engine path; the short names below map to
+# the engines this project supports. Tests default to SQLite.
+DB_ENGINES = {
+    'mysql': 'django.db.backends.mysql',
+    'mysql_pool': 'royal_paints_website.db.mysql_pool',
+    'sqlite': 'django.db.backends.sqlite3',
+}
+DB_ENGINE = env('DB_ENGINE', 'sqlite' if TESTING else 'mysql')
+DB_POOL_SIZE = env_int('DB_POOL_SIZE', 0)
+if DB_ENGINE == 'mysql' and DB_POOL_SIZE > 0:
+    DB_ENGINE = 'mysql_pool'
+DB_ENGINE = DB_ENGINES.get(DB_ENGINE, DB_ENGINE)
+
+
+def database_config(host, name=None):
+    """
+    Builds one DATABASES entry from the DB_* environment variables
+
+    Persistent connections (CONN_MAX_AGE) keep the MySQL handshake and the
+    sql_mode init_command out of the request path, and CONN_HEALTH_CHECKS
+    drops connections the server closed while they were idle.
+    """
+    if DB_ENGINE == DB_ENGINES['sqlite']:
+        return {
+            'ENGINE': DB_ENGINE,
+            'NAME': name or env('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        }
+
+    config = {
+        'ENGINE': DB_ENGINE,
+        'NAME': name or env('DB_NAME', 'royalpai_database'),
+        'USER': env('DB_USER', 'royalpai_user'),
+        'PASSWORD': env('DB_PASSWORD', 'admin@1200'),
+        'HOST': host,
+        'PORT': env('DB_PORT', '3306'),
+        'CONN_MAX_AGE': env_int('DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', True),
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            'connect_timeout': env_int('DB_CONNECT_TIMEOUT', 5),
         },
     }
+    if DB_ENGINE == DB_ENGINES['mysql_pool']:
+        config['POOL_SIZE'] = DB_POOL_SIZE or 10
+    return config
+
+
+DATABASES = {
+    'default': database_config(env('DB_HOST', 'localhost')),
+}
+
+# Read replicas: DB_REPLICA_HOSTS=10.0.0.2,10.0.0.3 adds replica_1, replica_2.
+# Under test they mirror the primary so fixtures stay visible.
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(env_list('DB_REPLICA_HOSTS'), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = database_config(replica_host)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+# DB_REPLICA_WEIGHTS=3,1 sends three times more reads to replica_1; a
+# weight of 0 takes a replica out of rotation
+DATABASE_REPLICA_WEIGHTS = dict(zip(
+    DATABASE_REPLICAS, [int(weight) for weight in env_list('DB_REPLICA_WEIGHTS')]
+))
+# Seconds an unreachable replica is skipped before it is tried again
+DATABASE_REPLICA_RETRY_SECONDS = env_int('DB_REPLICA_RETRY_SECONDS', 30)
+# Seconds a client reads from the primary after saving a blog or carrier
+DATABASE_PRIMARY_PIN_SECONDS = env_int('DB_PRIMARY_PIN_SECONDS', 10)
+
+if TESTING and not DATABASE_REPLICAS:
+    # Independent SQLite stand-in for the routing tests; only used by
+    # tests that list it in DATABASE_REPLICAS
+    DATABASES['replica_1'] = database_config(None, name=os.path.join(BASE_DIR, 'replica.sqlite3'))
+
+DATABASE_ROUTERS = ['royal_paints_website.db.routers.PrimaryReplicaRouter']
+
+
+# ======================================================================
+# CACHE CONFIGURATION
+# ======================================================================
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = CACHE_BACKENDS.get(env('CACHE_BACKEND', 'locmem'), env('CACHE_BACKEND'))
+CACHE_LOCATION = env('CACHE_LOCATION', '')
+# Sessions need their own server/database/directory, e.g.
+# CACHE_LOCATION=redis://cache:6379/0 SESSION_CACHE_LOCATION=redis://cache:6379/1:
+# cache.clear() flushes the whole location, key prefixes included
+SESSION_CACHE_LOCATION = env('SESSION_CACHE_LOCATION', CACHE_LOCATION)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION or 'royal-paints-default',
+        'KEY_PREFIX': 'rp',
+    },
+    # Separate alias so flushing page/content caches never logs staff out,
+    # as long as SESSION_CACHE_LOCATION differs from CACHE_LOCATION
+    'sessions': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': SESSION_CACHE_LOCATION or 'royal-paints-sessions',
+        'KEY_PREFIX': 'rp-session',
+    },
+}
+# Parallel requests of `manage.py warm_cache`
+CACHE_WARM_CONCURRENCY = env_int('CACHE_WARM_CONCURRENCY', 4)
+# Public URL `manage.py warm_cache` goes through (nginx/the CDN); empty
+# renders in-process, which only helps with a shared CACHE_BACKEND
+CACHE_WARM_BASE_URL = env('CACHE_WARM_BASE_URL', '')
+# Run by royal_paints_website.warmup before workers fork, after URLs and
+# templates are loaded
+WARM_UP_CALLABLES = ['baseapp.service_worker.precache_urls']
+
+
+# ======================================================================
+# SESSIONS AND MESSAGES
+# ======================================================================
+# 'cached_db' reads sessions from cache and writes through to the DB,
+# 'cache' keeps them in cache only (fastest, lost on cache eviction)
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_ENGINE = SESSION_ENGINES.get(env('SESSION_ENGINE', 'cached_db'), env('SESSION_ENGINE'))
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_SAVE_EVERY_REQUEST = False
+
+# Flash messages travel in a signed cookie instead of the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# ======================================================================
+# INSTRUMENTATION
+# ======================================================================
+# Server-Timing header with db/template/total durations on every response
+INSTRUMENTATION_SERVER_TIMING = env_bool('INSTRUMENTATION_SERVER_TIMING', True)
+# URL name -> max queries; overrides budgets declared with @query_budget
+QUERY_BUDGETS = {}
+# Raise instead of logging when a view exceeds its query budget
+QUERY_BUDGET_STRICT = env_bool('QUERY_BUDGET_STRICT', TESTING)
+# The Prometheus metrics endpoint needs a staff session or this bearer
+# token (empty: staff only), and then also a client address from the
+# list (empty: any). Behind a local proxy every client is 127.0.0.1, so
+# the address check alone is no protection.
+METRICS_TOKEN = env('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = env_list('METRICS_ALLOWED_IPS', '127.0.0.1,::1')
+
+
+# ======================================================================
+# LOGGING
+# ======================================================================
+# JSON lines with the request's correlation id, written by a background
+# thread (see royal_paints_website.logs). LOG_FILE unset logs to stderr.
+LOG_LEVEL = env('LOG_LEVEL', 'CRITICAL' if TESTING else 'INFO')
+LOG_FILE = env('LOG_FILE', '')
+LOG_QUEUE_SIZE = env_int('LOG_QUEUE_SIZE', 10000)
+# View name -> share of requests whose INFO/DEBUG lines (access log
+# included) are kept; warnings and errors are always logged
+LOG_SAMPLE_RATES = {
+    'index_page': 0.1,
+    'blogs_page': 0.1,
+    'blog_detail': 0.1,
+    'service_worker': 0.01,
+    'metrics_view': 0.01,
 }
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {'()': 'royal_paints_website.logs.RequestContextFilter'},
+        'sampling': {'()': 'royal_paints_website.logs.SamplingFilter'},
+    },
+    'handlers': {
+        'queue': {
+            '()': 'royal_paints_website.logs.QueueHandler',
+            'target': LOG_FILE or 'stream',
+            'queue_size': LOG_QUEUE_SIZE,
+            'level': LOG_LEVEL,
+            # Handler filters run in the thread that logs, where the
+            # request context is set
+            'filters': ['request_context', 'sampling'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        # Through the queue as JSON instead of Django's plain console handler
+        'django': {'handlers': [], 'level': 'INFO'},
+    },
+}
+
+
+# ======================================================================
+# ON-DEMAND PROFILING
+# ======================================================================
+# Staff add ?__profile=1 (sampling) or ?__profile=cprofile to a URL, or
+# switch on the time-boxed global toggle at /admin/profiles/. Off removes
+# the middleware entirely; see royal_paints_website.profiling.
+PROFILING_ENABLED = env_bool('PROFILING_ENABLED', True)
+PROFILING_DIR = env('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+# Least recently used profiles are deleted beyond this size
+PROFILING_MAX_BYTES = env_int('PROFILING_MAX_BYTES', 50 * 1024 * 1024)
+PROFILING_SAMPLE_INTERVAL = env_int('PROFILING_SAMPLE_INTERVAL_MS', 2) / 1000
+PROFILING_TOGGLE_MAX_SECONDS = env_int('PROFILING_TOGGLE_MAX_SECONDS', 15 * 60)
+# How often each worker re-reads the global toggle from the cache
+PROFILING_TOGGLE_POLL_SECONDS = 0 if TESTING else env_int('PROFILING_TOGGLE_POLL_SECONDS', 2)
+# Never profiled by the global toggle
+PROFILING_EXCLUDE_PREFIXES = ('/admin/profiles/', '/admin/metrics/', '/admin/live-updates/', '/static/', '/media/')
+
+
+# ======================================================================
+# RESPONSE COMPRESSION
+# ======================================================================
+# Brotli is used when the optional `brotli` package is installed, gzip
+# otherwise. Levels are tuned for per-request (not offline) compression.
+COMPRESSION_MIN_LENGTH = env_int('COMPRESSION_MIN_LENGTH', 512)
+COMPRESSION_GZIP_LEVEL = env_int('COMPRESSION_GZIP_LEVEL', 6)
+COMPRESSION_BROTLI_QUALITY = env_int('COMPRESSION_BROTLI_QUALITY', 5)
+# Upper bound of the random filler added to gzipped responses that carry a
+# CSRF token (BREACH mitigation, as in Django's GZipMiddleware)
+COMPRESSION_BREACH_RANDOM_BYTES = env_int('COMPRESSION_BREACH_RANDOM_BYTES', 100)
+
+
+# ======================================================================
+# RESOURCE HINTS
+# ======================================================================
+# Template name -> critical assets sent as `Link: rel=preload` headers (and
+# 103 Early Hints under an ASGI server that supports them). A key ending
+# in '*' matches by prefix. Static paths go through {% static %}; see
+# royal_paints_website.preload for the entry format.
+PRELOAD_MANIFEST = {
+    'Client/*': {
+        'preconnect': [
+            {'href': 'https://fonts.googleapis.com'},
+            {'href': 'https://fonts.gstatic.com', 'crossorigin': True},
+            {'href': 'https://cdnjs.cloudflare.com', 'crossorigin': True},
+        ],
+        'preload': [
+            {
+                'href': 'https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700;800&display=swap',
+                'as': 'style',
+            },
+            {
+                'href': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/webfonts/fa-solid-900.woff2',
+                'as': 'font', 'type': 'font/woff2', 'crossorigin': True,
+            },
+            {'href': 'Assests/img/RedLogo.png', 'as': 'image'},
+        ],
+    },
+    'Client/index.html': {
+        'preload': [{'href': 'Assests/img/HeroBg.jpg', 'as': 'image', 'fetchpriority': 'high'}],
+        'eager_images': 2,
+    },
+    # Logo plus both branches of the {% if image %} around the header image
+    'Client/blog_detail.html': {'eager_images': 3},
+    'Client/carrier_detail.html': {'eager_images': 3},
+}
+PRELOAD_EARLY_HINTS = env_bool('PRELOAD_EARLY_HINTS', True)
+# Leading <img> tags of a template left eager (the navbar logo); later ones
+# get loading="lazy" unless the manifest's 'eager_images' says otherwise
+IMAGE_HINTS_EAGER_IMAGES = 1
+# Eagerness of the speculation rules that prefetch blog and career detail
+# pages ('conservative' = on press, 'moderate' = on hover, 'eager')
+PREFETCH_EAGERNESS = env('PREFETCH_EAGERNESS', 'moderate')
+
+
+# ======================================================================
+# SHARED CACHE (NGINX/CDN)
+# ======================================================================
+# Public pages are tagged with Surrogate-Key/Cache-Tag headers and purged
+# by key after blog/career saves and deletes (royal_paints_website.cdn)
+CDN_CACHE_SECONDS = env_int('CDN_CACHE_SECONDS', 300)
+CDN_STALE_SECONDS = env_int('CDN_STALE_SECONDS', 86400)
+CDN_PURGERS = {
+    'http': 'royal_paints_website.cdn.HTTPPurger',
+    'log': 'royal_paints_website.cdn.LoggingPurger',
+}
+# Short name above or dotted path; empty disables purging. The options are
+# passed to the purger class as keyword arguments.
+CDN_PURGER = env('CDN_PURGER', '')
+CDN_PURGER_OPTIONS = {
+    'url': env('CDN_PURGE_URL', ''),
+    'token': env('CDN_PURGE_TOKEN'),
+    # Cloudflare expects 'tags'
+    'body_key': env('CDN_PURGE_BODY_KEY', 'keys'),
+}
+# Purges wait for this many quiet seconds (0 = manual flush_purges())
+CDN_PURGE_DEBOUNCE_SECONDS = 0 if TESTING else env_int('CDN_PURGE_DEBOUNCE_SECONDS', 2)
+CDN_PURGE_MAX_WAIT_SECONDS = env_int('CDN_PURGE_MAX_WAIT_SECONDS', 30)
+CDN_PURGE_BATCH_SIZE = env_int('CDN_PURGE_BATCH_SIZE', 256)
+
+
+# ======================================================================
+# SERVICE WORKER
+# ======================================================================
+# /service-worker.js is rendered by baseapp.views.service_worker. Static
+# files matching these patterns are precached at install; public pages are
+# served stale-while-revalidate from a cache versioned by the blog and
+# career content (backend.content_version).
+SERVICE_WORKER_PRECACHE = [
+    'Assests/js/site/*.js',
+    'Assests/img/RedLogo.png',
+    'Logo/Logo.jpg',
+]
+# URL names of the pages cached stale-while-revalidate
+SERVICE_WORKER_PAGES = ['index_page', 'blogs_page', 'blog_detail', 'carriers_page', 'carrier_detail']
+# Third-party origins (Tailwind runtime, icons, fonts) cached the same way
+SERVICE_WORKER_RUNTIME_ORIGINS = [
+    'https://cdn.tailwindcss.com',
+    'https://cdnjs.cloudflare.com',
+    'https://fonts.googleapis.com',
+    'https://fonts.gstatic.com',
+]
+# Uploaded images kept in the runtime cache (oldest are dropped first)
+SERVICE_WORKER_MAX_MEDIA_ENTRIES = 60
+# Paths the worker never intercepts
+SERVICE_WORKER_BYPASS = ['/admin/', '/roayladmin/']
+
+
+# ======================================================================
+# BLOG POPULARITY AND NAVIGATION
+# ======================================================================
+# Buffered blog views are written to the DB this often (0 = manual flush)
+BLOG_VIEW_FLUSH_SECONDS = env_int('BLOG_VIEW_FLUSH_SECONDS', 0 if TESTING else 30)
+BLOG_POPULARITY_HALF_LIFE_HOURS = env_int('BLOG_POPULARITY_HALF_LIFE_HOURS', 72)
+BLOG_POPULAR_LIMIT = 5
+BLOG_POPULAR_CACHE_SECONDS = 10 * 60
+# Related posts precomputed per blog by backend.related_posts
+BLOG_RELATED_LIMIT = 3
+
+
+# ======================================================================
+# BACKGROUND JOBS
+# ======================================================================
+# Jobs are rows in backend_jobmodel processed by `manage.py run_workers`.
+# Eager mode runs them in the web process right after commit instead.
+JOB_QUEUE_EAGER = env_bool('JOB_QUEUE_EAGER', False)
+JOB_WORKER_CONCURRENCY = env_int('JOB_WORKER_CONCURRENCY', 2)
+JOB_MAX_ATTEMPTS = env_int('JOB_MAX_ATTEMPTS', 3)
+JOB_RETRY_BACKOFF = env_int('JOB_RETRY_BACKOFF', 0 if TESTING else 30)
+JOB_LOCK_TIMEOUT = env_int('JOB_LOCK_TIMEOUT', 15 * 60)
+# Running jobs refresh their lock this often, well inside JOB_LOCK_TIMEOUT
+JOB_HEARTBEAT_INTERVAL = env_int('JOB_HEARTBEAT_INTERVAL', JOB_LOCK_TIMEOUT // 3)
+JOB_KEEP_DONE_SECONDS = env_int('JOB_KEEP_DONE_SECONDS', 7 * 24 * 3600)
+# Job name -> seconds between runs, scheduled by run_workers
+JOB_PERIODIC = {
+    'rebuild_related_posts': 24 * 3600,
+    'purge_trash': 24 * 3600,
+}
+DASHBOARD_COUNTS_CACHE_SECONDS = 10 * 60
+
+
+# ======================================================================
+# LIVE DASHBOARD UPDATES (SERVER-SENT EVENTS)
+# ======================================================================
+# New contacts and counter changes pushed to open admin pages; see
+# backend.live_updates. Events fan out across workers through the cache.
+LIVE_UPDATES_MAX_CLIENTS = env_int('LIVE_UPDATES_MAX_CLIENTS', 200)
+# Events buffered per client before it is told to resync instead
+LIVE_UPDATES_QUEUE_SIZE = env_int('LIVE_UPDATES_QUEUE_SIZE', 50)
+LIVE_UPDATES_HEARTBEAT_SECONDS = env_int('LIVE_UPDATES_HEARTBEAT_SECONDS', 15)
+# Streams are closed after this long; browsers reconnect with Last-Event-ID
+LIVE_UPDATES_MAX_SECONDS = env_int('LIVE_UPDATES_MAX_SECONDS', 5 * 60)
+# The same under WSGI, where a stream holds a worker: keep it below
+# GUNICORN_TIMEOUT or the sync worker is killed mid-stream
+LIVE_UPDATES_WSGI_MAX_SECONDS = env_int('LIVE_UPDATES_WSGI_MAX_SECONDS', 20)
+LIVE_UPDATES_RETRY_MS = env_int('LIVE_UPDATES_RETRY_MS', 3000)
+LIVE_UPDATES_POLL_SECONDS = env_int('LIVE_UPDATES_POLL_SECONDS', 1)
+LIVE_UPDATES_EVENT_TTL = env_int('LIVE_UPDATES_EVENT_TTL', 10 * 60)
+# Most events replayed to a reconnecting client
+LIVE_UPDATES_REPLAY = env_int('LIVE_UPDATES_REPLAY', 100)
+
+
+# ======================================================================
+# EMAIL AND CONTACT NOTIFICATIONS
+# ======================================================================
+EMAIL_BACKENDS = {
+    'smtp': 'django.core.mail.backends.smtp.EmailBackend',
+    'console': 'django.core.mail.backends.console.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+    'locmem': 'django.core.mail.backends.locmem.EmailBackend',
+}
+EMAIL_BACKEND = EMAIL_BACKENDS.get(env('EMAIL_BACKEND', 'smtp'), env('EMAIL_BACKEND'))
+EMAIL_FILE_PATH = env('EMAIL_FILE_PATH', os.path.join(BASE_DIR, 'sent_emails'))
+EMAIL_HOST = env('EMAIL_HOST', 'localhost')
+EMAIL_PORT = env_int('EMAIL_PORT', 25)
+EMAIL_HOST_USER = env('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = env_bool('EMAIL_USE_TLS', False)
+EMAIL_TIMEOUT = env_int('EMAIL_TIMEOUT', 10)
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', 'noreply@royalpaints.com')
+EMAIL_SUBJECT_PREFIX = '[Royal Paints] '
+
+# New contact messages are emailed to these addresses in digests sent by the
+# send_contact_digest background job (empty = no notifications)
+CONTACT_NOTIFY_RECIPIENTS = env_list('CONTACT_NOTIFY_RECIPIENTS', '')
+CONTACT_NOTIFY_DIGEST_SIZE = env_int('CONTACT_NOTIFY_DIGEST_SIZE', 20)
+# Seconds between digest runs (0 = manual flush)
+CONTACT_NOTIFY_DIGEST_SECONDS = env_int('CONTACT_NOTIFY_DIGEST_SECONDS', 0 if TESTING else 60)
+if CONTACT_NOTIFY_RECIPIENTS and CONTACT_NOTIFY_DIGEST_SECONDS:
+    JOB_PERIODIC['send_contact_digest'] = CONTACT_NOTIFY_DIGEST_SECONDS
+CONTACT_NOTIFY_RETRIES = env_int('CONTACT_NOTIFY_RETRIES', 3)
+CONTACT_NOTIFY_RETRY_BACKOFF = env_int('CONTACT_NOTIFY_RETRY_BACKOFF', 0 if TESTING else 2)
+
+
+# ======================================================================
+# CONTACT RETENTION
+# ======================================================================
+# Contact messages older than this are moved out of the hot table by
+# `manage.py archive_contacts` (archive table or gzip JSONL files)
+CONTACT_RETENTION_DAYS = env_int('CONTACT_RETENTION_DAYS', 180)
+CONTACT_ARCHIVE_DIR = env('CONTACT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive', 'contacts'))
+# Blogs, careers and contact messages deleted in the admin stay in the
+# trash this long before the daily `purge_trash` job removes them and their
+# images (backend.trash); rows are deleted TRASH_PURGE_BATCH_SIZE at a time
+TRASH_RETENTION_DAYS = env_int('TRASH_RETENTION_DAYS', 30)
+TRASH_PURGE_BATCH_SIZE = env_int('TRASH_PURGE_BATCH_SIZE', 500)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -104,6 +577,20 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Email login goes through the indexed UserEmailModel table; ModelBackend
+# keeps username login working for the Django admin
+AUTHENTICATION_BACKENDS = [
+    'backend.auth_backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Failed logins are counted in the cache; attempts beyond these limits are
+# rejected before any password hashing
+LOGIN_LOCKOUT_ACCOUNT_ATTEMPTS = env_int('LOGIN_LOCKOUT_ACCOUNT_ATTEMPTS', 5)
+LOGIN_LOCKOUT_IP_ATTEMPTS = env_int('LOGIN_LOCKOUT_IP_ATTEMPTS', 50)
+LOGIN_LOCKOUT_SECONDS = env_int('LOGIN_LOCKOUT_SECONDS', 15 * 60)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -125,6 +612,17 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Content-hashed file names (staticfiles.json, written by collectstatic) let
+# the CDN, browsers and the service worker cache static files forever
+STATIC_MANIFEST = env_bool('STATIC_MANIFEST', PRODUCTION)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage' if STATIC_MANIFEST
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 
 # Media files
 MEDIA_URL = '/media/'
@@ -137,16 +635,28 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Local directory that image paths in bulk content imports are relative to
+CONTENT_IMPORT_IMAGE_ROOT = env('CONTENT_IMPORT_IMAGE_ROOT')
+
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 FILE_UPLOAD_TEMP_DIR = None  # Use default temp directory
 
 
-# CSRF settings
-CSRF_COOKIE_SECURE = False  
+# CSRF and HTTPS settings
+CSRF_COOKIE_SECURE = env_bool('CSRF_COOKIE_SECURE', PRODUCTION)
 CSRF_COOKIE_HTTPONLY = True
-CSRF_TRUSTED_ORIGINS = [
-    'http://localhost:8000',
-    'http://127.0.0.1:8000'
-]
+CSRF_TRUSTED_ORIGINS = env_list('CSRF_TRUSTED_ORIGINS', 'http://localhost:8000,http://127.0.0.1:8000')
+SESSION_COOKIE_SECURE = env_bool('SESSION_COOKIE_SECURE', PRODUCTION)
+# nginx terminates TLS and forwards the original scheme
+BEHIND_TLS_PROXY = env_bool('BEHIND_TLS_PROXY', PRODUCTION)
+if BEHIND_TLS_PROXY:
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+# Behind the proxy REMOTE_ADDR is the proxy itself; the client address is
+# read from this header instead, counting TRUSTED_PROXY_COUNT entries from
+# the right (each trusted proxy appends the address it saw). An empty
+# header keeps the login lockout per account only.
+TRUSTED_PROXY_HEADER = env('TRUSTED_PROXY_HEADER', 'HTTP_X_FORWARDED_FOR' if BEHIND_TLS_PROXY else '')
+TRUSTED_PROXY_COUNT = env_int('TRUSTED_PROXY_COUNT', 1)
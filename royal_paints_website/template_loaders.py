@@ -0,0 +1,33 @@
+"""
+Project template loader
+
+Reads templates from TEMPLATES['DIRS'] like the filesystem loader and
+rewrites .html sources before they are compiled:
+- image loading attributes (preload.add_image_hints) when
+  TEMPLATE_IMAGE_HINTS is on
+- minification (html_minify.minify_html) when HTML_MINIFY_TEMPLATES is on
+
+Wrapped in the cached loader, that happens once per template per process
+instead of on every response.
+"""
+from django.conf import settings
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+
+from .html_minify import minify_html
+from .preload import add_image_hints
+
+
+HTML_EXTENSIONS = ('.html', '.htm')
+
+
+class Loader(FilesystemLoader):
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if not origin.name.endswith(HTML_EXTENSIONS):
+            return contents
+        if settings.TEMPLATE_IMAGE_HINTS:
+            contents = add_image_hints(contents, origin.template_name)
+        if settings.HTML_MINIFY_TEMPLATES:
+            contents = minify_html(contents)
+        return contents
@@ -31,6 +31,8 @@ urlpatterns = [
     path('', include('baseapp.routes')),
 ]
 
+# Development only, and only here: the app route modules are included
+# under prefixes, so static() routes there were duplicates at odd URLs
 if settings.DEBUG:
     # Serve media files
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,157 @@
+"""
+Process warm-up: the work a fresh worker would otherwise do during its
+first requests
+
+warm_up() imports every URL module and view and builds the URL
+resolver's lookup tables, compiles every template under TEMPLATES['DIRS']
+into the cached loader, runs the WARM_UP_CALLABLES and checks that each
+database answers. gunicorn.conf.py runs it once in the master process
+(preload_app) so forked workers inherit the result.
+
+Run as a script, it measures one cold start for `manage.py benchmark
+--suite startup`:
+
+    python -m royal_paints_website.warmup [--warm] [--path /blogs/]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.js', '.txt', '.xml')
+
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def load_urls():
+    from django.urls import get_resolver
+
+    # Imports the URL modules (and with them every view) and compiles
+    # the patterns while building the reverse lookup tables
+    get_resolver().reverse_dict
+
+
+def compile_templates():
+    """
+    Compiles every template file of the DjangoTemplates engines' DIRS
+
+    Returns:
+        (int, list): templates compiled, names that failed to compile
+    """
+    from django.template import TemplateSyntaxError, engines
+
+    compiled, failed = 0, []
+    for engine in engines.all():
+        for directory in getattr(engine, 'dirs', ()):
+            for root, _, files in os.walk(directory):
+                for filename in sorted(files):
+                    if not filename.endswith(TEMPLATE_EXTENSIONS):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                    try:
+                        engine.get_template(name)
+                        compiled += 1
+                    except TemplateSyntaxError:
+                        logger.exception('Template %s does not compile', name)
+                        failed.append(name)
+    return compiled, failed
+
+
+def open_connections():
+    """
+    Connects every configured database in this thread
+
+    Returns:
+        list: aliases that could not be reached
+    """
+    from django.db import DatabaseError, connections
+
+    unreachable = []
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            logger.warning('Database %s is unreachable during warm-up', alias, exc_info=True)
+            unreachable.append(alias)
+    return unreachable
+
+
+def warm_up(connect=True):
+    """
+    Loads URLs, views and templates and connects the databases
+
+    Args:
+        connect: also open (and check) the database connections. Close
+            them before forking; sockets must not be shared by processes.
+
+    Returns:
+        dict: per-step timings and counts
+    """
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    report = {}
+    start = time.perf_counter()
+    load_urls()
+    report['urls_ms'] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    report['templates'], report['template_errors'] = compile_templates()
+    report['templates_ms'] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    for path in settings.WARM_UP_CALLABLES:
+        import_string(path)()
+    report['callables_ms'] = _elapsed_ms(start)
+
+    if connect:
+        start = time.perf_counter()
+        report['unreachable_databases'] = open_connections()
+        report['databases_ms'] = _elapsed_ms(start)
+    return report
+
+
+# ======================================================================
+# COLD START PROBE
+# ======================================================================
+
+def probe_startup(path='/', warm=False):
+    """
+    Times one cold start of this (fresh) interpreter: importing the WSGI
+    application, optionally warm_up(), then two requests to `path`
+    """
+    start = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'royal_paints_website.settings')
+    from royal_paints_website.wsgi import application  # noqa: F401  (the import is what is timed)
+    report = {'path': path, 'warm': warm, 'import_ms': _elapsed_ms(start)}
+
+    from django.test import Client
+    from backend.cache_warmer import default_host
+
+    if warm:
+        start = time.perf_counter()
+        warm_up()
+        report['warm_up_ms'] = _elapsed_ms(start)
+
+    client = Client(HTTP_HOST=default_host(), HTTP_X_CACHE_WARM='1')
+    for key in ('first_request_ms', 'second_request_ms'):
+        start = time.perf_counter()
+        status = client.get(path).status_code
+        report[key] = _elapsed_ms(start)
+        if status >= 400:
+            report['status'] = status
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures one cold start and prints it as JSON')
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--warm', action='store_true', help='Run warm_up() before the first request')
+    arguments = parser.parse_args()
+    print(json.dumps(probe_startup(arguments.path, arguments.warm)))
@@ -0,0 +1,50 @@
+/*
+ * Row selection and bulk actions for the admin tables (backend.trash).
+ *
+ * A <form data-bulk-form id="..."> holds the action buttons
+ * (name="bulk_action"). Row checkboxes (name="selected") belong to it
+ * through their form="..." attribute, so they can sit in the table while
+ * the table keeps its other forms; [data-bulk-all="<form id>"] selects
+ * every row. Action buttons stay disabled until a row is selected, and
+ * buttons with data-confirm ("{count}" is replaced) ask first.
+ */
+document.querySelectorAll('form[data-bulk-form]').forEach((form) => {
+    const boxes = () => [...document.querySelectorAll(`input[name="selected"][form="${form.id}"]`)];
+    const selectAll = document.querySelector(`[data-bulk-all="${form.id}"]`);
+    const count = form.querySelector('[data-bulk-count]');
+    const buttons = form.querySelectorAll('button[name="bulk_action"]');
+
+    function update() {
+        const all = boxes();
+        const selected = all.filter((box) => box.checked).length;
+        count.textContent = selected;
+        buttons.forEach((button) => {
+            button.disabled = selected === 0;
+        });
+        if (selectAll) {
+            selectAll.checked = selected > 0 && selected === all.length;
+            selectAll.indeterminate = selected > 0 && selected < all.length;
+        }
+    }
+
+    document.addEventListener('change', (event) => {
+        if (event.target.matches(`input[name="selected"][form="${form.id}"]`)) {
+            update();
+        }
+    });
+    if (selectAll) {
+        selectAll.addEventListener('change', () => {
+            boxes().forEach((box) => {
+                box.checked = selectAll.checked;
+            });
+            update();
+        });
+    }
+    form.addEventListener('submit', (event) => {
+        const message = event.submitter && event.submitter.dataset.confirm;
+        if (message && !window.confirm(message.replace('{count}', count.textContent))) {
+            event.preventDefault();
+        }
+    });
+    update();
+});
@@ -0,0 +1,96 @@
+/*
+ * Expandable lead rows on the contacts page.
+ *
+ * Each <tr data-lead-key> is one customer; its toggle button fetches the
+ * customer's messages from <tbody data-lead-messages="<url>"> (?key=...)
+ * the first time it is opened and shows them in a row underneath. Rows
+ * added later by live-updates.js work the same way (event delegation).
+ */
+function formatDate(value) {
+    return new Date(value).toLocaleString(undefined, { dateStyle: 'medium', timeStyle: 'short' });
+}
+
+function historyItem(message) {
+    const sentLabel = formatDate(message.sent_at);
+    const item = document.createElement('li');
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = 'w-full text-left px-4 py-2 rounded-lg hover:bg-white transition-colors';
+
+    const date = document.createElement('span');
+    date.className = 'text-xs text-slate-500 mr-3';
+    date.textContent = sentLabel;
+    const preview = document.createElement('span');
+    preview.className = 'text-sm text-slate-800';
+    preview.textContent = message.message.length > 120 ? `${message.message.slice(0, 120)}…` : message.message;
+
+    button.append(date, preview);
+    button.addEventListener('click', () => {
+        window.viewContact(String(message.id), message.name, message.email, message.message, sentLabel);
+    });
+    item.append(button);
+    return item;
+}
+
+function renderHistory(cell, data, total) {
+    const list = document.createElement('ul');
+    list.className = 'space-y-1';
+    data.messages.forEach((message) => list.append(historyItem(message)));
+    cell.replaceChildren(list);
+
+    // message_count includes messages moved to the archive
+    const archived = total - data.messages.length;
+    if (archived > 0) {
+        const note = document.createElement('p');
+        note.className = 'text-xs text-slate-500 px-4 pt-2';
+        note.textContent = data.messages.length >= data.limit
+            ? `Showing the latest ${data.limit} of ${total} messages.`
+            : `${archived} older message${archived === 1 ? ' is' : 's are'} in the archive.`;
+        cell.append(note);
+    }
+}
+
+async function toggleLead(tbody, row, button) {
+    const next = row.nextElementSibling;
+    if (next && next.hasAttribute('data-lead-history')) {
+        next.hidden = !next.hidden;
+        button.setAttribute('aria-expanded', String(!next.hidden));
+        return;
+    }
+
+    const historyRow = document.createElement('tr');
+    historyRow.setAttribute('data-lead-history', '');
+    const cell = document.createElement('td');
+    cell.colSpan = row.cells.length;
+    cell.className = 'px-6 py-4 bg-slate-50 border-b border-slate-200 text-sm text-slate-500';
+    cell.textContent = 'Loading messages…';
+    historyRow.append(cell);
+    row.after(historyRow);
+    button.setAttribute('aria-expanded', 'true');
+
+    const url = `${tbody.dataset.leadMessages}?key=${encodeURIComponent(row.dataset.leadKey)}`;
+    try {
+        const response = await fetch(url, { headers: { Accept: 'application/json' } });
+        if (!response.ok) {
+            throw new Error(response.statusText);
+        }
+        const total = parseInt(row.querySelector('[data-lead-count]').dataset.leadCount, 10);
+        renderHistory(cell, await response.json(), total);
+    } catch (error) {
+        // Dropped so the next click retries
+        historyRow.remove();
+        button.setAttribute('aria-expanded', 'false');
+        if (typeof window.showToast === 'function') {
+            window.showToast('Could not load the messages', 'error');
+        }
+    }
+}
+
+document.querySelectorAll('tbody[data-lead-messages]').forEach((tbody) => {
+    tbody.addEventListener('click', (event) => {
+        const button = event.target.closest('[data-lead-toggle]');
+        if (button) {
+            toggleLead(tbody, button.closest('tr'), button);
+        }
+    });
+});
@@ -0,0 +1,114 @@
+/*
+ * Live admin updates over Server-Sent Events (backend.live_updates).
+ *
+ * The page opts in with data-live-updates="<stream url>" on <body>:
+ * - [data-live-count="total_contacts"] etc. follow "counts" events
+ * - a <tbody data-live-contacts> of lead rows (leads.js) moves the
+ *   sender's row to the top and bumps its count, or adds a row for a new
+ *   customer
+ * - "resync" (this tab fell behind, or missed events expired) reloads
+ *
+ * EventSource reconnects by itself and sends Last-Event-ID, so the server
+ * replays whatever happened while the connection was down.
+ */
+function setCount(name, value) {
+    document.querySelectorAll(`[data-live-count="${name}"]`).forEach((element) => {
+        element.dataset.count = value;
+        element.textContent = value.toLocaleString();
+    });
+}
+
+function applyCounts({ delta, values }) {
+    if (values) {
+        Object.entries(values).forEach(([name, value]) => setCount(name, value));
+    }
+    if (delta) {
+        Object.entries(delta).forEach(([name, change]) => {
+            const element = document.querySelector(`[data-live-count="${name}"]`);
+            if (element) {
+                setCount(name, Math.max(parseInt(element.dataset.count, 10) + change, 0));
+            }
+        });
+    }
+}
+
+function formatDate(value) {
+    return new Date(value).toLocaleString(undefined, { dateStyle: 'medium', timeStyle: 'short' });
+}
+
+function leadRow(tbody, contact) {
+    const template = tbody.querySelector('tr[data-lead-key]');
+    if (!template) {
+        return null;
+    }
+    const row = template.cloneNode(true);
+    row.dataset.leadKey = contact.lead_key;
+    row.querySelector('[data-lead-count]').dataset.leadCount = 0;
+    row.querySelector('[data-lead-first-seen]').textContent = formatDate(contact.sent_at);
+    row.querySelector('[data-lead-toggle]').setAttribute('aria-expanded', 'false');
+    // The new lead's id isn't known here; it can be selected after a reload
+    const select = row.querySelector('[data-lead-select]');
+    if (select) {
+        select.replaceChildren();
+    }
+    return row;
+}
+
+function upsertLead(tbody, contact) {
+    let row = [...tbody.querySelectorAll('tr[data-lead-key]')].find((tr) => tr.dataset.leadKey === contact.lead_key);
+    if (row) {
+        // Its loaded history is stale now; it is fetched again on expand
+        const history = row.nextElementSibling;
+        if (history && history.hasAttribute('data-lead-history')) {
+            history.remove();
+        }
+        row.querySelector('[data-lead-toggle]').setAttribute('aria-expanded', 'false');
+    } else {
+        row = leadRow(tbody, contact);
+        if (!row) {
+            return;
+        }
+    }
+    row.querySelector('[data-lead-name]').textContent = contact.name;
+    row.querySelector('[data-lead-email]').textContent = contact.email;
+    const count = row.querySelector('[data-lead-count]');
+    count.dataset.leadCount = parseInt(count.dataset.leadCount, 10) + 1;
+    count.textContent = count.dataset.leadCount;
+    row.querySelector('[data-lead-last-seen]').textContent = formatDate(contact.sent_at);
+    tbody.prepend(row);
+
+    // Serial numbers count from the most recent lead
+    tbody.querySelectorAll('[data-lead-sn]').forEach((cell, index) => {
+        cell.textContent = index + 1;
+    });
+}
+
+function connect(url) {
+    const source = new EventSource(url);
+    // Free the server-side slot as soon as the tab goes away
+    window.addEventListener('pagehide', () => source.close(), { once: true });
+
+    source.addEventListener('counts', (event) => applyCounts(JSON.parse(event.data)));
+    source.addEventListener('contact', (event) => {
+        const contact = JSON.parse(event.data);
+        const tbody = document.querySelector('[data-live-contacts]');
+        if (tbody) {
+            upsertLead(tbody, contact);
+        }
+        if (typeof window.showToast === 'function') {
+            window.showToast(`New message from ${contact.name}`, 'success');
+        }
+    });
+    source.addEventListener('resync', () => window.location.reload());
+}
+
+const url = document.body.dataset.liveUpdates;
+if (url && 'EventSource' in window) {
+    connect(url);
+    // Restored from the back/forward cache: the old stream was closed
+    window.addEventListener('pageshow', (event) => {
+        if (event.persisted) {
+            connect(url);
+        }
+    });
+}
@@ -0,0 +1,36 @@
+/*
+ * Back-to-top button shown once the visitor scrolled past the first 300px.
+ *
+ * An IntersectionObserver watching a 300px sentinel at the top of the page
+ * replaces the scroll listener, so nothing runs (and no layout is read) on
+ * every scroll event.
+ */
+const VISIBLE = ['opacity-100', 'visible'];
+const HIDDEN = ['opacity-0', 'invisible'];
+
+export function initBackToTop(button) {
+    if (!button) {
+        return;
+    }
+    button.addEventListener('click', (event) => {
+        event.preventDefault();
+        window.scrollTo({ top: 0, behavior: 'smooth' });
+    });
+
+    if (!('IntersectionObserver' in window)) {
+        button.classList.remove(...HIDDEN);
+        button.classList.add(...VISIBLE);
+        return;
+    }
+
+    const sentinel = document.createElement('div');
+    sentinel.setAttribute('aria-hidden', 'true');
+    sentinel.style.cssText = 'position:absolute;top:0;left:0;width:1px;height:300px;pointer-events:none;';
+    document.body.prepend(sentinel);
+
+    new IntersectionObserver(([entry]) => {
+        const scrolledPast = !entry.isIntersecting;
+        button.classList.remove(...(scrolledPast ? HIDDEN : VISIBLE));
+        button.classList.add(...(scrolledPast ? VISIBLE : HIDDEN));
+    }).observe(sentinel);
+}
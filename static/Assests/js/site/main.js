@@ -0,0 +1,34 @@
+/*
+ * Entry point of the public site's client bundle.
+ *
+ * Loaded with <script type="module">, which never blocks parsing and runs
+ * after the document is parsed. Shared behaviour lives in small ES
+ * modules; page-specific features are split out and only fetched through
+ * dynamic import() on pages that use them.
+ */
+import { initNavigation } from './navigation.js';
+import { initBackToTop } from './back-to-top.js';
+
+initNavigation();
+initBackToTop(document.getElementById('back-to-top'));
+
+const revealTargets = document.querySelectorAll('[data-reveal]');
+if (revealTargets.length) {
+    import('./reveal.js').then(({ initReveal }) => initReveal(revealTargets));
+}
+
+const prefetchLinks = document.querySelectorAll('a[data-prefetch]');
+const speculationRules = HTMLScriptElement.supports && HTMLScriptElement.supports('speculationrules');
+if (prefetchLinks.length && !speculationRules) {
+    import('./prefetch.js').then(({ initPrefetch }) => initPrefetch(prefetchLinks));
+}
+
+// Blog pages come from shared caches, so their views are counted here
+const viewBeacon = document.body.dataset.viewBeacon;
+if (viewBeacon && navigator.sendBeacon) {
+    navigator.sendBeacon(viewBeacon);
+}
+
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => navigator.serviceWorker.register('/service-worker.js'));
+}
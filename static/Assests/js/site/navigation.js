@@ -0,0 +1,39 @@
+/*
+ * Mobile menu and active navigation link.
+ */
+function closeMenu(menu) {
+    menu.classList.add('-translate-x-full');
+    menu.classList.remove('translate-x-0');
+    document.body.style.overflow = '';
+}
+
+function openMenu(menu) {
+    menu.classList.add('translate-x-0');
+    menu.classList.remove('-translate-x-full');
+    document.body.style.overflow = 'hidden';
+}
+
+export function initNavigation() {
+    const menu = document.getElementById('mobile-menu');
+    const toggle = document.getElementById('mobile-menu-toggle');
+    const close = document.getElementById('mobile-menu-close');
+
+    if (menu && toggle && close) {
+        toggle.addEventListener('click', () => openMenu(menu));
+        close.addEventListener('click', () => closeMenu(menu));
+        // Links inside the menu and clicks on the backdrop close it
+        menu.addEventListener('click', (event) => {
+            if (event.target === menu || event.target.closest('a')) {
+                closeMenu(menu);
+            }
+        });
+    }
+
+    const currentPath = window.location.pathname;
+    document.querySelectorAll('nav a').forEach((link) => {
+        if (link.getAttribute('href') === currentPath) {
+            link.classList.add('text-purple-600', 'font-semibold', 'border-b-2', 'border-purple-600', 'pb-1');
+            link.classList.remove('text-gray-700');
+        }
+    });
+}
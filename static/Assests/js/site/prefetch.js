@@ -0,0 +1,37 @@
+/*
+ * Hover prefetch for browsers without speculation rules support.
+ *
+ * Mirrors the {% speculation_rules %} tag: links marked data-prefetch are
+ * fetched with <link rel="prefetch"> once the pointer rested on them for a
+ * moment, or on touchstart/focus, so the detail page is in the cache by
+ * the time the click lands. Skipped when the visitor asked to save data.
+ */
+const HOVER_DELAY = 80;
+const prefetched = new Set();
+
+function prefetch(href) {
+    if (prefetched.has(href)) {
+        return;
+    }
+    prefetched.add(href);
+    const link = document.createElement('link');
+    link.rel = 'prefetch';
+    link.href = href;
+    document.head.appendChild(link);
+}
+
+export function initPrefetch(links) {
+    const connection = navigator.connection;
+    if ((connection && connection.saveData) || !document.createElement('link').relList.supports('prefetch')) {
+        return;
+    }
+    links.forEach((link) => {
+        let timer = null;
+        link.addEventListener('pointerenter', () => {
+            timer = setTimeout(() => prefetch(link.href), HOVER_DELAY);
+        });
+        link.addEventListener('pointerleave', () => clearTimeout(timer));
+        link.addEventListener('touchstart', () => prefetch(link.href), { passive: true });
+        link.addEventListener('focus', () => prefetch(link.href));
+    });
+}
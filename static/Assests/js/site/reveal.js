@@ -0,0 +1,37 @@
+/*
+ * Fade-in-up animation for [data-reveal] elements as they scroll into view.
+ *
+ * Only elements that start below the fold are hidden, and only from
+ * JavaScript, so content is never invisible without JS and nothing above
+ * the fold flickers. Visitors who prefer reduced motion get no animation.
+ */
+const STYLE = `
+[data-reveal].reveal-pending { opacity: 0; transform: translateY(24px); }
+[data-reveal].reveal-done { opacity: 1; transform: none; transition: opacity .6s ease-out, transform .6s ease-out; }
+`;
+
+export function initReveal(elements) {
+    if (!('IntersectionObserver' in window) || window.matchMedia('(prefers-reduced-motion: reduce)').matches) {
+        return;
+    }
+    const style = document.createElement('style');
+    style.textContent = STYLE;
+    document.head.append(style);
+
+    const observer = new IntersectionObserver((entries) => {
+        for (const entry of entries) {
+            if (entry.isIntersecting) {
+                entry.target.classList.replace('reveal-pending', 'reveal-done');
+                observer.unobserve(entry.target);
+            }
+        }
+    }, { rootMargin: '0px 0px -10% 0px' });
+
+    const foldLine = window.innerHeight;
+    elements.forEach((element) => {
+        if (element.getBoundingClientRect().top > foldLine) {
+            element.classList.add('reveal-pending');
+            observer.observe(element);
+        }
+    });
+}
@@ -1,5 +0,0 @@
-<?php
-  $links = array(
-    'js' => 'lib/waypoints/waypoints.min.js'
-  );
-?>